@@ -0,0 +1,252 @@
+"""
+Batch judging for a whole flight of attempt videos.
+
+A judge table uploads every attempt of a heat at once. Items are fanned
+out through the shared StreetLiftingJudge with bounded concurrency, so
+they share the extraction executor, the pooled VLM client and the
+backend scheduler with all other traffic in the process.
+
+Batches run inside the API process and are kept in memory for a limited
+time after they finish; results are streamed to the submitting client as
+items complete and can be polled with the batch id afterwards.
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .regulations import Discipline
+from .judge_service import StreetLiftingJudge
+from .job_queue import JobStatus, build_judgment_payload
+from .scheduler import Priority
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    """One attempt video within a batch."""
+    index: int
+    judgment_id: str
+    filename: Optional[str]
+    discipline: Discipline
+    camera_angle: str
+    video_path: str
+    additional_context: Optional[str] = None
+    status: str = JobStatus.PENDING
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+    def to_dict(self) -> Dict[str, Any]:
+        duration = None
+        if self.started_at is not None and self.finished_at is not None:
+            duration = round(self.finished_at - self.started_at, 3)
+        return {
+            "index": self.index,
+            "judgment_id": self.judgment_id,
+            "filename": self.filename,
+            "discipline": self.discipline.value,
+            "camera_angle": self.camera_angle,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "duration_seconds": duration,
+        }
+
+
+@dataclass
+class JudgmentBatch:
+    """A set of items judged together, with progress tracking."""
+    batch_id: str
+    items: List[BatchItem]
+    concurrency: int
+    priority: Priority = Priority.NORMAL
+    force_refresh: bool = False
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    # Item indexes in completion order, for streaming
+    completion_order: List[int] = field(default_factory=list)
+    _changed: asyncio.Condition = field(default_factory=asyncio.Condition, repr=False)
+    _task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def progress(self) -> Dict[str, Any]:
+        """Aggregate counts over all items."""
+        counts = {
+            JobStatus.PENDING: 0,
+            JobStatus.PROCESSING: 0,
+            JobStatus.COMPLETED: 0,
+            JobStatus.FAILED: 0,
+        }
+        for item in self.items:
+            counts[item.status] += 1
+        finished = counts[JobStatus.COMPLETED] + counts[JobStatus.FAILED]
+        end = self.finished_at or time.time()
+        return {
+            "total": len(self.items),
+            **counts,
+            "fraction_done": round(finished / len(self.items), 4) if self.items else 1.0,
+            "elapsed_seconds": round(end - self.created_at, 3),
+        }
+
+    def summary(self, include_results: bool = False) -> Dict[str, Any]:
+        """Batch status, progress and per-item status."""
+        items = []
+        for item in self.items:
+            entry = item.to_dict()
+            if not include_results:
+                entry.pop("result")
+            items.append(entry)
+        return {
+            "batch_id": self.batch_id,
+            "status": JobStatus.COMPLETED if self.done else JobStatus.PROCESSING,
+            "concurrency": self.concurrency,
+            "priority": self.priority.name.lower(),
+            "progress": self.progress(),
+            "items": items,
+        }
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield batch events: an initial snapshot, one "item" event per
+        finished item in completion order, and a final "batch" event.
+
+        Items that finished before the iterator started are replayed first.
+        """
+        yield {"event": "batch", **self.summary()}
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: len(self.completion_order) > sent or self.done
+                )
+                pending = self.completion_order[sent:]
+                finished = self.done
+            for index in pending:
+                yield {
+                    "event": "item",
+                    **self.items[index].to_dict(),
+                    "progress": self.progress(),
+                }
+            sent += len(pending)
+            if finished and sent == len(self.completion_order):
+                break
+        yield {"event": "batch", **self.summary()}
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
+
+
+async def run_batch(judge: StreetLiftingJudge, batch: JudgmentBatch):
+    """Judge all items of a batch, at most `batch.concurrency` at a time."""
+    slots = asyncio.Semaphore(batch.concurrency)
+
+    async def judge_item(item: BatchItem):
+        async with slots:
+            item.status = JobStatus.PROCESSING
+            item.started_at = time.time()
+            try:
+                result = await judge.analyze_video(
+                    discipline=item.discipline,
+                    video_path=item.video_path,
+                    camera_angle=item.camera_angle,
+                    additional_context=item.additional_context,
+                    force_refresh=batch.force_refresh,
+                    priority=batch.priority
+                )
+                item.result = build_judgment_payload(item.judgment_id, result)
+                item.status = JobStatus.COMPLETED
+            except Exception as e:
+                logger.warning(f"Batch {batch.batch_id} item {item.index} failed: {e}")
+                item.error = str(e)
+                item.status = JobStatus.FAILED
+            finally:
+                item.finished_at = time.time()
+                if os.path.exists(item.video_path):
+                    os.unlink(item.video_path)
+                batch.completion_order.append(item.index)
+                await batch._notify()
+
+    try:
+        await asyncio.gather(*(judge_item(item) for item in batch.items))
+    finally:
+        batch.finished_at = time.time()
+        await batch._notify()
+
+
+# ============================================================================
+# Registry
+# ============================================================================
+
+_batches: Dict[str, JudgmentBatch] = {}
+
+
+def start_batch(
+    judge: StreetLiftingJudge,
+    items: List[BatchItem],
+    concurrency: int,
+    priority: Priority = Priority.NORMAL,
+    force_refresh: bool = False,
+    retention_seconds: float = 3600
+) -> JudgmentBatch:
+    """
+    Register a batch and start judging it in the background.
+
+    The batch keeps running if the submitting client disconnects; its
+    status stays available via get_batch() for `retention_seconds` after
+    it finishes.
+    """
+    purge_batches(retention_seconds)
+    batch = JudgmentBatch(
+        batch_id=str(uuid.uuid4()),
+        items=items,
+        concurrency=max(1, concurrency),
+        priority=priority,
+        force_refresh=force_refresh,
+    )
+    batch._task = asyncio.create_task(run_batch(judge, batch))
+    _batches[batch.batch_id] = batch
+    return batch
+
+
+def get_batch(batch_id: str) -> Optional[JudgmentBatch]:
+    return _batches.get(batch_id)
+
+
+def purge_batches(retention_seconds: float) -> int:
+    """Forget batches that finished more than `retention_seconds` ago."""
+    cutoff = time.time() - retention_seconds
+    expired = [
+        batch_id for batch_id, batch in _batches.items()
+        if batch.done and batch.finished_at < cutoff
+    ]
+    for batch_id in expired:
+        del _batches[batch_id]
+    return len(expired)
+
+
+async def cancel_batches():
+    """Cancel running batches and remove their spooled videos (shutdown)."""
+    tasks = [b._task for b in _batches.values() if b._task is not None and not b.done]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    for batch in _batches.values():
+        for item in batch.items:
+            if os.path.exists(item.video_path):
+                os.unlink(item.video_path)
@@ -0,0 +1,11 @@
+"""
+Benchmarks for the video judge pipeline.
+
+Run a benchmark as a module from the backend directory, e.g.:
+    python -m app.video_judge.bench.encoding video.mp4
+    python -m app.video_judge.bench.output_tokens
+    python -m app.video_judge.bench.pipeline --concurrency 1,4,16
+
+pipeline runs end to end on synthetic videos (videos.py) against a local
+mock OpenAI-compatible server (mock_server.py), so no backend is billed.
+"""
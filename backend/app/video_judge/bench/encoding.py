@@ -0,0 +1,117 @@
+"""
+Encoding benchmark: payload size and encode time per quality ladder rung.
+
+Decodes frames from a video once, then encodes them at every rung of an
+encoding profile's ladder and reports the bytes, estimated OpenAI image
+tokens and encode time of one request at each rung.
+
+Usage:
+    python -m app.video_judge.bench.encoding video.mp4 \
+        --profile '{"codec": "webp", "quality": 85, "budget_kb": 600}'
+"""
+
+import argparse
+import json
+import time
+from typing import Any, Dict, List
+
+from ..encoding import (
+    EncodingProfile,
+    encode_rung,
+    estimate_image_tokens,
+    parse_encoding_profiles,
+)
+from ..vlm_service import VideoFrameExtractor
+
+
+def decode_frames(video_path: str, num_frames: int) -> List[Any]:
+    """Decode uniformly spaced frames at full resolution."""
+    extractor = VideoFrameExtractor()
+    cv2 = extractor._get_cv2()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video file: {video_path}")
+    try:
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        indices = extractor._select_indices("uniform", total_frames, num_frames)
+        return [
+            frame for _, frame in
+            extractor._read_frames(cap, indices, extractor._choose_decode_mode(indices, cap.get(cv2.CAP_PROP_FPS)))
+        ]
+    finally:
+        cap.release()
+
+
+def benchmark_ladder(images: List[Any], profile: EncodingProfile, repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Encode all images at each rung of the profile's ladder.
+
+    Returns:
+        One row per rung with payload size, image tokens, encode time and
+        whether the rung fits the profile's budget
+    """
+    import cv2
+
+    rows = []
+    longest_side = max(max(image.shape[:2]) for image in images)
+    for dimension, quality in profile.ladder(longest_side):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            encoded = [encode_rung(cv2, image, profile.codec, dimension, quality) for image in images]
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        total_bytes = sum(len(image.data) for image in encoded)
+        rows.append({
+            "max_dimension": dimension,
+            "quality": quality,
+            "width": encoded[0].width,
+            "height": encoded[0].height,
+            "total_bytes": total_bytes,
+            "avg_bytes": total_bytes // len(encoded),
+            # Base64 inflates the request body by a third
+            "payload_bytes": sum((len(image.data) + 2) // 3 * 4 for image in encoded),
+            "image_tokens": sum(
+                estimate_image_tokens(image.width, image.height, profile.detail)
+                for image in encoded
+            ),
+            "encode_ms_per_frame": round(best * 1000 / len(encoded), 2),
+            "fits_budget": profile.fits(encoded) if profile.has_budget else None,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("video", help="Video file to take frames from")
+    parser.add_argument("--frames", type=int, default=16, help="Frames per request")
+    parser.add_argument("--profile", default="{}", help="Encoding profile as JSON")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions per rung (best is kept)")
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args()
+
+    profile = parse_encoding_profiles(json.dumps({"bench": json.loads(args.profile)}))["bench"]
+    images = decode_frames(args.video, args.frames)
+    if not images:
+        raise SystemExit(f"No frames could be decoded from: {args.video}")
+    rows = benchmark_ladder(images, profile, args.repeat)
+
+    if args.json:
+        print(json.dumps({"profile": profile.__dict__, "frames": len(images), "rungs": rows}, indent=2))
+        return
+
+    print(f"{len(images)} frames, codec={profile.codec}, detail={profile.detail}")
+    print(f"{'rung':>4} {'size':>9} {'quality':>7} {'total KB':>9} {'avg KB':>7} "
+          f"{'payload KB':>10} {'tokens':>7} {'ms/frame':>8} {'fits':>5}")
+    for i, row in enumerate(rows):
+        fits = "-" if row["fits_budget"] is None else ("yes" if row["fits_budget"] else "no")
+        print(
+            f"{i:>4} {row['width']:>4}x{row['height']:<4} {row['quality']:>7} "
+            f"{row['total_bytes'] / 1024:>9.1f} {row['avg_bytes'] / 1024:>7.1f} "
+            f"{row['payload_bytes'] / 1024:>10.1f} {row['image_tokens']:>7} "
+            f"{row['encode_ms_per_frame']:>8.2f} {fits:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
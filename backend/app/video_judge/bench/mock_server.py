@@ -0,0 +1,251 @@
+"""
+Mock OpenAI-compatible VLM server for benchmarks.
+
+Serves /v1/chat/completions with a canned judgment after a configurable
+latency, streaming it over server-sent events when asked to. Point the
+judge at it with a vLLM backend:
+
+    python -m app.video_judge.bench.mock_server --port 8900 --latency-ms 800
+    VLM_BACKEND=vllm_llava VLLM_BASE_URL=http://127.0.0.1:8900 ...
+
+Requests that carry a guided decoding schema (guided_json or a
+json_schema response_format) get a compact answer, others a verbose one.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..regulations import Discipline
+from .output_tokens import sample_answers
+
+
+# Prompt headings that identify the discipline being judged
+_HEADINGS = {
+    "PULL-UP ANALYSIS": Discipline.PULL_UP,
+    "DIP ANALYSIS": Discipline.DIP,
+    "SQUAT ANALYSIS": Discipline.SQUAT,
+}
+
+
+@dataclass
+class MockSettings:
+    """Timing and answers of the mock server."""
+    latency_ms: float = 500.0  # Time before the first token
+    latency_per_image_ms: float = 0.0  # Added per image, like prefill
+    jitter_ms: float = 0.0  # Uniform +/- jitter on the latency
+    tokens_per_second: Optional[float] = None  # Generation speed; None sends the answer at once
+    reps: int = 1  # Reps in the canned answer
+    response: Optional[str] = None  # Fixed answer text instead of the canned judgment
+
+
+def _text_parts(body: Dict[str, Any]):
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            yield content
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                yield part.get("text", "")
+
+
+def _count_images(body: Dict[str, Any]) -> int:
+    return sum(
+        1
+        for message in body.get("messages", [])
+        if not isinstance(message.get("content"), str)
+        for part in message.get("content") or []
+        if part.get("type") == "image_url"
+    )
+
+
+def canned_answer(body: Dict[str, Any], settings: MockSettings) -> str:
+    """The answer for a request: fixed text, or a judgment in the requested format."""
+    if settings.response is not None:
+        return settings.response
+    text = "\n".join(_text_parts(body))
+    discipline = next(
+        (discipline for heading, discipline in _HEADINGS.items() if heading in text),
+        Discipline.PULL_UP
+    )
+    verbose, compact = sample_answers(discipline, settings.reps)
+    if "guided_json" in body or (body.get("response_format") or {}).get("type") == "json_schema":
+        return json.dumps(compact, separators=(",", ":"))
+    return "```json\n" + json.dumps(verbose, indent=4) + "\n```"
+
+
+def create_app(settings: Optional[MockSettings] = None) -> FastAPI:
+    """Build the mock server app; request counts are served at /stats."""
+    settings = settings or MockSettings()
+    app = FastAPI(title="Mock VLM")
+    stats = {"requests": 0, "images": 0, "in_flight": 0, "max_in_flight": 0}
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "mock-vlm", "object": "model"}]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        images = _count_images(body)
+        answer = canned_answer(body, settings)
+        prompt_tokens = sum(len(text) for text in _text_parts(body)) // 4 + 765 * images
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": max(1, len(answer) // 4),
+            "total_tokens": prompt_tokens + max(1, len(answer) // 4),
+        }
+
+        stats["requests"] += 1
+        stats["images"] += images
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            latency = settings.latency_ms + settings.latency_per_image_ms * images
+            latency += random.uniform(-settings.jitter_ms, settings.jitter_ms)
+            await asyncio.sleep(max(0.0, latency) / 1000)
+        except BaseException:
+            stats["in_flight"] -= 1
+            raise
+
+        created = int(time.time())
+        if not body.get("stream"):
+            stats["in_flight"] -= 1
+            return JSONResponse({
+                "id": f"chatcmpl-mock-{stats['requests']}",
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "mock-vlm"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": answer},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            })
+
+        async def events():
+            try:
+                # About four characters per token, as for the usage counts
+                step = 16
+                delay = step / 4 / settings.tokens_per_second if settings.tokens_per_second else 0.0
+                for start in range(0, len(answer), step):
+                    chunk = {"choices": [{"index": 0, "delta": {"content": answer[start:start + step]}}]}
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    if delay:
+                        await asyncio.sleep(delay)
+                yield f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n"
+                yield "data: [DONE]\n\n"
+            finally:
+                stats["in_flight"] -= 1
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+class MockServer:
+    """
+    Run the mock server on a background thread.
+
+    Usage:
+        with MockServer(MockSettings(latency_ms=200)) as server:
+            client = VLLMClient(base_url=server.url)
+    """
+
+    def __init__(self, settings: Optional[MockSettings] = None, host: str = "127.0.0.1", port: int = 0):
+        try:
+            import uvicorn
+        except ImportError:
+            raise ImportError(
+                "uvicorn is required for the mock VLM server. "
+                "Install with: pip install uvicorn"
+            )
+        if port == 0:
+            with socket.socket() as probe:
+                probe.bind((host, 0))
+                port = probe.getsockname()[1]
+        self.host = host
+        self.port = port
+        self._server = uvicorn.Server(uvicorn.Config(
+            create_app(settings),
+            host=host,
+            port=port,
+            log_level="warning",
+            # The benchmark's concurrent requests must not queue in the backlog
+            backlog=4096
+        ))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.run, name="mock-vlm", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError(f"Mock VLM server did not start on {self.url}")
+            time.sleep(0.01)
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def __enter__(self) -> "MockServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Time before the first token")
+    parser.add_argument("--latency-per-image-ms", type=float, default=0.0, help="Extra latency per image")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform +/- jitter on the latency")
+    parser.add_argument("--tokens-per-second", type=float, help="Generation speed of streamed answers")
+    parser.add_argument("--reps", type=int, default=1, help="Reps in the canned judgment")
+    parser.add_argument("--response", help="File with a fixed answer to return instead")
+    args = parser.parse_args()
+
+    response = None
+    if args.response:
+        with open(args.response) as f:
+            response = f.read()
+    settings = MockSettings(
+        latency_ms=args.latency_ms,
+        latency_per_image_ms=args.latency_per_image_ms,
+        jitter_ms=args.jitter_ms,
+        tokens_per_second=args.tokens_per_second,
+        reps=args.reps,
+        response=response
+    )
+
+    import uvicorn
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="info")
+
+
+if __name__ == "__main__":
+    main()
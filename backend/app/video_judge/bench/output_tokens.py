@@ -0,0 +1,148 @@
+"""
+Output token benchmark: verbose vs compact judgment answers.
+
+Builds the answer a model gives for sets of 1 to N reps in both response
+formats (the verbose answer with typical lengths of free-text notes and
+observations) and counts their tokens. Answers are checked to parse to
+the same judgment. Tokens are counted with tiktoken when it is installed,
+otherwise estimated as characters / 4.
+
+Usage:
+    python -m app.video_judge.bench.output_tokens --reps 5
+"""
+
+import argparse
+import json
+from typing import Any, Callable, Dict, List, Tuple
+
+from ..compact import CRITERIA_KEYS, expand_compact
+from ..regulations import Discipline, get_invalid_reasons
+
+
+def token_counter() -> Tuple[str, Callable[[str], int]]:
+    """(name, count function) of the best available tokenizer."""
+    try:
+        import tiktoken
+    except ImportError:
+        return "chars/4", lambda text: max(1, round(len(text) / 4))
+    encoding = tiktoken.get_encoding("o200k_base")
+    return "tiktoken o200k_base", lambda text: len(encoding.encode(text))
+
+
+def sample_answers(discipline: Discipline, reps: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    A verbose and a compact answer judging the same set.
+
+    Every third rep fails its second criterion with the first invalid
+    reason, and every other rep has one uncertain criterion.
+    """
+    keys = CRITERIA_KEYS[discipline]
+    reason = get_invalid_reasons(discipline)[0]
+    verbose_reps: List[Dict[str, Any]] = []
+    compact_reps: List[Dict[str, Any]] = []
+    for number in range(1, reps + 1):
+        failed = number % 3 == 0
+        states = ["y"] * len(keys)
+        if number % 2 == 0:
+            states[-1] = "u"
+        if failed:
+            states[1] = "n"
+        verbose_reps.append({
+            "rep_number": number,
+            "is_valid": not failed,
+            "confidence": 0.85,
+            "criteria_met": {
+                name: {"y": True, "n": False, "u": "uncertain"}[state]
+                for name, state in zip(keys.values(), states)
+            },
+            "invalid_reasons": [reason.description] if failed else [],
+            "notes": "Clean start from a full hang; lockout is partly hidden by the bar at the top.",
+        })
+        compact_reps.append({
+            "i": number,
+            "v": not failed,
+            "c": 0.85,
+            "k": dict(zip(keys, states)),
+            "x": [reason.code] if failed else [],
+        })
+
+    invalid = sum(1 for rep in verbose_reps if not rep["is_valid"])
+    judgment = "INVALID" if invalid else "VALID"
+    verbose = {
+        "discipline": discipline.value,
+        "total_reps_attempted": reps,
+        "valid_reps": reps - invalid,
+        "invalid_reps": invalid,
+        "overall_judgment": judgment,
+        "confidence": 0.85,
+        "rep_analysis": verbose_reps,
+        "frame_observations": {
+            "frame_quality": "good",
+            "visibility_issues": ["Motion blur in the fastest frames"],
+            "key_frames": [
+                {"frame_description": "bottom position", "observation": "Arms fully extended, body still"},
+                {"frame_description": "top position", "observation": "Target position reached"},
+            ],
+        },
+        "recommendations": "Film from slightly further back so the whole movement stays in frame.",
+    }
+    compact = {"j": judgment[0], "c": 0.85, "n": reps, "r": compact_reps, "q": "g"}
+    return verbose, compact
+
+
+def benchmark_formats(discipline: Discipline, max_reps: int, count: Callable[[str], int]) -> List[Dict[str, Any]]:
+    """Token counts of both formats for sets of 1 to max_reps reps."""
+    rows = []
+    for reps in range(1, max_reps + 1):
+        verbose, compact = sample_answers(discipline, reps)
+        expanded = expand_compact(compact, discipline)
+        for field in ("overall_judgment", "total_reps_attempted", "valid_reps", "invalid_reps"):
+            if expanded[field] != verbose[field]:
+                raise AssertionError(f"Compact answer expands to a different {field}")
+        # Verbose answers come pretty-printed in a code fence, as the
+        # prompt's template shows; compact answers are minified
+        verbose_text = "```json\n" + json.dumps(verbose, indent=4) + "\n```"
+        compact_text = json.dumps(compact, separators=(",", ":"))
+        verbose_tokens = count(verbose_text)
+        compact_tokens = count(compact_text)
+        rows.append({
+            "discipline": discipline.value,
+            "reps": reps,
+            "verbose_tokens": verbose_tokens,
+            "compact_tokens": compact_tokens,
+            "saved": round(1 - compact_tokens / verbose_tokens, 3),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--reps", type=int, default=5, help="Largest set size")
+    parser.add_argument(
+        "--discipline",
+        choices=[discipline.value for discipline in Discipline],
+        action="append",
+        help="Disciplines to measure (default: all)"
+    )
+    parser.add_argument("--json", action="store_true", help="Print rows as JSON")
+    args = parser.parse_args()
+
+    tokenizer, count = token_counter()
+    disciplines = [Discipline(value) for value in args.discipline or [d.value for d in Discipline]]
+    rows = [row for discipline in disciplines for row in benchmark_formats(discipline, args.reps, count)]
+
+    if args.json:
+        print(json.dumps({"tokenizer": tokenizer, "rows": rows}, indent=2))
+        return
+
+    print(f"Output tokens per answer ({tokenizer})")
+    print(f"{'discipline':>10} {'reps':>4} {'verbose':>8} {'compact':>8} {'saved':>6}")
+    for row in rows:
+        print(
+            f"{row['discipline']:>10} {row['reps']:>4} {row['verbose_tokens']:>8} "
+            f"{row['compact_tokens']:>8} {row['saved']:>6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
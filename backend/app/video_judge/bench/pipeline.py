@@ -0,0 +1,317 @@
+"""
+End-to-end pipeline benchmark against a local mock VLM.
+
+Generates synthetic videos, starts the mock OpenAI-compatible server and
+measures, per video:
+- per-stage time of one request: decode, resize, encode, base64, request
+  build, network (including the mock's latency) and response parsing
+- throughput and latency of full analyze_video calls at N concurrent
+  requests through a vLLM-backend judge
+- peak RSS of the process after each phase
+- reps found by motion analysis, against the reps the video was made with
+
+Usage:
+    python -m app.video_judge.bench.pipeline \
+        --video 1920x1080:10s:mp4v --video 1280x720:10s:mp4v:gop12 \
+        --concurrency 1,4,16 --requests 32 --latency-ms 300 --json
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from ..encoding import EncodingProfile, encode_image, parse_encoding_profiles, resize_to
+from ..judge_service import JudgeConfig, StreetLiftingJudge
+from ..motion import segment_reps
+from ..prompts import SYSTEM_PROMPT, get_prompt_parts
+from ..regulations import Discipline
+from ..vlm_service import FrameData, VLMBackend, VideoFrameExtractor, _chat_body
+from .mock_server import MockServer, MockSettings
+from .videos import generate_videos, parse_video_spec
+
+
+DEFAULT_VIDEOS = ["1920x1080:10s:mp4v", "1280x720:10s:mp4v:gop12", "640x360:10s:MJPG"]
+STAGES = ("decode", "resize", "encode", "base64", "request_build", "network", "parse")
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (and reaped children) in MB."""
+    peak = sum(
+        resource.getrusage(who).ru_maxrss
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    )
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+async def time_stages(
+    video_path: str,
+    num_frames: int,
+    profile: EncodingProfile,
+    discipline: Discipline,
+    http: httpx.AsyncClient,
+    judge: StreetLiftingJudge,
+    compact: bool = False
+) -> Dict[str, Any]:
+    """Milliseconds spent in each stage of one request, run step by step."""
+    extractor = VideoFrameExtractor(encoding=profile)
+    cv2 = extractor._get_cv2()
+    timings = {}
+
+    started = time.perf_counter()
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video file: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        indices = extractor._select_indices("uniform", int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), num_frames)
+        decoded = list(extractor._read_frames(cap, indices, extractor._choose_decode_mode(indices, fps)))
+    finally:
+        cap.release()
+    timings["decode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    images = [resize_to(cv2, frame, profile.max_dimension) for _, frame in decoded]
+    timings["resize"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    encoded = [encode_image(cv2, image, profile.codec, profile.quality) for image in images]
+    timings["encode"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    payloads = [base64.b64encode(data).decode("utf-8") for data in encoded]
+    timings["base64"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    frames = [
+        FrameData(idx, (idx / fps) * 1000 if fps > 0 else 0, payload, image.shape[1], image.shape[0],
+                  mime_type=profile.mime_type)
+        for (idx, _), image, payload in zip(decoded, images, payloads)
+    ]
+    prompt = get_prompt_parts(discipline, compact=compact)
+    extra = {"guided_json": prompt.schema} if prompt.schema is not None else {}
+    body = json.dumps(_chat_body("mock-vlm", frames, prompt.suffix, SYSTEM_PROMPT, prompt.prefix, **extra))
+    timings["request_build"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    response = await http.post(
+        "/v1/chat/completions",
+        content=body,
+        headers={"Content-Type": "application/json"}
+    )
+    response.raise_for_status()
+    text = response.json()["choices"][0]["message"]["content"]
+    timings["network"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = judge._parse_vlm_response(text, discipline, "mock-vlm")
+    timings["parse"] = time.perf_counter() - started
+    if "error" in result.frame_analysis:
+        raise ValueError(f"Mock answer did not parse: {result.frame_analysis['error']}")
+
+    return {
+        **{f"{stage}_ms": round(seconds * 1000, 3) for stage, seconds in timings.items()},
+        "frames": len(frames),
+        "request_kb": round(len(body) / 1024, 1),
+    }
+
+
+async def measure_throughput(
+    judge: StreetLiftingJudge,
+    video_path: str,
+    discipline: Discipline,
+    concurrency: int,
+    requests: int
+) -> Dict[str, Any]:
+    """Run full analyze_video calls, at most `concurrency` at a time."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await judge.analyze_video(discipline, video_path=video_path)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p: float) -> Optional[float]:
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000, 1)
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": errors,
+        "wall_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "latency_p50_ms": percentile(50),
+        "latency_p95_ms": percentile(95),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def run(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    specs = [parse_video_spec(value) for value in args.video or DEFAULT_VIDEOS]
+    video_dir = args.video_dir or os.path.join(tempfile.gettempdir(), "video_judge_bench")
+    started = time.perf_counter()
+    paths = generate_videos(specs, video_dir)
+    generate_s = time.perf_counter() - started
+
+    profile = parse_encoding_profiles(json.dumps({"bench": json.loads(args.profile)}))["bench"]
+    discipline = Discipline(args.discipline)
+    concurrency_levels = [int(value) for value in args.concurrency.split(",")]
+    judge = StreetLiftingJudge(JudgeConfig(
+        vlm_backend=VLMBackend.VLLM_LLAVA,
+        vlm_base_url=base_url,
+        vlm_model="mock-vlm",
+        num_frames=args.frames,
+        cache_enabled=False,
+        scheduler_max_in_flight=max(concurrency_levels),
+        http_max_connections=max(concurrency_levels),
+        http_max_keepalive=max(concurrency_levels),
+        encoding_profiles={"*": profile},
+        output_format=args.output_format,
+        stream_responses=args.stream
+    ))
+
+    videos = []
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=120.0) as http:
+            for spec, path in zip(specs, paths):
+                runs = [
+                    await time_stages(
+                        path, args.frames, profile, discipline, http, judge,
+                        compact=args.output_format == "compact"
+                    )
+                    for _ in range(args.repeat)
+                ]
+                stages = {
+                    key: statistics.median(run[key] for run in runs)
+                    for key in runs[0]
+                }
+                stages["total_ms"] = round(sum(stages[f"{stage}_ms"] for stage in STAGES), 3)
+                stages["peak_rss_mb"] = peak_rss_mb()
+                throughput = [
+                    await measure_throughput(judge, path, discipline, concurrency, args.requests)
+                    for concurrency in concurrency_levels
+                ]
+                detected_reps = len(segment_reps(VideoFrameExtractor().analyze_motion(path)))
+                videos.append({
+                    "video": spec.name,
+                    "size_mb": round(os.path.getsize(path) / (1024 * 1024), 2),
+                    "reps": spec.reps,
+                    "detected_reps": detected_reps,
+                    "stages": stages,
+                    "throughput": throughput,
+                })
+    finally:
+        await judge.close()
+
+    return {
+        "base_url": base_url,
+        "frames": args.frames,
+        "profile": profile.__dict__,
+        "output_format": args.output_format,
+        "stream": args.stream,
+        "generate_s": round(generate_s, 2),
+        "videos": videos,
+        "vlm_stats": judge.vlm_stats(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{report['frames']} frames/request, codec={report['profile']['codec']}, "
+          f"max_dimension={report['profile']['max_dimension']}, output={report['output_format']}, "
+          f"VLM at {report['base_url']}")
+    print()
+    print(f"{'video':>40} " + " ".join(f"{stage:>13}" for stage in STAGES) + f" {'total':>9} {'req KB':>8}")
+    for video in report["videos"]:
+        stages = video["stages"]
+        print(
+            f"{video['video']:>40} "
+            + " ".join(f"{stages[f'{stage}_ms']:>13.2f}" for stage in STAGES)
+            + f" {stages['total_ms']:>9.1f} {stages['request_kb']:>8.1f}"
+        )
+    print()
+    print(f"{'video':>40} {'conc':>5} {'req/s':>7} {'p50 ms':>9} {'p95 ms':>9} {'errors':>6} {'RSS MB':>7}")
+    for video in report["videos"]:
+        for row in video["throughput"]:
+            print(
+                f"{video['video']:>40} {row['concurrency']:>5} {row['requests_per_s'] or 0:>7.2f} "
+                f"{row['latency_p50_ms'] or 0:>9.1f} {row['latency_p95_ms'] or 0:>9.1f} "
+                f"{row['errors']:>6} {row['peak_rss_mb']:>7.1f}"
+            )
+    print()
+    print(f"{'video':>40} {'reps':>5} {'found':>6}")
+    for video in report["videos"]:
+        print(f"{video['video']:>40} {video['reps']:>5} {video['detected_reps']:>6}")
+    print()
+    print(f"Peak RSS: {report['peak_rss_mb']} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--video",
+        action="append",
+        help="Synthetic video spec WIDTHxHEIGHT[:SECONDSs][:CODEC][:gopN], repeatable "
+             f"(default: {' '.join(DEFAULT_VIDEOS)})"
+    )
+    parser.add_argument("--video-dir", help="Where synthetic videos are written and reused")
+    parser.add_argument("--frames", type=int, default=16, help="Frames per request")
+    parser.add_argument("--profile", default="{}", help="Encoding profile as JSON")
+    parser.add_argument("--discipline", default="pull_up", choices=[d.value for d in Discipline])
+    parser.add_argument("--output-format", default="verbose", choices=["verbose", "compact"])
+    parser.add_argument("--stream", action="store_true", help="Stream VLM answers")
+    parser.add_argument("--repeat", type=int, default=3, help="Stage timing runs per video (median is kept)")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=16, help="analyze_video calls per concurrency level")
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Mock VLM latency")
+    parser.add_argument("--latency-per-image-ms", type=float, default=0.0, help="Mock VLM latency per image")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Mock VLM latency jitter")
+    parser.add_argument("--url", help="Benchmark an already running OpenAI-compatible server instead of the mock")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    if args.url:
+        report = asyncio.run(run(args, args.url.rstrip("/")))
+    else:
+        settings = MockSettings(
+            latency_ms=args.latency_ms,
+            latency_per_image_ms=args.latency_per_image_ms,
+            jitter_ms=args.jitter_ms
+        )
+        with MockServer(settings) as server:
+            report = asyncio.run(run(args, server.url))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
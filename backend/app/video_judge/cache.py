@@ -0,0 +1,302 @@
+"""
+Content-addressed cache for video judgment results.
+
+The same attempt video is often submitted several times (judge retries,
+phone re-uploads, sync and async endpoints hit back to back). Results are
+cached under a key built from a streaming hash of the video content plus
+everything else that influences the judgment: discipline, camera angle,
+frame budget, backend/model and the exact prompt text.
+
+Two tiers:
+1. In-memory LRU for hot entries
+2. On-disk JSON files with TTL and size-based eviction, shared by all
+   workers on the host
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, fields
+from typing import Any, Dict, Optional, Tuple
+
+from .vlm_service import VideoJudgmentResult, JudgmentDetail
+
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, read in fixed-size chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_bytes(data: bytes) -> str:
+    """SHA-256 of in-memory content."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """SHA-256 of a text, used for prompt versions."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def make_cache_key(**parts: Any) -> str:
+    """Build a cache key from named key parts."""
+    canonical = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def result_to_dict(result: VideoJudgmentResult) -> Dict[str, Any]:
+    """Serialize a judgment result to plain JSON types."""
+    return asdict(result)
+
+
+def result_from_dict(data: Dict[str, Any]) -> VideoJudgmentResult:
+    """Rebuild a judgment result, ignoring fields this version doesn't know."""
+    known = {f.name for f in fields(VideoJudgmentResult)}
+    values = {k: copy.deepcopy(v) for k, v in data.items() if k in known}
+    values["details"] = [JudgmentDetail(**d) for d in values.get("details", [])]
+    return VideoJudgmentResult(**values)
+
+
+class JudgmentCache:
+    """Two-tier (memory LRU + disk) cache of VideoJudgmentResult."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        directory: Optional[str] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_disk_bytes: int = 1024 * 1024 * 1024
+    ):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_bytes = max_disk_bytes
+
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expired": 0,
+        }
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[VideoJudgmentResult]:
+        """Look up a result, returning None on a miss or expired entry."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, data = entry
+                if now - created_at <= self.ttl_seconds:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return result_from_dict(data)
+                del self._memory[key]
+                self._counters["expired"] += 1
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._remember(key, *entry)
+        return result_from_dict(entry[1])
+
+    def put(self, key: str, result: VideoJudgmentResult):
+        """Store a result in both tiers."""
+        created_at = time.time()
+        data = result_to_dict(result)
+        with self._lock:
+            self._remember(key, created_at, data)
+            self._counters["stores"] += 1
+        self._write_disk(key, created_at, data)
+
+    def clear(self):
+        """Drop all entries from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        for path, _, _ in self._disk_entries():
+            self._remove(path)
+        self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and tier sizes."""
+        with self._lock:
+            counters = dict(self._counters)
+            memory_entries = len(self._memory)
+        lookups = counters["memory_hits"] + counters["disk_hits"] + counters["misses"]
+        hits = counters["memory_hits"] + counters["disk_hits"]
+        return {
+            **counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": memory_entries,
+            "disk_bytes": self._disk_bytes if self.directory else None,
+        }
+
+    # ------------------------------------------------------------------
+    # Memory tier
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, created_at: float, data: Dict[str, Any]):
+        self._memory[key] = (created_at, data)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Disk tier
+    # ------------------------------------------------------------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, Dict[str, Any]]]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            self._drop(path)
+            return None
+
+        if now - stored["created_at"] > self.ttl_seconds:
+            self._drop(path)
+            with self._lock:
+                self._counters["expired"] += 1
+            return None
+        return stored["created_at"], stored["result"]
+
+    def _write_disk(self, key: str, created_at: float, data: Dict[str, Any]):
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # An overwritten entry's old size no longer counts
+            previous = self._file_size(path)
+            # Write to a temp file and rename so readers never see partial JSON
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"created_at": created_at, "result": data}, f)
+            os.replace(temp_path, path)
+            size = os.path.getsize(path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {path}: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += size - previous
+            over = self._disk_bytes > self.max_disk_bytes
+        if over:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        """Yield (path, mtime, size) for every entry on disk."""
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _evict_disk(self):
+        """Remove expired entries, then the oldest ones until under 90% of the cap."""
+        now = time.time()
+        entries = sorted(self._disk_entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        target = 0.9 * self.max_disk_bytes
+        for path, mtime, size in entries:
+            expired = now - mtime > self.ttl_seconds
+            if not expired and total <= target:
+                break
+            self._remove(path)
+            total -= size
+            with self._lock:
+                self._counters["expired" if expired else "evictions"] += 1
+        with self._lock:
+            self._disk_bytes = total
+
+    def _drop(self, path: str):
+        """Remove one entry and stop counting its size."""
+        size = self._file_size(path)
+        self._remove(path)
+        with self._lock:
+            self._disk_bytes = max(0, self._disk_bytes - size)
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+_judgment_cache: Optional[JudgmentCache] = None
+
+
+def get_judgment_cache(
+    max_entries: int = 512,
+    directory: Optional[str] = None,
+    ttl_seconds: float = 7 * 24 * 3600,
+    max_disk_bytes: int = 1024 * 1024 * 1024
+) -> JudgmentCache:
+    """Get the process-wide judgment cache, creating it on first use."""
+    global _judgment_cache
+    if _judgment_cache is None:
+        _judgment_cache = JudgmentCache(
+            max_entries=max_entries,
+            directory=directory,
+            ttl_seconds=ttl_seconds,
+            max_disk_bytes=max_disk_bytes,
+        )
+    return _judgment_cache
+
+
+def current_judgment_cache() -> Optional[JudgmentCache]:
+    """The process-wide judgment cache, or None if it hasn't been created."""
+    return _judgment_cache
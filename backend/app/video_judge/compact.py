@@ -0,0 +1,190 @@
+"""
+Compact judgment output.
+
+The verbose response format spends most of its output tokens on key
+names, free-text observations and restated invalid reasons. The compact
+format uses one- or two-letter keys, enumerated criterion states and the
+reason codes from the regulations (PU001, SQ006, ...), and is expanded
+back into the verbose structure before results are built. Its JSON
+schema is strict enough for guided decoding (vLLM guided_json, OpenAI
+structured outputs, Gemini responseSchema), so answers always parse.
+"""
+
+from typing import Any, Dict, List
+
+from .regulations import Discipline, get_invalid_reasons
+
+
+# Short key -> verbose criteria_met key, per discipline
+CRITERIA_KEYS = {
+    Discipline.PULL_UP: {
+        "ext": "full_arm_extension_bottom",
+        "chin": "chin_above_bar",
+        "ctl": "controlled_movement",
+        "kip": "no_excessive_kipping",
+        "lock": "full_lockout_return",
+    },
+    Discipline.DIP: {
+        "ext": "full_arm_extension_top",
+        "par": "upper_arms_parallel_or_below",
+        "sh": "shoulder_below_elbow",
+        "ctl": "controlled_movement",
+        "sw": "no_excessive_swing",
+    },
+    Discipline.SQUAT: {
+        "ext": "full_hip_knee_extension_top",
+        "dep": "hip_crease_below_knee",
+        "ctl": "controlled_movement",
+        "bar": "stable_bar_position",
+        "lock": "full_lockout_top",
+    },
+}
+
+OUTPUT_FORMATS = ("verbose", "compact")
+
+JUDGMENTS = {"V": "VALID", "I": "INVALID", "R": "NEEDS_REVIEW"}
+CRITERION_STATES = {"y": True, "n": False, "u": "uncertain"}
+FRAME_QUALITY = {"g": "good", "f": "fair", "p": "poor"}
+
+# Compact counterparts of streaming.VERDICT_FIELDS and REQUIRED_FIELDS
+VERDICT_FIELDS = ("j", "c")
+REQUIRED_FIELDS = ("j", "c", "n", "r")
+
+
+def compact_schema(discipline: Discipline) -> Dict[str, Any]:
+    """
+    JSON schema of the compact answer for a discipline.
+
+    Every property is required and no others are allowed, as OpenAI's
+    strict structured outputs demand. Property order puts the verdict
+    first so streamed answers report it early.
+    """
+    criteria = {
+        key: {"type": "string", "enum": list(CRITERION_STATES)}
+        for key in CRITERIA_KEYS[discipline]
+    }
+    codes = [reason.code for reason in get_invalid_reasons(discipline)]
+    rep = {
+        "type": "object",
+        "properties": {
+            "i": {"type": "integer"},
+            "v": {"type": "boolean"},
+            "c": {"type": "number"},
+            "k": {
+                "type": "object",
+                "properties": criteria,
+                "required": list(criteria),
+                "additionalProperties": False,
+            },
+            "x": {"type": "array", "items": {"type": "string", "enum": codes}},
+        },
+        "required": ["i", "v", "c", "k", "x"],
+        "additionalProperties": False,
+    }
+    return {
+        "type": "object",
+        "properties": {
+            "j": {"type": "string", "enum": list(JUDGMENTS)},
+            "c": {"type": "number"},
+            "n": {"type": "integer"},
+            "r": {"type": "array", "items": rep},
+            "q": {"type": "string", "enum": list(FRAME_QUALITY)},
+        },
+        "required": ["j", "c", "n", "r", "q"],
+        "additionalProperties": False,
+    }
+
+
+def gemini_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a JSON schema to Gemini's responseSchema dialect.
+
+    Gemini takes an OpenAPI subset: no additionalProperties, and
+    propertyOrdering to fix the order fields are generated in.
+    """
+    converted = {
+        key: value for key, value in schema.items()
+        if key not in ("additionalProperties", "properties", "items")
+    }
+    if "properties" in schema:
+        converted["properties"] = {
+            name: gemini_schema(value) for name, value in schema["properties"].items()
+        }
+        converted["propertyOrdering"] = list(schema["properties"])
+    if "items" in schema:
+        converted["items"] = gemini_schema(schema["items"])
+    return converted
+
+
+def compact_format(discipline: Discipline) -> str:
+    """Response format instructions for compact answers."""
+    criteria = "\n".join(
+        f"    - {key}: {name}" for key, name in CRITERIA_KEYS[discipline].items()
+    )
+    reasons = "\n".join(
+        f"    - {reason.code}: {reason.description}" for reason in get_invalid_reasons(discipline)
+    )
+    example_criteria = ", ".join(f'"{key}": "y"' for key in CRITERIA_KEYS[discipline])
+    return f"""Respond with compact JSON only, no prose and no code fence:
+{{"j": "V", "c": 0.9, "n": 1, "r": [{{"i": 1, "v": true, "c": 0.9, "k": {{{example_criteria}}}, "x": []}}], "q": "g"}}
+
+Keys:
+- j: overall_judgment, "V" (VALID), "I" (INVALID) or "R" (NEEDS_REVIEW)
+- c: confidence, 0.0 to 1.0
+- n: total_reps_attempted
+- r: rep_analysis, one entry per repetition:
+  - i: rep_number
+  - v: whether the rep is valid
+  - c: confidence for this rep, 0.0 to 1.0
+  - k: criteria_met, each "y" (met), "n" (not met) or "u" (uncertain):
+{criteria}
+  - x: invalid reason codes, empty for a valid rep:
+{reasons}
+- q: frame quality, "g" (good), "f" (fair) or "p" (poor)"""
+
+
+def is_compact(parsed: Dict[str, Any]) -> bool:
+    """Whether a decoded answer uses the compact format."""
+    return "j" in parsed and "overall_judgment" not in parsed
+
+
+def expand_compact(parsed: Dict[str, Any], discipline: Discipline) -> Dict[str, Any]:
+    """
+    Expand a compact answer into the verbose response structure.
+
+    Unknown criterion keys and reason codes are kept as given rather than
+    dropped, so a model that strays from the enums still gets judged.
+    """
+    criteria_keys = CRITERIA_KEYS[discipline]
+    descriptions = {reason.code: reason.description for reason in get_invalid_reasons(discipline)}
+
+    reps: List[Dict[str, Any]] = []
+    for rep in parsed.get("r", []):
+        reps.append({
+            "rep_number": rep.get("i", len(reps) + 1),
+            "is_valid": bool(rep.get("v", False)),
+            "confidence": rep.get("c", 0.5),
+            "criteria_met": {
+                criteria_keys.get(key, key): CRITERION_STATES.get(state, state)
+                for key, state in rep.get("k", {}).items()
+            },
+            "invalid_reasons": [
+                f"{code}: {descriptions[code]}" if code in descriptions else code
+                for code in rep.get("x", [])
+            ],
+        })
+
+    expanded = {
+        "discipline": discipline.value,
+        "overall_judgment": JUDGMENTS.get(parsed.get("j"), "NEEDS_REVIEW"),
+        "confidence": parsed.get("c", 0.5),
+        "total_reps_attempted": parsed.get("n", len(reps)),
+        "valid_reps": sum(1 for rep in reps if rep["is_valid"]),
+        "invalid_reps": sum(1 for rep in reps if not rep["is_valid"]),
+        "rep_analysis": reps,
+    }
+    if "q" in parsed:
+        expanded["frame_observations"] = {
+            "frame_quality": FRAME_QUALITY.get(parsed["q"], parsed["q"])
+        }
+    return expanded
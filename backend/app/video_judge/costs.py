@@ -0,0 +1,191 @@
+"""
+Token and cost accounting for VLM requests, and budget planning.
+
+Backends report the prompt and completion tokens of every request
+(TokenUsage); this module prices them per backend and estimates what a
+request will cost before it is sent, so budget mode can pick the frame
+count and resolution of a judgment to stay under a token or cost cap.
+
+Prices are USD per million tokens. The defaults are list prices at the
+time of writing; override them per backend when they change:
+
+    VLM_TOKEN_PRICES='{"openai_gpt4o": {"input": 2.5, "output": 10, "cached_input": 1.25}}'
+"""
+
+import json
+import math
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from .encoding import EncodingProfile, estimate_image_tokens
+
+
+@dataclass(frozen=True)
+class TokenPrice:
+    """USD per million tokens on one backend."""
+    input: float = 0.0
+    output: float = 0.0
+    cached_input: Optional[float] = None  # Prefix cache hits; the input price if None
+
+
+# Self-hosted vLLM backends are not billed per token
+DEFAULT_PRICES = {
+    "openai_gpt4o": TokenPrice(input=2.50, output=10.00, cached_input=1.25),
+    "openai_gpt4v": TokenPrice(input=10.00, output=30.00),
+    "gemini_pro": TokenPrice(input=1.25, output=5.00, cached_input=0.3125),
+}
+
+# Completion tokens per answer assumed until the backend has reported some
+OUTPUT_TOKEN_ESTIMATES = {"verbose": 800, "compact": 120}
+
+# estimated_requests counts requests whose usage was estimated locally
+USAGE_FIELDS = (
+    "requests", "estimated_requests", "prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd"
+)
+
+
+def parse_token_prices(value: Optional[str]) -> Dict[str, TokenPrice]:
+    """
+    Parse per-backend token prices from JSON.
+
+    Example:
+        {"openai_gpt4o": {"input": 2.5, "output": 10, "cached_input": 1.25},
+         "*": {"input": 0.1, "output": 0.4}}
+
+    "*" applies to backends without their own entry.
+    """
+    if not value:
+        return {}
+    known = {f.name for f in fields(TokenPrice)}
+    prices = {}
+    for backend, settings in json.loads(value).items():
+        unknown = set(settings) - known
+        if unknown:
+            raise ValueError(f"Unknown token price fields for {backend}: {', '.join(sorted(unknown))}")
+        prices[backend] = TokenPrice(**settings)
+    return prices
+
+
+def price_for(prices: Dict[str, TokenPrice], backend: str) -> TokenPrice:
+    """The price of a backend: its own entry, "*", the list price, then free."""
+    return prices.get(backend) or prices.get("*") or DEFAULT_PRICES.get(backend) or TokenPrice()
+
+
+def estimate_backend_image_tokens(backend: str, width: int, height: int, detail: str = "high") -> int:
+    """
+    Input tokens one image costs on a backend.
+
+    Gemini 1.5 charges a flat 258 tokens per image and LLaVA-1.5 resizes
+    every image to 336px (576 patch tokens), so resolution is free on
+    both; Qwen2-VL spends one token per 28x28 pixels; OpenAI bills 512px
+    tiles (estimate_image_tokens), which is also the fallback.
+    """
+    if backend == "gemini_pro":
+        return 258
+    if backend == "vllm_llava":
+        return 576
+    if backend == "vllm_qwen":
+        return math.ceil(width / 28) * math.ceil(height / 28)
+    return estimate_image_tokens(width, height, detail)
+
+
+def usage_cost(usage: Dict[str, Any], price: TokenPrice) -> float:
+    """USD cost of reported token usage (a TokenUsage as a dict)."""
+    prompt_tokens = usage.get("prompt_tokens") or 0
+    cached_tokens = min(usage.get("cached_tokens") or 0, prompt_tokens)
+    cached_price = price.input if price.cached_input is None else price.cached_input
+    return (
+        (prompt_tokens - cached_tokens) * price.input
+        + cached_tokens * cached_price
+        + (usage.get("completion_tokens") or 0) * price.output
+    ) / 1_000_000
+
+
+def usage_entry(usage: Dict[str, Any], price: TokenPrice) -> Dict[str, Any]:
+    """Accounting entry of one request: its token counts and cost."""
+    return {
+        "requests": 1,
+        "estimated_requests": 1 if usage.get("estimated") else 0,
+        "prompt_tokens": usage.get("prompt_tokens") or 0,
+        "completion_tokens": usage.get("completion_tokens") or 0,
+        "cached_tokens": usage.get("cached_tokens") or 0,
+        "cost_usd": round(usage_cost(usage, price), 6),
+    }
+
+
+def merge_usage(entries: Iterable[Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+    """Sum accounting entries; None when there are none."""
+    entries = [entry for entry in entries if entry]
+    if not entries:
+        return None
+    merged = {name: sum(entry.get(name) or 0 for entry in entries) for name in USAGE_FIELDS}
+    merged["cost_usd"] = round(merged["cost_usd"], 6)
+    return merged
+
+
+@dataclass(frozen=True)
+class BudgetPlan:
+    """Frame count and resolution of a judgment planned under a budget."""
+    num_frames: int
+    max_dimension: int
+    estimated_tokens: int
+    estimated_cost_usd: float
+    fits: bool = True  # False when even the smallest plan exceeds the caps
+
+
+def estimate_request(
+    prompt_chars: int,
+    num_images: int,
+    max_dimension: int,
+    backend: str,
+    price: TokenPrice,
+    output_tokens: int,
+    detail: str = "high"
+) -> Tuple[int, float]:
+    """
+    (tokens, USD) of a request before it is sent.
+
+    Text is counted at ~4 characters per token, as for rate limiting.
+    Images are assumed square at max_dimension, the most an image of that
+    size can cost, so estimates hold for any aspect ratio.
+    """
+    image_tokens = estimate_backend_image_tokens(backend, max_dimension, max_dimension, detail)
+    input_tokens = prompt_chars // 4 + num_images * image_tokens
+    cost = (input_tokens * price.input + output_tokens * price.output) / 1_000_000
+    return input_tokens + output_tokens, cost
+
+
+def plan_budget(
+    prompt_chars: int,
+    backend: str,
+    profile: EncodingProfile,
+    max_frames: int,
+    min_frames: int,
+    price: TokenPrice,
+    output_tokens: int,
+    max_tokens: Optional[int] = None,
+    max_cost_usd: Optional[float] = None
+) -> BudgetPlan:
+    """
+    The most frames, then the highest resolution, that fit the caps.
+
+    Resolution steps down by 0.75 from the profile's max_dimension to its
+    min_dimension before a frame is dropped: a judgment needs every
+    phase of the rep more than fine detail. Frames never go below
+    min_frames; if that still exceeds the caps, the cheapest plan is
+    returned with fits=False.
+    """
+    sides = [profile.max_dimension]
+    while int(sides[-1] * 0.75) >= profile.min_dimension:
+        sides.append(int(sides[-1] * 0.75))
+
+    plan = None
+    for num_frames in range(max_frames, max(1, min(min_frames, max_frames)) - 1, -1):
+        for side in sides:
+            tokens, cost = estimate_request(
+                prompt_chars, num_frames, side, backend, price, output_tokens, profile.detail
+            )
+            plan = BudgetPlan(num_frames, side, tokens, round(cost, 6))
+            if (max_tokens is None or tokens <= max_tokens) and (max_cost_usd is None or cost <= max_cost_usd):
+                return plan
+    return replace(plan, fits=False)
@@ -0,0 +1,273 @@
+"""
+Image encoding profiles for VLM requests.
+
+Backends differ in what an image costs: OpenAI bills 512px tiles (or a
+flat rate at low detail), Gemini and vLLM models scale with pixel count,
+and every backend pays upload time for the bytes. A profile fixes the
+resolution, codec, quality and OpenAI detail level per backend, and can
+optionally step quality (then resolution) down a ladder until the images
+of one request fit a byte budget.
+"""
+
+import base64
+import json
+import math
+from dataclasses import dataclass, fields, replace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+CODECS = {
+    # codec: (file extension for cv2.imencode, MIME type)
+    "jpeg": (".jpg", "image/jpeg"),
+    "webp": (".webp", "image/webp"),
+    "png": (".png", "image/png"),
+}
+
+DETAIL_LEVELS = ("low", "high", "auto")
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """How frames are resized and compressed for one backend."""
+    max_dimension: int = 1024  # Longest side in pixels
+    codec: str = "jpeg"  # "jpeg", "webp" or "png"
+    quality: int = 85  # JPEG/WebP quality; PNG is lossless and ignores it
+    detail: str = "high"  # OpenAI image detail level
+    # Optional budgets for all images of one request (bytes of encoded
+    # image data; OpenAI image tokens at this detail level). When exceeded,
+    # quality steps down to min_quality, then resolution to min_dimension.
+    budget_bytes: Optional[int] = None
+    budget_tokens: Optional[int] = None
+    min_quality: int = 45
+    quality_step: int = 10
+    min_dimension: int = 512
+
+    def __post_init__(self):
+        if self.codec not in CODECS:
+            raise ValueError(
+                f"Unknown image codec: {self.codec}. "
+                f"Must be one of: {', '.join(CODECS)}"
+            )
+        if self.detail not in DETAIL_LEVELS:
+            raise ValueError(
+                f"Unknown detail level: {self.detail}. "
+                f"Must be one of: {', '.join(DETAIL_LEVELS)}"
+            )
+
+    @property
+    def mime_type(self) -> str:
+        return CODECS[self.codec][1]
+
+    @property
+    def has_budget(self) -> bool:
+        return self.budget_bytes is not None or self.budget_tokens is not None
+
+    def fits(self, images: List["EncodedImage"]) -> bool:
+        """Whether encoded images stay within the profile's budgets."""
+        if self.budget_bytes is not None:
+            if sum(len(image.data) for image in images) > self.budget_bytes:
+                return False
+        if self.budget_tokens is not None:
+            tokens = sum(
+                estimate_image_tokens(image.width, image.height, self.detail)
+                for image in images
+            )
+            if tokens > self.budget_tokens:
+                return False
+        return True
+
+    def ladder(self, longest_side: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        (max_dimension, quality) rungs, from the configured one downwards.
+
+        Args:
+            longest_side: Longest side of the source images; resolution
+                rungs start from it when it is below max_dimension
+        """
+        dimension = self.max_dimension
+        if longest_side is not None:
+            dimension = min(dimension, longest_side)
+        rungs = [(dimension, self.quality)]
+        quality = self.quality
+        # PNG is lossless: only resolution can shrink the payload
+        if self.codec != "png":
+            while quality - self.quality_step >= self.min_quality:
+                quality -= self.quality_step
+                rungs.append((dimension, quality))
+        while int(dimension * 0.75) >= self.min_dimension:
+            dimension = int(dimension * 0.75)
+            rungs.append((dimension, quality))
+        return rungs
+
+
+@dataclass
+class EncodedImage:
+    data: bytes
+    width: int
+    height: int
+
+
+def resize_to(cv2, image: np.ndarray, max_dimension: int) -> np.ndarray:
+    """Downscale so the longest side is at most max_dimension (never upscales)."""
+    height, width = image.shape[:2]
+    longest = max(width, height)
+    if longest <= max_dimension:
+        return image
+    scale = max_dimension / longest
+    return cv2.resize(
+        image,
+        (max(1, int(width * scale)), max(1, int(height * scale))),
+        interpolation=cv2.INTER_AREA
+    )
+
+
+def encode_image(cv2, image: np.ndarray, codec: str, quality: int) -> bytes:
+    """Compress an image with the given codec."""
+    extension = CODECS[codec][0]
+    if codec == "jpeg":
+        params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+    elif codec == "webp":
+        params = [cv2.IMWRITE_WEBP_QUALITY, quality]
+    else:
+        params = [cv2.IMWRITE_PNG_COMPRESSION, 3]
+    ok, buffer = cv2.imencode(extension, image, params)
+    if not ok:
+        raise ValueError(f"Could not encode image as {codec}")
+    return buffer.tobytes()
+
+
+def encode_rung(
+    cv2,
+    image: np.ndarray,
+    codec: str,
+    max_dimension: int,
+    quality: int
+) -> EncodedImage:
+    """Resize and compress one image at one rung of a ladder."""
+    image = resize_to(cv2, image, max_dimension)
+    return EncodedImage(encode_image(cv2, image, codec, quality), image.shape[1], image.shape[0])
+
+
+def encode_within_budget(
+    cv2,
+    images: List[np.ndarray],
+    profile: EncodingProfile,
+    map_fn: Callable = map
+) -> Tuple[List[EncodedImage], Tuple[int, int]]:
+    """
+    Encode the images of one request, stepping down the profile's ladder
+    until they fit its budget.
+
+    Without a budget only the first rung is encoded. If even the last rung
+    is over budget, its (smallest) encoding is returned.
+
+    Args:
+        cv2: The OpenCV module
+        images: Decoded images, at least as large as the profile's max_dimension
+        profile: Encoding profile with the budget and ladder
+        map_fn: map() or an executor's map, to encode images in parallel
+
+    Returns:
+        (encoded images, (max_dimension, quality) of the rung used)
+    """
+    longest_side = max((max(image.shape[:2]) for image in images), default=None)
+    rungs = profile.ladder(longest_side)
+    if not profile.has_budget:
+        rungs = rungs[:1]
+    for rung in rungs:
+        dimension, quality = rung
+        encoded = list(map_fn(
+            lambda image: encode_rung(cv2, image, profile.codec, dimension, quality),
+            images
+        ))
+        if profile.fits(encoded):
+            break
+    return encoded, rung
+
+
+def transcode_frames(frames: List[Any], profile: EncodingProfile) -> List[Any]:
+    """
+    Re-encode extracted frames (FrameData) with another profile.
+
+    Used when a cascade backend has a different profile than the one
+    frames were extracted with. Frames are only ever downscaled.
+    """
+    try:
+        import cv2
+    except ImportError:
+        raise ImportError(
+            "OpenCV is required for image encoding. "
+            "Install with: pip install opencv-python"
+        )
+
+    images = []
+    for frame in frames:
+        buffer = np.frombuffer(base64.b64decode(frame.image_base64), dtype=np.uint8)
+        image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError(f"Could not decode frame {frame.frame_number}")
+        images.append(image)
+
+    encoded, _ = encode_within_budget(cv2, images, profile)
+    return [
+        replace(
+            frame,
+            image_base64=base64.b64encode(image.data).decode("utf-8"),
+            width=image.width,
+            height=image.height,
+            mime_type=profile.mime_type
+        )
+        for frame, image in zip(frames, encoded)
+    ]
+
+
+def estimate_image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """
+    Input tokens OpenAI charges for an image.
+
+    Low detail is a flat 85 tokens. High detail scales the image to fit
+    2048x2048, then its shortest side to 768px, and charges 170 tokens per
+    512px tile plus 85.
+    """
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def parse_encoding_profiles(value: Optional[str]) -> Dict[str, EncodingProfile]:
+    """
+    Parse per-backend encoding profiles from JSON.
+
+    Example:
+        {"openai_gpt4o": {"codec": "webp", "quality": 80, "detail": "low"},
+         "*": {"max_dimension": 768}}
+
+    "*" applies to backends without their own entry. budget_kb may be used
+    instead of budget_bytes.
+    """
+    if not value:
+        return {}
+    known = {f.name for f in fields(EncodingProfile)}
+    profiles = {}
+    for backend, settings in json.loads(value).items():
+        settings: Dict[str, Any] = dict(settings)
+        if "budget_kb" in settings:
+            settings["budget_bytes"] = int(float(settings.pop("budget_kb")) * 1024)
+        unknown = set(settings) - known
+        if unknown:
+            raise ValueError(f"Unknown encoding profile fields for {backend}: {', '.join(sorted(unknown))}")
+        profiles[backend] = EncodingProfile(**settings)
+    return profiles
+
+
+def profile_for(profiles: Dict[str, EncodingProfile], backend: str) -> EncodingProfile:
+    """The profile of a backend, falling back to "*" and then the defaults."""
+    return profiles.get(backend) or profiles.get("*") or EncodingProfile()
+
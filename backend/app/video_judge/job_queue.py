@@ -0,0 +1,419 @@
+"""
+Durable job queue for asynchronous video judgments.
+
+Jobs live in a database table instead of process memory, so they survive
+restarts, are visible to every API worker and can be processed by any
+number of standalone judge workers (see worker.py).
+
+PostgreSQL is the primary backend: workers claim jobs with
+SELECT ... FOR UPDATE SKIP LOCKED so concurrent workers never block on or
+double-claim the same job. SQLite is supported for single-host setups;
+it serializes writers, so a plain UPDATE ... RETURNING is already atomic.
+
+Job lifecycle:
+    pending -> processing -> completed
+                          -> pending (retry with backoff)
+                          -> failed
+Workers heartbeat while processing; jobs whose heartbeat goes stale are
+returned to pending (or failed once out of attempts). Finished jobs are
+deleted once their TTL expires.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from sqlalchemy import inspect, text
+
+from .vlm_service import VideoJudgmentResult
+from .scheduler import Priority
+from .progress import JobStage
+
+if TYPE_CHECKING:
+    # utils.db connects the application database from DB_* at import time,
+    # which a worker or bench on VLM_JOB_DB_URL doesn't have
+    from utils.db import Database
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus:
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+def build_judgment_payload(judgment_id: str, result: VideoJudgmentResult) -> Dict[str, Any]:
+    """Build the JudgmentResponse payload for a judgment result."""
+    return {
+        "judgment_id": judgment_id,
+        "discipline": result.discipline,
+        "is_valid": result.is_valid,
+        "confidence": result.confidence,
+        "rep_count": result.rep_count,
+        "overall_judgment": "VALID" if result.is_valid else "INVALID",
+        "invalid_reasons": result.invalid_reasons,
+        "details": [{
+            "criteria": d.criteria,
+            "passed": d.passed,
+            "confidence": d.confidence,
+            "explanation": d.explanation
+        } for d in result.details],
+        "frame_analysis": result.frame_analysis,
+        "model_used": result.model_used,
+        "token_usage": result.token_usage,
+        "processed_at": datetime.utcnow().isoformat()
+    }
+
+
+def _iso(value) -> Optional[str]:
+    """Format a timestamp column (datetime on PostgreSQL, text on SQLite)."""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value).replace(" ", "T")
+
+
+class JudgmentJobQueue:
+    """Database-backed queue of video judgment jobs."""
+
+    # Columns added after the table was first released, as (name, DDL)
+    ADDED_COLUMNS = [
+        ("priority", "INTEGER NOT NULL DEFAULT 1"),
+        ("stage", "VARCHAR(32)"),
+        ("stage_history", "TEXT"),
+    ]
+
+    def __init__(
+        self,
+        database: "Database",
+        result_ttl_seconds: float = 24 * 3600,
+        max_attempts: int = 3,
+        retry_base_delay: float = 5.0
+    ):
+        self.db = database
+        self.result_ttl_seconds = result_ttl_seconds
+        self.max_attempts = max_attempts
+        self.retry_base_delay = retry_base_delay
+        self.is_postgres = database.dialect == "postgresql"
+        self.table = "cali_db.video_judgment_jobs" if self.is_postgres else "video_judgment_jobs"
+
+    def ensure_schema(self):
+        """Create the jobs table and its indexes if they don't exist."""
+        with self.db.engine.begin() as conn:
+            if self.is_postgres:
+                conn.execute(text("CREATE SCHEMA IF NOT EXISTS cali_db"))
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {self.table} (
+                    id VARCHAR(64) PRIMARY KEY,
+                    status VARCHAR(16) NOT NULL,
+                    discipline VARCHAR(16) NOT NULL,
+                    camera_angle VARCHAR(16) NOT NULL,
+                    additional_context TEXT,
+                    force_refresh BOOLEAN NOT NULL DEFAULT FALSE,
+                    priority INTEGER NOT NULL DEFAULT 1,
+                    video_path TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    stage VARCHAR(32),
+                    stage_history TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    worker_id VARCHAR(128),
+                    submitted_at TIMESTAMP NOT NULL,
+                    available_at TIMESTAMP NOT NULL,
+                    started_at TIMESTAMP,
+                    heartbeat_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    expires_at TIMESTAMP
+                )
+            """))
+            self._add_missing_columns(conn)
+            conn.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS video_judgment_jobs_claim_idx
+                ON {self.table} (status, priority, available_at)
+            """))
+            conn.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS video_judgment_jobs_expiry_idx
+                ON {self.table} (expires_at)
+            """))
+
+    def _add_missing_columns(self, conn):
+        """Upgrade tables created by earlier versions of this module."""
+        schema = "cali_db" if self.is_postgres else None
+        table = self.table.split(".")[-1]
+        existing = {c["name"] for c in inspect(conn).get_columns(table, schema=schema)}
+        for name, ddl in self.ADDED_COLUMNS:
+            if name not in existing:
+                conn.execute(text(f"ALTER TABLE {self.table} ADD COLUMN {name} {ddl}"))
+                logger.info(f"Added column {name} to {self.table}")
+
+    # ------------------------------------------------------------------
+    # API side
+    # ------------------------------------------------------------------
+
+    def enqueue(
+        self,
+        judgment_id: str,
+        video_path: str,
+        discipline: str,
+        camera_angle: str,
+        additional_context: Optional[str] = None,
+        force_refresh: bool = False,
+        priority: Priority = Priority.NORMAL
+    ):
+        """Add a new pending job."""
+        now = datetime.utcnow()
+        self.db.execute_action(f"""
+            INSERT INTO {self.table} (
+                id, status, discipline, camera_angle, additional_context,
+                force_refresh, priority, video_path, stage, stage_history,
+                attempts, max_attempts, submitted_at, available_at
+            ) VALUES (
+                :id, :status, :discipline, :camera_angle, :additional_context,
+                :force_refresh, :priority, :video_path, :stage, :stage_history,
+                0, :max_attempts, :now, :now
+            )
+        """, {
+            "id": judgment_id,
+            "status": JobStatus.PENDING,
+            "discipline": discipline,
+            "camera_angle": camera_angle,
+            "additional_context": additional_context,
+            "force_refresh": force_refresh,
+            "priority": int(priority),
+            "video_path": video_path,
+            "stage": JobStage.QUEUED,
+            "stage_history": json.dumps([
+                {"stage": JobStage.QUEUED, "at": now.isoformat(), "elapsed_ms": 0, "attempt": 0}
+            ]),
+            "max_attempts": self.max_attempts,
+            "now": now,
+        })
+
+    def get(self, judgment_id: str) -> Optional[Dict[str, Any]]:
+        """Fetch a job by id, with the result decoded."""
+        rows = self.db.read(
+            f"SELECT * FROM {self.table} WHERE id = :id",
+            {"id": judgment_id}
+        )
+        if not rows:
+            return None
+        return self._decode(rows[0])
+
+    def counts(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        rows = self.db.read(
+            f"SELECT status, COUNT(*) AS count FROM {self.table} GROUP BY status"
+        )
+        return {row["status"]: int(row["count"]) for row in rows}
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Atomically claim the highest priority, oldest available pending job."""
+        now = datetime.utcnow()
+        lock_clause = "FOR UPDATE SKIP LOCKED" if self.is_postgres else ""
+        with self.db.engine.begin() as conn:
+            row = conn.execute(text(f"""
+                UPDATE {self.table}
+                SET status = :processing,
+                    worker_id = :worker_id,
+                    attempts = attempts + 1,
+                    started_at = :now,
+                    heartbeat_at = :now
+                WHERE id = (
+                    SELECT id FROM {self.table}
+                    WHERE status = :pending AND available_at <= :now
+                    ORDER BY priority, available_at, submitted_at
+                    LIMIT 1
+                    {lock_clause}
+                )
+                RETURNING *
+            """), {
+                "processing": JobStatus.PROCESSING,
+                "pending": JobStatus.PENDING,
+                "worker_id": worker_id,
+                "now": now,
+            }).mappings().fetchone()
+        return self._decode(dict(row)) if row else None
+
+    def heartbeat(self, judgment_id: str, worker_id: str) -> bool:
+        """Refresh the heartbeat of a claimed job. False if the claim was lost."""
+        return self.db.execute_action(f"""
+            UPDATE {self.table} SET heartbeat_at = :now
+            WHERE id = :id AND worker_id = :worker_id AND status = :processing
+        """, {
+            "id": judgment_id,
+            "worker_id": worker_id,
+            "processing": JobStatus.PROCESSING,
+            "now": datetime.utcnow(),
+        }) > 0
+
+    def record_stage(self, judgment_id: str, stage: str, history: List[Dict[str, Any]]) -> bool:
+        """Store the current stage of a job and its full stage history."""
+        return self.db.execute_action(f"""
+            UPDATE {self.table} SET stage = :stage, stage_history = :history
+            WHERE id = :id
+        """, {
+            "id": judgment_id,
+            "stage": stage,
+            "history": json.dumps(history),
+        }) > 0
+
+    def complete(self, judgment_id: str, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Mark a claimed job as completed with its result payload."""
+        now = datetime.utcnow()
+        return self.db.execute_action(f"""
+            UPDATE {self.table}
+            SET status = :completed, result = :result, error = NULL,
+                finished_at = :now, heartbeat_at = NULL, expires_at = :expires_at
+            WHERE id = :id AND worker_id = :worker_id AND status = :processing
+        """, {
+            "id": judgment_id,
+            "worker_id": worker_id,
+            "completed": JobStatus.COMPLETED,
+            "processing": JobStatus.PROCESSING,
+            "result": json.dumps(result),
+            "now": now,
+            "expires_at": now + timedelta(seconds=self.result_ttl_seconds),
+        }) > 0
+
+    def fail(self, job: Dict[str, Any], worker_id: str, error: str, retryable: bool = True) -> str:
+        """
+        Record a failed attempt.
+
+        Retryable failures go back to pending with exponential backoff until
+        the job runs out of attempts.
+
+        Returns:
+            The job's new status
+        """
+        now = datetime.utcnow()
+        if retryable and job["attempts"] < job["max_attempts"]:
+            delay = min(self.retry_base_delay * 2 ** (job["attempts"] - 1), 300.0)
+            self.db.execute_action(f"""
+                UPDATE {self.table}
+                SET status = :pending, error = :error, worker_id = NULL,
+                    heartbeat_at = NULL, available_at = :available_at
+                WHERE id = :id AND worker_id = :worker_id
+            """, {
+                "id": job["id"],
+                "worker_id": worker_id,
+                "pending": JobStatus.PENDING,
+                "error": error,
+                "available_at": now + timedelta(seconds=delay),
+            })
+            return JobStatus.PENDING
+
+        self.db.execute_action(f"""
+            UPDATE {self.table}
+            SET status = :failed, error = :error, finished_at = :now,
+                heartbeat_at = NULL, expires_at = :expires_at
+            WHERE id = :id AND worker_id = :worker_id
+        """, {
+            "id": job["id"],
+            "worker_id": worker_id,
+            "failed": JobStatus.FAILED,
+            "error": error,
+            "now": now,
+            "expires_at": now + timedelta(seconds=self.result_ttl_seconds),
+        })
+        return JobStatus.FAILED
+
+    def requeue_stale(self, heartbeat_timeout: float) -> int:
+        """Return jobs whose worker stopped heartbeating to the queue."""
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=heartbeat_timeout)
+        params = {
+            "pending": JobStatus.PENDING,
+            "processing": JobStatus.PROCESSING,
+            "failed": JobStatus.FAILED,
+            "cutoff": cutoff,
+            "now": now,
+            "expires_at": now + timedelta(seconds=self.result_ttl_seconds),
+            "error": "Worker stopped responding",
+        }
+        with self.db.engine.begin() as conn:
+            requeued = conn.execute(text(f"""
+                UPDATE {self.table}
+                SET status = :pending, worker_id = NULL, heartbeat_at = NULL,
+                    error = :error, available_at = :now
+                WHERE status = :processing AND heartbeat_at < :cutoff
+                  AND attempts < max_attempts
+            """), params).rowcount
+            exhausted = conn.execute(text(f"""
+                UPDATE {self.table}
+                SET status = :failed, error = :error, heartbeat_at = NULL,
+                    finished_at = :now, expires_at = :expires_at
+                WHERE status = :processing AND heartbeat_at < :cutoff
+                  AND attempts >= max_attempts
+            """), params).rowcount
+        if requeued or exhausted:
+            logger.warning(f"Recovered stale jobs: {requeued} requeued, {exhausted} failed")
+        return requeued + exhausted
+
+    def purge_expired(self) -> int:
+        """Delete finished jobs whose TTL has passed, along with any leftover videos."""
+        params = {"now": datetime.utcnow()}
+        expired = self.db.read(
+            f"SELECT video_path FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < :now",
+            params
+        )
+        if not expired:
+            return 0
+        deleted = self.db.execute_action(
+            f"DELETE FROM {self.table} WHERE expires_at IS NOT NULL AND expires_at < :now",
+            params
+        )
+        for row in expired:
+            if row["video_path"] and os.path.exists(row["video_path"]):
+                os.unlink(row["video_path"])
+        return deleted
+
+    def _decode(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        if row.get("result"):
+            row["result"] = json.loads(row["result"])
+        row["stage_history"] = json.loads(row["stage_history"]) if row.get("stage_history") else []
+        for key in ("submitted_at", "available_at", "started_at",
+                    "heartbeat_at", "finished_at", "expires_at"):
+            row[key] = _iso(row.get(key))
+        row["force_refresh"] = bool(row.get("force_refresh"))
+        return row
+
+
+_job_queue: Optional[JudgmentJobQueue] = None
+
+
+def get_job_queue() -> JudgmentJobQueue:
+    """
+    Get the process-wide job queue, creating its table on first use.
+
+    Uses VLM_JOB_DB_URL when set (e.g. sqlite:///video_judge_jobs.db),
+    otherwise the application's PostgreSQL database.
+    """
+    global _job_queue
+    if _job_queue is None:
+        url = os.getenv("VLM_JOB_DB_URL")
+        if url:
+            from utils.db import Database
+            database = Database(url)
+        else:
+            from utils.db import db as database
+        queue = JudgmentJobQueue(
+            database,
+            result_ttl_seconds=float(os.getenv("VLM_JOB_RESULT_TTL_SECONDS", str(24 * 3600))),
+            max_attempts=int(os.getenv("VLM_JOB_MAX_ATTEMPTS", "3")),
+        )
+        # Only keep a queue whose table exists; an unreachable database is
+        # retried on the next call
+        queue.ensure_schema()
+        _job_queue = queue
+    return _job_queue
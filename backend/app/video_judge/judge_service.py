@@ -7,27 +7,105 @@ This service coordinates:
 3. Result parsing and formatting
 """
 
+import copy
 import json
 import re
+import asyncio
+import functools
 import logging
-from typing import Optional, List, Dict, Any, Tuple
-from dataclasses import dataclass, asdict
+import os
+import tempfile
+import time
+from typing import Optional, List, Dict, Any, Tuple, Callable, Awaitable
+from dataclasses import dataclass, asdict, field, replace
 
-from .regulations import Discipline, JudgmentResult, get_invalid_reasons
+from .regulations import CRITERIA_VIEWS, Discipline, JudgmentResult, get_invalid_reasons
 from .vlm_service import (
     VLMClient,
+    VLMResponse,
     VLMBackend,
+    TokenUsage,
     VideoFrameExtractor,
     FrameData,
+    HTTPPoolConfig,
     VideoJudgmentResult,
     JudgmentDetail,
     create_vlm_client,
 )
-from .prompts import get_prompt_for_discipline, SYSTEM_PROMPT, get_multi_angle_prompt
+from .prompts import (
+    JudgePrompt,
+    get_prompt_parts,
+    SYSTEM_PROMPT,
+    get_multi_angle_prompt_parts,
+    get_single_rep_note,
+    get_mosaic_note,
+)
+from .encoding import EncodingProfile, estimate_image_tokens, profile_for, transcode_frames
+from .costs import (
+    OUTPUT_TOKEN_ESTIMATES,
+    USAGE_FIELDS,
+    BudgetPlan,
+    TokenPrice,
+    merge_usage,
+    plan_budget,
+    price_for,
+    usage_entry,
+)
+from .motion import AngleAlignment, RepSegment, align_angles, paired_frame_indices, select_motion_keyframes
+from .mosaic import build_mosaics
+from .runtime import get_extraction_executor
+from .scheduler import Priority, BackendLimits, SchedulerTimeout, get_scheduler, estimate_request_tokens
+from .retry import (
+    RetryPolicy,
+    LatencyTracker,
+    ResponseParseError,
+    RetriesExhausted,
+    hedged,
+    is_retryable,
+    retry_after_seconds,
+)
+from .progress import JobStage
+from .metrics import (
+    CACHE_REQUESTS,
+    FRAME_EXTRACTION_SECONDS,
+    JUDGMENT_SECONDS,
+    JUDGMENTS_IN_FLIGHT,
+    PARSE_FAILURES,
+    PARSE_SECONDS,
+    VLM_COST_USD,
+    VLM_RETRIES,
+    VLM_TOKENS,
+)
+from .streaming import IncrementalJSONParser, REQUIRED_FIELDS, VERDICT_FIELDS
+from .compact import (
+    JUDGMENTS,
+    OUTPUT_FORMATS,
+    REQUIRED_FIELDS as COMPACT_REQUIRED_FIELDS,
+    VERDICT_FIELDS as COMPACT_VERDICT_FIELDS,
+    expand_compact,
+    is_compact,
+)
+from .cache import (
+    JudgmentCache,
+    get_judgment_cache,
+    hash_file,
+    hash_bytes,
+    hash_text,
+    make_cache_key,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# "Rep N: " label that _parse_vlm_response puts in front of criteria and reasons
+_REP_PREFIX = re.compile(r"^Rep \d+: ")
+# What _build_result puts in front of a criterion's raw status
+_STATUS_PREFIX = "Status: "
+
+# How two camera angles are judged: "interleaved" sends time-aligned
+# frame pairs in one request, "per_angle" one request per angle
+MULTI_ANGLE_MODES = ("interleaved", "per_angle")
+
 
 @dataclass
 class JudgeConfig:
@@ -39,6 +117,92 @@ class JudgeConfig:
     num_frames: int = 16
     confidence_threshold: float = 0.7
     strict_mode: bool = True  # If True, "uncertain" criteria count as failed
+    decode_mode: str = "auto"  # "auto", "seek" or "sequential"
+    frame_selection: str = "uniform"  # "uniform", "keypoints" or "motion"
+    extraction_executor: str = "thread"  # "thread", "process" or "inline"
+    extraction_workers: Optional[int] = None  # Defaults to CPU count
+    encode_workers: int = 4  # Parallel resize/encode threads per video
+    roi_crop: bool = False  # Crop frames to the motion region before encoding
+    roi_padding: float = 0.15  # Padding around the motion box, as a fraction of its size
+    # Drop sampled frames within this dHash distance (of 64 bits) of the
+    # previous frame and re-spend the slots on high motion (None disables)
+    dedupe_max_distance: Optional[int] = None
+    cache_enabled: bool = True
+    cache_dir: Optional[str] = None  # On-disk tier; memory only when None
+    cache_ttl_seconds: float = 7 * 24 * 3600
+    cache_max_entries: int = 512  # In-memory LRU size
+    cache_max_disk_mb: int = 1024
+    # Shared HTTP connection pool for the VLM backend
+    http_max_connections: int = 32
+    http_max_keepalive: int = 16
+    http_keepalive_expiry: float = 60.0
+    http2: bool = False
+    request_timeout: float = 120.0
+    # Per-backend admission control for VLM requests
+    scheduler_max_in_flight: int = 8
+    scheduler_requests_per_minute: Optional[float] = None
+    scheduler_tokens_per_minute: Optional[float] = None
+    scheduler_queue_timeout: float = 120.0  # Seconds a request may wait for capacity
+    # Retries of the VLM call/parse stage; frames are extracted once
+    vlm_retries: int = 2
+    retry_base_delay: float = 0.5
+    retry_max_delay: float = 8.0
+    # Send a second request when the first is slower than this percentile
+    # of recent latencies (None disables hedging)
+    hedge_percentile: Optional[float] = None
+    hedge_min_samples: int = 20
+    # Cascade: judge with vlm_backend first and escalate uncertain results
+    # (low confidence, NEEDS_REVIEW, parse failures) to this backend
+    cascade_backend: Optional[VLMBackend] = None
+    cascade_base_url: Optional[str] = None
+    cascade_api_key: Optional[str] = None
+    cascade_model: Optional[str] = None
+    # Split multi-rep sets into reps and judge each rep in its own VLM call
+    rep_segmentation: bool = False
+    frames_per_rep: int = 6
+    max_rep_segments: int = 12
+    # Frames tiled into each image, per backend value ("*" for all);
+    # backends without an entry (or with 0/1) get one image per frame
+    mosaic_tiles: Dict[str, int] = field(default_factory=dict)
+    mosaic_max_side: int = 2048
+    # Image resolution, codec, quality, OpenAI detail level and optional
+    # per-request budget, per backend value ("*" for all)
+    encoding_profiles: Dict[str, EncodingProfile] = field(default_factory=dict)
+    # Stream answers, reporting the verdict as soon as it is generated;
+    # optionally stop generating once every field the result needs is in
+    stream_responses: bool = False
+    stream_stop_early: bool = False
+    # "verbose" or "compact" (short keys and reason codes, expanded after
+    # parsing); compact answers are constrained to their JSON schema on
+    # backends with guided decoding unless guided_decoding is off
+    output_format: str = "verbose"
+    guided_decoding: bool = True
+    # With vlm_backend (or cascade_backend) RECORD_REPLAY: the real backend
+    # it wraps, where recordings live, "record", "replay" or "auto", and
+    # the multiple of the recorded latency replayed answers wait
+    replay_backend: Optional[VLMBackend] = None
+    replay_dir: Optional[str] = None
+    replay_mode: str = "replay"
+    replay_latency_scale: float = 0.0
+    # Budget mode: before extracting, plan the most frames (then the
+    # highest resolution) whose estimated first-tier request stays under
+    # these per-judgment caps, keeping at least budget_min_frames frames.
+    # Output is estimated from the answers seen so far unless set.
+    budget_max_tokens: Optional[int] = None
+    budget_max_cost_usd: Optional[float] = None
+    budget_min_frames: int = 4
+    budget_output_tokens: Optional[int] = None
+    # USD per million tokens, per backend value ("*" for all); known
+    # backends default to their list prices
+    token_prices: Dict[str, TokenPrice] = field(default_factory=dict)
+    # With a secondary video: both angles are extracted concurrently and
+    # aligned in time by cross-correlating their motion, searching offsets
+    # up to angle_max_offset_seconds (weaker correlations than
+    # angle_min_correlation assume the videos start together). See
+    # MULTI_ANGLE_MODES for how the angles are judged.
+    multi_angle_mode: str = "interleaved"
+    angle_max_offset_seconds: float = 10.0
+    angle_min_correlation: float = 0.3
 
 
 class StreetLiftingJudge:
@@ -54,28 +218,124 @@ class StreetLiftingJudge:
         )
     """
     
-    def __init__(self, config: Optional[JudgeConfig] = None):
+    def __init__(
+        self,
+        config: Optional[JudgeConfig] = None,
+        cache: Optional[JudgmentCache] = None
+    ):
         self.config = config or JudgeConfig()
-        self.frame_extractor = VideoFrameExtractor()
+        if self.config.output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unknown output format: {self.config.output_format}. "
+                f"Must be one of: {', '.join(OUTPUT_FORMATS)}"
+            )
+        if self.config.multi_angle_mode not in MULTI_ANGLE_MODES:
+            raise ValueError(
+                f"Unknown multi-angle mode: {self.config.multi_angle_mode}. "
+                f"Must be one of: {', '.join(MULTI_ANGLE_MODES)}"
+            )
+        self.cache = cache
+        if self.cache is None and self.config.cache_enabled:
+            self.cache = get_judgment_cache(
+                max_entries=self.config.cache_max_entries,
+                directory=self.config.cache_dir,
+                ttl_seconds=self.config.cache_ttl_seconds,
+                max_disk_bytes=self.config.cache_max_disk_mb * 1024 * 1024
+            )
+        self.frame_extractor = VideoFrameExtractor(
+            decode_mode=self.config.decode_mode,
+            encode_workers=self.config.encode_workers,
+            crop_to_roi=self.config.roi_crop,
+            roi_padding=self.config.roi_padding,
+            encoding=self._encoding_for(self.config.vlm_backend),
+            dedupe_max_distance=self.config.dedupe_max_distance
+        )
         self._vlm_client: Optional[VLMClient] = None
+        self.retry_policy = RetryPolicy(
+            max_retries=self.config.vlm_retries,
+            base_delay=self.config.retry_base_delay,
+            max_delay=self.config.retry_max_delay
+        )
+        self._latency = LatencyTracker()
+        self._ttft = LatencyTracker()
+        self._vlm_counters = {
+            "calls": 0, "retries": 0, "parse_retries": 0, "hedges": 0, "hedge_wins": 0, "early_stops": 0
+        }
+        self._token_counters = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+        self._usage_reports = 0
+        # Accounting entries per (backend, discipline), and per discipline
+        # the number of judgments and what they spent
+        self._usage_totals: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._judgment_usage: Dict[str, Tuple[int, Dict[str, Any]]] = {}
+        self._budget_extractors: Dict[int, VideoFrameExtractor] = {}
+        self._escalation_client: Optional[VLMClient] = None
+        self._tier_stats = {
+            tier: {"judged": 0, "resolved": 0, "escalated": 0, "errors": 0, "latency": LatencyTracker()}
+            for tier in ("primary", "escalation")
+        }
+    
+    def _create_client(
+        self,
+        backend: VLMBackend,
+        base_url: Optional[str],
+        api_key: Optional[str],
+        model: Optional[str]
+    ) -> VLMClient:
+        kwargs = {}
+        if base_url:
+            kwargs["base_url"] = base_url
+        if api_key:
+            kwargs["api_key"] = api_key
+        if model:
+            kwargs["model"] = model
+        kwargs["pool"] = HTTPPoolConfig(
+            max_connections=self.config.http_max_connections,
+            max_keepalive_connections=self.config.http_max_keepalive,
+            keepalive_expiry=self.config.http_keepalive_expiry,
+            http2=self.config.http2,
+            timeout=self.config.request_timeout
+        )
+        kwargs["image_detail"] = self._encoding_for(backend).detail
+        if backend == VLMBackend.RECORD_REPLAY:
+            kwargs["replay_backend"] = self.config.replay_backend
+            kwargs["replay_dir"] = self.config.replay_dir
+            kwargs["replay_mode"] = self.config.replay_mode
+            kwargs["replay_latency_scale"] = self.config.replay_latency_scale
+        return create_vlm_client(backend, **kwargs)
+    
+    def _profile_backend(self, backend: VLMBackend) -> VLMBackend:
+        """The backend whose per-backend settings apply (record/replay uses the wrapped one's)."""
+        if backend == VLMBackend.RECORD_REPLAY and self.config.replay_backend is not None:
+            return self.config.replay_backend
+        return backend
+    
+    def _encoding_for(self, backend: VLMBackend) -> EncodingProfile:
+        return profile_for(self.config.encoding_profiles, self._profile_backend(backend).value)
     
     async def _get_vlm_client(self) -> VLMClient:
         """Get or create the VLM client."""
         if self._vlm_client is None:
-            kwargs = {}
-            if self.config.vlm_base_url:
-                kwargs["base_url"] = self.config.vlm_base_url
-            if self.config.vlm_api_key:
-                kwargs["api_key"] = self.config.vlm_api_key
-            if self.config.vlm_model:
-                kwargs["model"] = self.config.vlm_model
-            
-            self._vlm_client = create_vlm_client(
+            self._vlm_client = self._create_client(
                 self.config.vlm_backend,
-                **kwargs
+                self.config.vlm_base_url,
+                self.config.vlm_api_key,
+                self.config.vlm_model
             )
         return self._vlm_client
     
+    async def _get_escalation_client(self) -> Optional[VLMClient]:
+        """Get or create the cascade's escalation client (None without a cascade)."""
+        if self.config.cascade_backend is None:
+            return None
+        if self._escalation_client is None:
+            self._escalation_client = self._create_client(
+                self.config.cascade_backend,
+                self.config.cascade_base_url,
+                self.config.cascade_api_key,
+                self.config.cascade_model
+            )
+        return self._escalation_client
+    
     async def analyze_video(
         self,
         discipline: Discipline,
@@ -83,7 +343,11 @@ class StreetLiftingJudge:
         video_bytes: Optional[bytes] = None,
         camera_angle: str = "front",
         secondary_video_path: Optional[str] = None,
-        additional_context: Optional[str] = None
+        additional_context: Optional[str] = None,
+        force_refresh: bool = False,
+        priority: Priority = Priority.NORMAL,
+        on_stage: Optional[Callable[..., Awaitable[None]]] = None,
+        retry_policy: Optional[RetryPolicy] = None
     ) -> VideoJudgmentResult:
         """
         Analyze a street lifting video and return judgment.
@@ -95,62 +359,1288 @@ class StreetLiftingJudge:
             camera_angle: Camera angle ("front", "side", "parallel")
             secondary_video_path: Optional secondary angle video (for pull-ups)
             additional_context: Any additional context for the judge
+            force_refresh: Skip the result cache lookup and re-judge the video
+            priority: Scheduling lane for the VLM request (live attempts first)
+            on_stage: Awaited with the name of each processing stage as it starts;
+                the "verdict" stage of streamed answers also passes
+                overall_judgment, confidence and model as keyword arguments
+            retry_policy: Retries of the VLM stage, defaults to the configured policy
             
         Returns:
             VideoJudgmentResult with detailed analysis
         """
-        # Extract frames from primary video
-        if video_path:
-            frames = self.frame_extractor.extract_frames(
-                video_path, 
-                num_frames=self.config.num_frames
-            )
-        elif video_bytes:
-            frames = self.frame_extractor.extract_frames_from_bytes(
-                video_bytes,
-                num_frames=self.config.num_frames
-            )
-        else:
+        if not video_path and not video_bytes:
             raise ValueError("Either video_path or video_bytes must be provided")
         
-        # If secondary video provided, extract and combine frames
-        has_secondary = False
-        if secondary_video_path:
-            secondary_frames = self.frame_extractor.extract_frames(
+        JUDGMENTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = await self._analyze_video(
+                discipline,
+                video_path,
+                video_bytes,
+                camera_angle,
                 secondary_video_path,
-                num_frames=self.config.num_frames // 2
+                additional_context,
+                force_refresh,
+                priority,
+                on_stage,
+                retry_policy
             )
-            # Reduce primary frames and interleave with secondary
-            primary_subset = frames[:self.config.num_frames // 2]
-            frames = self._interleave_frames(primary_subset, secondary_frames)
-            has_secondary = True
+            if result.frame_analysis.get("cache_hit"):
+                outcome = "cached"
+            elif "error" in result.frame_analysis:
+                outcome = "parse_failed"
+            else:
+                outcome = "ok"
+            if outcome != "cached":
+                self._account_judgment(discipline, result)
+            return result
+        finally:
+            JUDGMENTS_IN_FLIGHT.dec()
+            JUDGMENT_SECONDS.labels(discipline.value, outcome).observe(time.perf_counter() - started)
+    
+    async def _analyze_video(
+        self,
+        discipline: Discipline,
+        video_path: Optional[str] = None,
+        video_bytes: Optional[bytes] = None,
+        camera_angle: str = "front",
+        secondary_video_path: Optional[str] = None,
+        additional_context: Optional[str] = None,
+        force_refresh: bool = False,
+        priority: Priority = Priority.NORMAL,
+        on_stage: Optional[Callable[..., Awaitable[None]]] = None,
+        retry_policy: Optional[RetryPolicy] = None
+    ) -> VideoJudgmentResult:
+        """analyze_video without the in-flight and timing metrics."""
+        has_secondary = secondary_video_path is not None
+        compact = self.config.output_format == "compact"
         
         # Get the appropriate prompt
         if has_secondary:
-            prompt = get_multi_angle_prompt(discipline, [camera_angle, "parallel"])
+            prompt = get_multi_angle_prompt_parts(
+                discipline,
+                (camera_angle, "parallel"),
+                compact=compact
+            )
         else:
-            prompt = get_prompt_for_discipline(
+            prompt = get_prompt_parts(
                 discipline,
                 camera_angle,
-                has_secondary
+                has_secondary,
+                compact=compact
             )
         
         if additional_context:
-            prompt += f"\n\nADDITIONAL CONTEXT: {additional_context}"
+            prompt = prompt.with_note(f"\n\nADDITIONAL CONTEXT: {additional_context}")
         
-        # Get VLM analysis
+        started = time.perf_counter()
         vlm_client = await self._get_vlm_client()
-        raw_response = await vlm_client.analyze_frames(
+        escalation_client = await self._get_escalation_client()
+        
+        # Serve repeated submissions of the same video from the cache
+        cache_key = None
+        if self.cache is not None:
+            model_name = vlm_client.model_name
+            if escalation_client is not None:
+                model_name += f" -> {escalation_client.model_name}"
+            cache_key = await self._cache_key(
+                discipline,
+                camera_angle,
+                prompt,
+                model_name,
+                video_path,
+                video_bytes,
+                secondary_video_path
+            )
+            if not force_refresh:
+                # Disk reads and the JSON decode stay off the event loop
+                cached = await asyncio.get_running_loop().run_in_executor(None, self.cache.get, cache_key)
+                CACHE_REQUESTS.labels("hit" if cached is not None else "miss").inc()
+                if cached is not None:
+                    cached.frame_analysis["cache_hit"] = True
+                    return cached
+        
+        async def enter_stage(stage: str, **extra):
+            if on_stage is not None:
+                await on_stage(stage, **extra)
+        
+        # Extract frames from primary video
+        await enter_stage(JobStage.EXTRACTING)
+        retry_policy = retry_policy or self.retry_policy
+        
+        if self.config.rep_segmentation and video_path and not has_secondary:
+            extraction_started = time.perf_counter()
+            segments = await self._run_extraction(functools.partial(
+                self.frame_extractor.extract_rep_segments,
+                video_path,
+                frames_per_rep=self.config.frames_per_rep,
+                max_segments=self.config.max_rep_segments
+            ))
+            FRAME_EXTRACTION_SECONDS.labels("rep_segments").observe(time.perf_counter() - extraction_started)
+            # Single reps gain nothing from segmentation; judge them whole
+            if len(segments) >= 2:
+                result = await self._judge_reps(
+                    segments,
+                    vlm_client,
+                    escalation_client,
+                    prompt,
+                    discipline,
+                    priority,
+                    retry_policy,
+                    enter_stage,
+                    started
+                )
+                result.frame_analysis["frames"] = self._frame_stats(
+                    [frame for _, rep_frames in segments for frame in rep_frames]
+                )
+                if cache_key is not None and "error" not in result.frame_analysis:
+                    await self._cache_put(cache_key, result)
+                return result
+        
+        # In budget mode, fewer or smaller frames may be sent
+        budget = self._plan_budget(prompt)
+        num_frames = budget.num_frames if budget is not None else self.config.num_frames
+        extractor = self._extractor_for(budget)
+        
+        if has_secondary:
+            # Half the frames per angle, showing the same instants
+            extractions, alignment = await self._extract_angles(
+                extractor,
+                video_path,
+                video_bytes,
+                secondary_video_path,
+                num_frames // 2
+            )
+            if self.config.multi_angle_mode == "per_angle":
+                frames = [frame for extraction in extractions for frame in extraction]
+                result = await self._judge_angles(
+                    extractions,
+                    (camera_angle, "parallel"),
+                    discipline,
+                    additional_context,
+                    vlm_client,
+                    escalation_client,
+                    priority,
+                    retry_policy,
+                    enter_stage,
+                    started
+                )
+            else:
+                frames = self._interleave_frames(*extractions)
+                result = await self._judge_with_cascade(
+                    vlm_client,
+                    escalation_client,
+                    frames,
+                    prompt,
+                    discipline,
+                    priority,
+                    retry_policy,
+                    enter_stage,
+                    started
+                )
+            result.frame_analysis.setdefault("multi_angle", {"mode": "interleaved"})
+            result.frame_analysis["multi_angle"]["alignment"] = alignment.to_dict()
+        else:
+            if video_path:
+                frames = await self._extract_frames(
+                    extractor.extract_frames,
+                    video_path,
+                    num_frames
+                )
+            else:
+                frames = await self._extract_frames(
+                    extractor.extract_frames_from_bytes,
+                    video_bytes,
+                    num_frames
+                )
+            extractions = [frames]
+            result = await self._judge_with_cascade(
+                vlm_client,
+                escalation_client,
+                frames,
+                prompt,
+                discipline,
+                priority,
+                retry_policy,
+                enter_stage,
+                started
+            )
+        result.frame_analysis["frames"] = self._frame_stats(frames)
+        if self.config.dedupe_max_distance is not None:
+            result.frame_analysis["frames"]["duplicates_dropped"] = sum(
+                extraction.duplicates_dropped for extraction in extractions
+            )
+            result.frame_analysis["frames"]["motion_refills"] = sum(
+                extraction.motion_refills for extraction in extractions
+            )
+        if budget is not None:
+            result.frame_analysis["budget"] = asdict(budget)
+        
+        # Only cache real judgments, never parse failures
+        if cache_key is not None and "error" not in result.frame_analysis:
+            await self._cache_put(cache_key, result)
+        
+        return result
+    
+    async def _cache_put(self, cache_key: str, result: VideoJudgmentResult):
+        """Store a result; the JSON write and any disk eviction run in a thread."""
+        await asyncio.get_running_loop().run_in_executor(None, self.cache.put, cache_key, result)
+    
+    def _plan_budget(self, prompt: JudgePrompt) -> Optional[BudgetPlan]:
+        """
+        Frame count and resolution of the first-tier request in budget mode.
+        
+        The estimate assumes one image per frame, so it overestimates
+        when frames are packed into mosaics. None outside budget mode.
+        """
+        if self.config.budget_max_tokens is None and self.config.budget_max_cost_usd is None:
+            return None
+        backend = self._profile_backend(self.config.vlm_backend).value
+        output_tokens = self.config.budget_output_tokens
+        if output_tokens is None:
+            if self._usage_reports:
+                output_tokens = round(self._token_counters["completion_tokens"] / self._usage_reports)
+            else:
+                output_tokens = OUTPUT_TOKEN_ESTIMATES[self.config.output_format]
+        plan = plan_budget(
+            len(SYSTEM_PROMPT + prompt.text),
+            backend,
+            self.frame_extractor.encoding,
+            max_frames=self.config.num_frames,
+            min_frames=self.config.budget_min_frames,
+            price=price_for(self.config.token_prices, backend),
+            output_tokens=output_tokens,
+            max_tokens=self.config.budget_max_tokens,
+            max_cost_usd=self.config.budget_max_cost_usd
+        )
+        if not plan.fits:
+            logger.warning(
+                f"No plan with at least {plan.num_frames} frames fits the budget; "
+                f"sending {plan.num_frames} frames at {plan.max_dimension}px "
+                f"(~{plan.estimated_tokens} tokens, ~${plan.estimated_cost_usd})"
+            )
+        return plan
+    
+    def _extractor_for(self, plan: Optional[BudgetPlan]) -> VideoFrameExtractor:
+        """The frame extractor, encoding at the planned resolution in budget mode."""
+        encoding = self.frame_extractor.encoding
+        if plan is None or plan.max_dimension == encoding.max_dimension:
+            return self.frame_extractor
+        extractor = self._budget_extractors.get(plan.max_dimension)
+        if extractor is None:
+            extractor = copy.copy(self.frame_extractor)
+            extractor.encoding = replace(encoding, max_dimension=plan.max_dimension)
+            self._budget_extractors[plan.max_dimension] = extractor
+        return extractor
+    
+    @staticmethod
+    def _sum_usage(usages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Sum the reported usage of several requests; estimated if any part was."""
+        return {
+            name: (
+                any(usage.get(name) for usage in usages) if name == "estimated"
+                else sum(usage[name] for usage in usages if usage.get(name) is not None)
+            )
+            for name in usages[0]
+        }
+    
+    @staticmethod
+    def _frame_stats(frames: List[FrameData]) -> Dict[str, Any]:
+        """Size of the frames sent to the VLM, and the ROI crop if any."""
+        # Base64 carries 3 bytes in every 4 characters
+        sizes = [len(frame.image_base64) * 3 // 4 for frame in frames]
+        crop = frames[0].crop if frames else None
+        return {
+            "count": len(frames),
+            "avg_bytes": int(sum(sizes) / len(sizes)) if sizes else 0,
+            "total_bytes": sum(sizes),
+            "width": frames[0].width if frames else None,
+            "height": frames[0].height if frames else None,
+            "roi": list(crop) if crop else None,
+            "mime_type": frames[0].mime_type if frames else None,
+        }
+    
+    async def _judge_with_cascade(
+        self,
+        vlm_client: VLMClient,
+        escalation_client: Optional[VLMClient],
+        frames: List[FrameData],
+        prompt: JudgePrompt,
+        discipline: Discipline,
+        priority: Priority,
+        retry_policy: RetryPolicy,
+        enter_stage: Callable[..., Awaitable[None]],
+        started: float
+    ) -> VideoJudgmentResult:
+        """Judge one set of frames, escalating through the cascade if configured."""
+        # Get VLM analysis and parse it, retrying only this stage
+        result = await self._judge_frames(
+            vlm_client,
             frames,
             prompt,
-            SYSTEM_PROMPT
+            discipline,
+            priority,
+            retry_policy,
+            enter_stage,
+            self.config.vlm_backend,
+            # In a cascade, unparseable first-tier answers escalate instead
+            retry_parse=escalation_client is None
         )
         
-        # Parse the response
-        result = self._parse_vlm_response(raw_response, discipline, vlm_client.model_name)
-        
+        if escalation_client is not None:
+            result = await self._cascade(
+                result,
+                escalation_client,
+                frames,
+                prompt,
+                discipline,
+                priority,
+                retry_policy,
+                enter_stage,
+                started
+            )
         return result
     
+    async def _judge_reps(
+        self,
+        segments: List[Tuple[RepSegment, List[FrameData]]],
+        vlm_client: VLMClient,
+        escalation_client: Optional[VLMClient],
+        prompt: JudgePrompt,
+        discipline: Discipline,
+        priority: Priority,
+        retry_policy: RetryPolicy,
+        enter_stage: Callable[..., Awaitable[None]],
+        started: float
+    ) -> VideoJudgmentResult:
+        """
+        Judge every rep concurrently with its own dense frame set.
+        
+        Wall-clock time stays close to a single VLM call as the rep count
+        grows; the backend scheduler bounds how many calls run at once.
+        """
+        async def no_stage(stage: str, **extra):
+            pass
+        
+        await enter_stage(JobStage.CALLING_VLM)
+        results = await asyncio.gather(*(
+            self._judge_with_cascade(
+                vlm_client,
+                escalation_client,
+                frames,
+                prompt.with_note(get_single_rep_note(segment.rep_number, len(segments), segment.complete)),
+                discipline,
+                priority,
+                retry_policy,
+                no_stage,
+                started
+            )
+            for segment, frames in segments
+        ))
+        await enter_stage(JobStage.PARSING)
+        return self._merge_rep_results(segments, list(results), discipline)
+    
+    def _merge_rep_results(
+        self,
+        segments: List[Tuple[RepSegment, List[FrameData]]],
+        results: List[VideoJudgmentResult],
+        discipline: Discipline
+    ) -> VideoJudgmentResult:
+        """Combine per-rep judgments into one result for the whole set."""
+        details = []
+        invalid_reasons = []
+        rep_summaries = []
+        errors = []
+        needs_review = False
+        for (segment, frames), result in zip(segments, results):
+            rep_label = f"Rep {segment.rep_number}: "
+            for detail in result.details:
+                details.append(JudgmentDetail(
+                    criteria=rep_label + _REP_PREFIX.sub("", detail.criteria),
+                    passed=detail.passed,
+                    confidence=detail.confidence,
+                    explanation=detail.explanation
+                ))
+            invalid_reasons.extend(
+                rep_label + _REP_PREFIX.sub("", reason) for reason in result.invalid_reasons
+            )
+            verdict = result.frame_analysis.get("overall_judgment")
+            if "error" in result.frame_analysis:
+                errors.append(rep_label + str(result.frame_analysis["error"]))
+                verdict = "NEEDS_REVIEW"
+            needs_review = needs_review or verdict == "NEEDS_REVIEW"
+            rep_summaries.append({
+                "rep_number": segment.rep_number,
+                "start_ms": round(frames[0].timestamp_ms, 1) if frames else None,
+                "end_ms": round(frames[-1].timestamp_ms, 1) if frames else None,
+                "complete": segment.complete,
+                "frames": len(frames),
+                "verdict": verdict,
+                "is_valid": result.is_valid,
+                "confidence": result.confidence,
+                "model_used": result.model_used,
+                "cascade": result.frame_analysis.get("cascade"),
+            })
+        
+        is_valid = all(result.is_valid for result in results)
+        if needs_review:
+            overall_judgment = "NEEDS_REVIEW"
+        else:
+            overall_judgment = "VALID" if is_valid else "INVALID"
+        
+        frame_analysis = {
+            "overall_judgment": overall_judgment,
+            # Reps are judged concurrently, so the slowest call bounds the wait
+            "vlm_latency_ms": max(
+                result.frame_analysis.get("vlm_latency_ms", 0.0) for result in results
+            ),
+            "rep_segmentation": {
+                "frames_per_rep": self.config.frames_per_rep,
+                "reps": rep_summaries,
+            },
+        }
+        usages = [result.frame_analysis["usage"] for result in results if "usage" in result.frame_analysis]
+        if usages:
+            frame_analysis["usage"] = self._sum_usage(usages)
+        if errors:
+            frame_analysis["error"] = "; ".join(errors)
+        
+        return VideoJudgmentResult(
+            is_valid=is_valid and not needs_review,
+            confidence=min(result.confidence for result in results),
+            discipline=discipline.value,
+            # Segmentation found the reps; each segment is judged as one rep
+            rep_count=len(segments),
+            details=details,
+            invalid_reasons=invalid_reasons,
+            frame_analysis=frame_analysis,
+            raw_response="\n\n".join(result.raw_response for result in results),
+            model_used=", ".join(sorted(set(result.model_used for result in results))),
+            token_usage=merge_usage(result.token_usage for result in results)
+        )
+    
+    async def _judge_angles(
+        self,
+        extractions: List[List[FrameData]],
+        angles: Tuple[str, ...],
+        discipline: Discipline,
+        additional_context: Optional[str],
+        vlm_client: VLMClient,
+        escalation_client: Optional[VLMClient],
+        priority: Priority,
+        retry_policy: RetryPolicy,
+        enter_stage: Callable[..., Awaitable[None]],
+        started: float
+    ) -> VideoJudgmentResult:
+        """
+        Judge each camera angle in its own concurrent request and fuse the
+        per-criterion results.
+        
+        Each request carries only its angle's frames and the single-angle
+        prompt, so both prefill faster than one interleaved request.
+        """
+        compact = self.config.output_format == "compact"
+        prompts = []
+        for angle in angles:
+            prompt = get_prompt_parts(discipline, angle, compact=compact)
+            if additional_context:
+                prompt = prompt.with_note(f"\n\nADDITIONAL CONTEXT: {additional_context}")
+            prompts.append(prompt)
+        
+        async def no_stage(stage: str, **extra):
+            pass
+        
+        await enter_stage(JobStage.CALLING_VLM)
+        results = await asyncio.gather(*(
+            self._judge_with_cascade(
+                vlm_client,
+                escalation_client,
+                frames,
+                prompt,
+                discipline,
+                priority,
+                retry_policy,
+                no_stage,
+                started
+            )
+            for frames, prompt in zip(extractions, prompts)
+        ))
+        await enter_stage(JobStage.PARSING)
+        return self._fuse_angle_results(list(zip(angles, results)), discipline)
+    
+    def _fuse_angle_results(
+        self,
+        views: List[Tuple[str, VideoJudgmentResult]],
+        discipline: Discipline
+    ) -> VideoJudgmentResult:
+        """
+        Combine per-angle judgments of the same attempt criterion by criterion.
+        
+        Angles listed in CRITERIA_VIEWS decide their criteria. Otherwise a
+        criterion fails if any angle saw it fail, and passes if any angle
+        saw it pass; an angle that could not see it (uncertain) does not
+        outvote one that could. Views that disagree on the rep count, or
+        that could not be parsed, make the result NEEDS_REVIEW.
+        """
+        judged = [(angle, result) for angle, result in views if "error" not in result.frame_analysis]
+        errors = [
+            f"{angle}: {result.frame_analysis['error']}"
+            for angle, result in views if "error" in result.frame_analysis
+        ]
+        deciding_views = CRITERIA_VIEWS.get(discipline, {})
+        
+        criteria: Dict[str, List[Tuple[str, JudgmentDetail]]] = {}
+        for angle, result in judged:
+            for detail in result.details:
+                criteria.setdefault(detail.criteria, []).append((angle, detail))
+        
+        details = []
+        for name, seen in criteria.items():
+            deciding = [
+                (angle, detail) for angle, detail in seen
+                if angle in deciding_views.get(_REP_PREFIX.sub("", name), ())
+            ]
+            statuses = [detail.explanation[len(_STATUS_PREFIX):] for _, detail in deciding or seen]
+            if "False" in statuses:
+                status = False
+            elif "True" in statuses:
+                status = True
+            else:
+                status = "uncertain"
+            explanation = f"{_STATUS_PREFIX}{status} (" + ", ".join(
+                f"{angle}: {detail.explanation[len(_STATUS_PREFIX):]}" for angle, detail in seen
+            ) + (f"; decided by the {deciding[0][0]} view)" if deciding else ")")
+            details.append(JudgmentDetail(
+                criteria=name,
+                passed=status is True or (status == "uncertain" and not self.config.strict_mode),
+                confidence=max(detail.confidence for _, detail in deciding or seen),
+                explanation=explanation
+            ))
+        
+        verdicts = [result.frame_analysis.get("overall_judgment") for _, result in judged]
+        rep_counts = {result.rep_count for _, result in judged}
+        if not judged:
+            overall_judgment = "NEEDS_REVIEW"
+        elif any(not detail.passed for detail in details):
+            overall_judgment = "INVALID"
+        elif not details:
+            # Nothing to check; agree only on a shared verdict
+            overall_judgment = verdicts[0] if len(set(verdicts)) == 1 else "NEEDS_REVIEW"
+        elif errors or len(rep_counts) > 1 or all(verdict == "NEEDS_REVIEW" for verdict in verdicts):
+            overall_judgment = "NEEDS_REVIEW"
+        else:
+            overall_judgment = "VALID"
+        
+        invalid_reasons = []
+        if overall_judgment == "INVALID":
+            invalid_reasons = [
+                f"[{angle}] {reason}" for angle, result in judged for reason in result.invalid_reasons
+            ]
+            invalid_reasons.extend(
+                f"{detail.criteria} could not be confirmed from any angle"
+                for detail in details
+                if not detail.passed and detail.explanation.startswith(f"{_STATUS_PREFIX}uncertain")
+            )
+        
+        results = [result for _, result in views]
+        frame_analysis = {
+            "overall_judgment": overall_judgment,
+            # The angles are judged concurrently, so the slowest call bounds the wait
+            "vlm_latency_ms": max(result.frame_analysis.get("vlm_latency_ms", 0.0) for result in results),
+            "multi_angle": {
+                "mode": "per_angle",
+                "views": [
+                    {
+                        "angle": angle,
+                        "verdict": result.frame_analysis.get("overall_judgment", "PARSE_FAILED"),
+                        "confidence": result.confidence,
+                        "rep_count": result.rep_count,
+                        "model_used": result.model_used,
+                        "frame_observations": {
+                            key: value for key, value in result.frame_analysis.items()
+                            if key not in ("overall_judgment", "usage", "vlm_latency_ms")
+                        },
+                    }
+                    for angle, result in views
+                ],
+                "rep_count_mismatch": len(rep_counts) > 1,
+            },
+        }
+        usages = [result.frame_analysis["usage"] for result in results if "usage" in result.frame_analysis]
+        if usages:
+            frame_analysis["usage"] = self._sum_usage(usages)
+        if errors:
+            frame_analysis["error"] = "; ".join(errors)
+        
+        return VideoJudgmentResult(
+            is_valid=overall_judgment == "VALID",
+            confidence=min((result.confidence for _, result in judged), default=0.0),
+            discipline=discipline.value,
+            rep_count=max(rep_counts, default=0),
+            details=details,
+            invalid_reasons=invalid_reasons,
+            frame_analysis=frame_analysis,
+            raw_response="\n\n".join(f"[{angle}]\n{result.raw_response}" for angle, result in views),
+            model_used=", ".join(sorted(set(result.model_used for result in results))),
+            token_usage=merge_usage(result.token_usage for result in results)
+        )
+    
+    def _escalation_reason(self, result: VideoJudgmentResult) -> Optional[str]:
+        """Why a first-tier result should go to the escalation backend, if at all."""
+        if "error" in result.frame_analysis:
+            return "parse_failed"
+        if result.frame_analysis.get("overall_judgment") == "NEEDS_REVIEW":
+            return "needs_review"
+        if result.confidence < self.config.confidence_threshold:
+            return "low_confidence"
+        return None
+    
+    async def _cascade(
+        self,
+        result: VideoJudgmentResult,
+        escalation_client: VLMClient,
+        frames: List[FrameData],
+        prompt: JudgePrompt,
+        discipline: Discipline,
+        priority: Priority,
+        retry_policy: RetryPolicy,
+        enter_stage: Callable[..., Awaitable[None]],
+        started: float
+    ) -> VideoJudgmentResult:
+        """
+        Escalate an uncertain first-tier result to the stronger backend.
+        
+        The escalation reuses the already extracted frames. If it fails,
+        the first-tier result is kept.
+        """
+        primary = self._tier_stats["primary"]
+        primary["judged"] += 1
+        reason = self._escalation_reason(result)
+        cascade_info = {
+            "tier": "primary",
+            "primary_model": result.model_used,
+            "primary_confidence": result.confidence,
+            "escalation_reason": reason,
+            "primary_usage": result.frame_analysis.get("usage"),
+        }
+        if reason is None:
+            primary["resolved"] += 1
+            primary["latency"].record(time.perf_counter() - started)
+            result.frame_analysis["cascade"] = cascade_info
+            return result
+        
+        primary["escalated"] += 1
+        escalation = self._tier_stats["escalation"]
+        escalation["judged"] += 1
+        try:
+            escalated = await self._judge_frames(
+                escalation_client,
+                frames,
+                prompt,
+                discipline,
+                priority,
+                retry_policy,
+                enter_stage,
+                self.config.cascade_backend
+            )
+        except Exception as e:
+            logger.warning(f"Escalation to {escalation_client.model_name} failed, keeping first-tier result: {e}")
+            escalation["errors"] += 1
+            primary["latency"].record(time.perf_counter() - started)
+            cascade_info["escalation_error"] = str(e)
+            result.frame_analysis["cascade"] = cascade_info
+            return result
+        
+        escalation["resolved"] += 1
+        escalation["latency"].record(time.perf_counter() - started)
+        cascade_info["tier"] = "escalation"
+        escalated.frame_analysis["cascade"] = cascade_info
+        # The judgment paid for both tiers
+        escalated.token_usage = merge_usage([result.token_usage, escalated.token_usage])
+        return escalated
+    
+    def cascade_stats(self) -> Optional[Dict[str, Any]]:
+        """Escalation rate and end-to-end latency of judgments resolved at each tier."""
+        if self.config.cascade_backend is None:
+            return None
+        tiers = {}
+        backends = {"primary": self.config.vlm_backend, "escalation": self.config.cascade_backend}
+        for tier, stats in self._tier_stats.items():
+            latency = stats["latency"]
+            p50 = latency.percentile(50)
+            p95 = latency.percentile(95)
+            tiers[tier] = {
+                "backend": backends[tier].value,
+                **{k: v for k, v in stats.items() if k != "latency"},
+                "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+        judged = self._tier_stats["primary"]["judged"]
+        escalated = self._tier_stats["primary"]["escalated"]
+        return {
+            "escalation_rate": round(escalated / judged, 4) if judged else 0.0,
+            "tiers": tiers,
+        }
+    
+    async def _judge_frames(
+        self,
+        vlm_client: VLMClient,
+        frames: List[FrameData],
+        prompt: JudgePrompt,
+        discipline: Discipline,
+        priority: Priority,
+        retry_policy: RetryPolicy,
+        enter_stage: Callable[..., Awaitable[None]],
+        backend: VLMBackend,
+        retry_parse: bool = True
+    ) -> VideoJudgmentResult:
+        """
+        Call the VLM and parse its answer, retrying transient failures.
+        
+        Timeouts, connection errors, 429s, 5xx responses and unparseable
+        answers are retried with jittered exponential backoff (honouring
+        Retry-After); other errors are raised immediately, and a failure
+        still transient after the last retry as RetriesExhausted. An answer
+        that still can't be parsed after the last retry is returned as a
+        parse-failed result.
+        """
+        images, prompt, mosaic_info = await self._prepare_images(backend, frames, prompt)
+        
+        # Accounting entries of every answered request, retries included
+        spent = []
+        attempt = 0
+        while True:
+            try:
+                await enter_stage(JobStage.CALLING_VLM)
+                call_started = time.perf_counter()
+                response = await self._call_vlm_hedged(vlm_client, images, prompt, priority, enter_stage)
+                latency_ms = round((time.perf_counter() - call_started) * 1000, 1)
+                
+                await enter_stage(JobStage.PARSING)
+                parse_started = time.perf_counter()
+                result = self._parse_vlm_response(
+                    response.text,
+                    discipline,
+                    vlm_client.model_name,
+                    parsed=response.parsed
+                )
+                PARSE_SECONDS.observe(time.perf_counter() - parse_started)
+                if "error" in result.frame_analysis:
+                    PARSE_FAILURES.labels(vlm_client.model_name).inc()
+                result.frame_analysis["vlm_latency_ms"] = latency_ms
+                if response.ttft_ms is not None:
+                    result.frame_analysis["streaming"] = {
+                        "ttft_ms": response.ttft_ms,
+                        "verdict_ms": response.verdict_ms,
+                        "total_ms": response.total_ms,
+                        "stopped_early": response.stopped_early,
+                    }
+                if response.usage is not None:
+                    result.frame_analysis["usage"] = asdict(response.usage)
+                    spent.append(self._account_usage(backend, discipline, response.usage))
+                result.token_usage = merge_usage(spent)
+                if mosaic_info is not None:
+                    result.frame_analysis["mosaic"] = mosaic_info
+                if retry_parse and "error" in result.frame_analysis and attempt < retry_policy.max_retries:
+                    raise ResponseParseError(result.frame_analysis["error"])
+                return result
+            except SchedulerTimeout:
+                # Already waited the full queue timeout for capacity
+                raise
+            except ResponseParseError as e:
+                # Raised above only while retries remain. Every retry counts
+                # under exactly one VLM_RETRIES reason: this one or "error"
+                attempt += 1
+                delay = retry_policy.delay(attempt)
+                self._vlm_counters["parse_retries"] += 1
+                VLM_RETRIES.labels("parse").inc()
+                logger.warning(
+                    f"VLM answer {attempt} did not parse ({e}); retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= retry_policy.max_retries:
+                    # Tells the job worker not to retry the whole judgment
+                    raise RetriesExhausted(f"VLM request failed after {attempt + 1} attempts: {e}") from e
+                attempt += 1
+                delay = retry_after_seconds(e)
+                if delay is None:
+                    delay = retry_policy.delay(attempt)
+                delay = min(delay, retry_policy.max_delay)
+                self._vlm_counters["retries"] += 1
+                VLM_RETRIES.labels("error").inc()
+                logger.warning(
+                    f"VLM attempt {attempt} failed ({e}); retrying in {delay:.2f}s"
+                )
+                await asyncio.sleep(delay)
+    
+    def _mosaic_tiles_for(self, backend: VLMBackend) -> int:
+        tiles = self.config.mosaic_tiles
+        return tiles.get(self._profile_backend(backend).value, tiles.get("*", 0))
+    
+    async def _prepare_images(
+        self,
+        backend: VLMBackend,
+        frames: List[FrameData],
+        prompt: JudgePrompt
+    ) -> Tuple[List[FrameData], JudgePrompt, Optional[Dict[str, Any]]]:
+        """
+        Re-encode frames for the backend's encoding profile if it differs
+        from the one they were extracted with, and pack them into mosaics
+        when enabled for the backend.
+        
+        Returns:
+            (images to send, prompt with the layout note, mosaic stats or None)
+        """
+        profile = self._encoding_for(backend)
+        tiles = self._mosaic_tiles_for(backend)
+        if tiles <= 1 or len(frames) <= 1:
+            if self._needs_transcode(profile, frames):
+                frames = await self._run_extraction(functools.partial(transcode_frames, frames, profile))
+            return frames, prompt, None
+        
+        images, layout = await self._run_extraction(functools.partial(
+            build_mosaics,
+            frames,
+            tiles_per_image=tiles,
+            max_side=self.config.mosaic_max_side,
+            codec=profile.codec,
+            quality=profile.quality
+        ))
+        sizes = [len(image.image_base64) * 3 // 4 for image in images]
+        mosaic_info = {
+            "tiles_per_image": tiles,
+            "grid": f"{layout.columns}x{layout.rows}",
+            "images": len(images),
+            "avg_image_bytes": int(sum(sizes) / len(sizes)),
+            "total_bytes": sum(sizes),
+        }
+        return images, prompt.with_note(get_mosaic_note(layout.columns, layout.rows, layout.images)), mosaic_info
+    
+    def _needs_transcode(self, profile: EncodingProfile, frames: List[FrameData]) -> bool:
+        """
+        Whether frames must be re-encoded for a backend's profile.
+        
+        Frames are encoded with the extractor's codec and quality, at most
+        at its resolution (less in budget mode), and frames are never
+        upscaled, so a larger max_dimension needs no re-encoding. The
+        detail level is sent with the request instead.
+        """
+        extracted = self.frame_extractor.encoding
+        if replace(profile, detail="high", max_dimension=extracted.max_dimension) != replace(extracted, detail="high"):
+            return True
+        return any(max(frame.width, frame.height) > profile.max_dimension for frame in frames)
+    
+    async def _call_vlm_hedged(
+        self,
+        vlm_client: VLMClient,
+        frames: List[FrameData],
+        prompt: JudgePrompt,
+        priority: Priority,
+        enter_stage: Optional[Callable[..., Awaitable[None]]] = None
+    ) -> VLMResponse:
+        """Call the VLM, hedging with a second request when hedging is enabled."""
+        launched = 0
+        
+        def call():
+            nonlocal launched
+            launched += 1
+            return self._call_vlm(vlm_client, frames, prompt, priority, enter_stage)
+        
+        try:
+            response, hedge_won = await hedged(call, self._hedge_delay())
+        finally:
+            if launched > 1:
+                self._vlm_counters["hedges"] += 1
+                VLM_RETRIES.labels("hedge").inc()
+        if hedge_won:
+            self._vlm_counters["hedge_wins"] += 1
+        return response
+    
+    def _hedge_delay(self) -> Optional[float]:
+        """Seconds before a hedged request is sent, once enough latencies are known."""
+        if self.config.hedge_percentile is None:
+            return None
+        if len(self._latency) < self.config.hedge_min_samples:
+            return None
+        return self._latency.percentile(self.config.hedge_percentile)
+    
+    def vlm_stats(self) -> Dict[str, Any]:
+        """
+        VLM call, retry and hedging counters with recent upstream latency,
+        and the token usage backends reported (cached = prefix cache hits).
+        Completion tokens per call show what the output format costs.
+        """
+        p50 = self._latency.percentile(50)
+        p95 = self._latency.percentile(95)
+        ttft_p50 = self._ttft.percentile(50)
+        ttft_p95 = self._ttft.percentile(95)
+        hedge_after = self._hedge_delay()
+        prompt_tokens = self._token_counters["prompt_tokens"]
+        return {
+            **self._vlm_counters,
+            **self._token_counters,
+            "cached_token_ratio": (
+                round(self._token_counters["cached_tokens"] / prompt_tokens, 4) if prompt_tokens else None
+            ),
+            "completion_tokens_per_call": (
+                round(self._token_counters["completion_tokens"] / self._usage_reports, 1)
+                if self._usage_reports else None
+            ),
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "hedge_after_ms": round(hedge_after * 1000, 1) if hedge_after is not None else None,
+            "ttft_p50_ms": round(ttft_p50 * 1000, 1) if ttft_p50 is not None else None,
+            "ttft_p95_ms": round(ttft_p95 * 1000, 1) if ttft_p95 is not None else None,
+        }
+    
+    def _account_usage(self, backend: VLMBackend, discipline: Discipline, usage: TokenUsage) -> Dict[str, Any]:
+        """Price the usage of one request and add it to the per-backend totals."""
+        backend_name = self._profile_backend(backend).value
+        entry = usage_entry(asdict(usage), price_for(self.config.token_prices, backend_name))
+        key = (backend_name, discipline.value)
+        self._usage_totals[key] = merge_usage([self._usage_totals.get(key), entry])
+        for kind in ("prompt_tokens", "completion_tokens", "cached_tokens"):
+            if entry[kind]:
+                VLM_TOKENS.labels(backend_name, discipline.value, kind[:-len("_tokens")]).inc(entry[kind])
+        if entry["cost_usd"]:
+            VLM_COST_USD.labels(backend_name, discipline.value).inc(entry["cost_usd"])
+        return entry
+    
+    def _account_judgment(self, discipline: Discipline, result: VideoJudgmentResult):
+        """Count a judgment towards its discipline's per-judgment averages."""
+        count, totals = self._judgment_usage.get(discipline.value, (0, None))
+        self._judgment_usage[discipline.value] = (count + 1, merge_usage([totals, result.token_usage]))
+    
+    def usage_stats(self) -> Dict[str, Any]:
+        """
+        Tokens and cost backends reported, per backend and discipline, and
+        what a judgment of each discipline spent on average. Cache hits
+        are not judgments; requests without reported usage count as free,
+        and estimated_requests counts streams closed before usage came in.
+        """
+        backends: Dict[str, Dict[str, Any]] = {}
+        for (backend, discipline), totals in sorted(self._usage_totals.items()):
+            entry = backends.setdefault(backend, {"total": None, "disciplines": {}})
+            entry["total"] = merge_usage([entry["total"], totals])
+            entry["disciplines"][discipline] = totals
+        
+        per_judgment = {}
+        for discipline, (count, totals) in sorted(self._judgment_usage.items()):
+            totals = totals or {}
+            per_judgment[discipline] = {
+                "judgments": count,
+                **{
+                    f"avg_{name}": round((totals.get(name) or 0) / count, 6 if name == "cost_usd" else 1)
+                    for name in USAGE_FIELDS
+                },
+            }
+        return {"backends": backends, "per_judgment": per_judgment}
+    
+    async def _call_vlm(
+        self,
+        vlm_client: VLMClient,
+        frames: List[FrameData],
+        prompt: JudgePrompt,
+        priority: Priority,
+        enter_stage: Optional[Callable[..., Awaitable[None]]] = None
+    ) -> VLMResponse:
+        """Send frames to the VLM once the backend scheduler admits the request."""
+        scheduler = get_scheduler(
+            vlm_client.model_name,
+            BackendLimits(
+                max_in_flight=self.config.scheduler_max_in_flight,
+                requests_per_minute=self.config.scheduler_requests_per_minute,
+                tokens_per_minute=self.config.scheduler_tokens_per_minute
+            )
+        )
+        tokens_per_image = 765
+        if frames:
+            tokens_per_image = estimate_image_tokens(
+                frames[0].width,
+                frames[0].height,
+                getattr(vlm_client, "image_detail", "high")
+            )
+        prompt_tokens = estimate_request_tokens(
+            SYSTEM_PROMPT + prompt.text, len(frames), tokens_per_image, max_output_tokens=0
+        )
+        tokens = estimate_request_tokens(SYSTEM_PROMPT + prompt.text, len(frames), tokens_per_image)
+        async with scheduler.slot(priority, tokens, self.config.scheduler_queue_timeout):
+            self._vlm_counters["calls"] += 1
+            started = time.perf_counter()
+            # System prompt and regulations go before the images so backends
+            # with prefix caching can reuse them across requests
+            if self.config.stream_responses:
+                response = await self._stream_vlm(vlm_client, frames, prompt, prompt_tokens, enter_stage)
+            else:
+                response = await vlm_client.complete(
+                    frames,
+                    prompt.suffix,
+                    SYSTEM_PROMPT,
+                    prompt_prefix=prompt.prefix,
+                    response_schema=self._response_schema(prompt)
+                )
+            # Upstream latency only; queueing in the scheduler is excluded
+            self._latency.record(time.perf_counter() - started)
+            # Estimated usage (a stream closed early) would understate the
+            # completion tokens that budget planning averages
+            if response.usage is not None and not response.usage.estimated:
+                self._usage_reports += 1
+                for name in self._token_counters:
+                    value = getattr(response.usage, name)
+                    if value is not None:
+                        self._token_counters[name] += value
+            # The slot charged the estimate, with a full output allowance;
+            # give the TPM budget back whatever the request didn't use
+            if response.usage is not None and response.usage.prompt_tokens is not None:
+                scheduler.refund_tokens(
+                    tokens,
+                    response.usage.prompt_tokens + (response.usage.completion_tokens or 0)
+                )
+            return response
+    
+    def _response_schema(self, prompt: JudgePrompt) -> Optional[Dict[str, Any]]:
+        """Schema to constrain the answer to, when guided decoding is on."""
+        return prompt.schema if self.config.guided_decoding else None
+    
+    async def _stream_vlm(
+        self,
+        vlm_client: VLMClient,
+        frames: List[FrameData],
+        prompt: JudgePrompt,
+        prompt_tokens: int,
+        enter_stage: Optional[Callable[..., Awaitable[None]]] = None
+    ) -> VLMResponse:
+        """
+        Stream the answer through the incremental JSON parser.
+        
+        Reports the "verdict" stage as soon as overall_judgment and
+        confidence are decoded and, with stream_stop_early, closes the
+        stream once every field the result needs is in (skipping the
+        frame observations and recommendations). Compact answers are
+        tracked by their short keys.
+        
+        Backends report usage in the last chunk, which an early stop never
+        reads; the usage is then estimated from prompt_tokens and the text
+        streamed so far (~4 characters per token), marked estimated.
+        """
+        verdict_fields, required_fields = VERDICT_FIELDS, REQUIRED_FIELDS
+        if prompt.schema is not None:
+            verdict_fields, required_fields = COMPACT_VERDICT_FIELDS, COMPACT_REQUIRED_FIELDS
+        
+        started = time.perf_counter()
+        parser = IncrementalJSONParser()
+        usage = None
+        ttft = verdict_at = None
+        stopped_early = False
+        
+        stream = vlm_client.stream(
+            frames,
+            prompt.suffix,
+            SYSTEM_PROMPT,
+            prompt_prefix=prompt.prefix,
+            response_schema=self._response_schema(prompt)
+        )
+        try:
+            async for item in stream:
+                if isinstance(item, TokenUsage):
+                    usage = item
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                    self._ttft.record(ttft)
+                parser.feed(item)
+                if verdict_at is None and parser.has(*verdict_fields):
+                    verdict_at = time.perf_counter() - started
+                    if enter_stage is not None:
+                        judgment, confidence = (parser.fields[name] for name in verdict_fields)
+                        await enter_stage(
+                            JobStage.VERDICT,
+                            overall_judgment=JUDGMENTS.get(judgment, judgment),
+                            confidence=confidence,
+                            model=vlm_client.model_name
+                        )
+                if self.config.stream_stop_early and parser.has(*required_fields):
+                    stopped_early = not parser.complete
+                    break
+        finally:
+            await stream.aclose()
+        
+        if stopped_early:
+            self._vlm_counters["early_stops"] += 1
+            if usage is None:
+                usage = TokenUsage(
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=len(parser.text) // 4,
+                    estimated=True
+                )
+        
+        def ms(seconds: Optional[float]) -> Optional[float]:
+            return round(seconds * 1000, 1) if seconds is not None else None
+        
+        return VLMResponse(
+            parser.text,
+            usage,
+            parsed=parser.fields if parser.complete or stopped_early else None,
+            ttft_ms=ms(ttft),
+            verdict_ms=ms(verdict_at),
+            total_ms=ms(time.perf_counter() - started),
+            stopped_early=stopped_early
+        )
+    
+    async def _cache_key(
+        self,
+        discipline: Discipline,
+        camera_angle: str,
+        prompt: JudgePrompt,
+        model_name: str,
+        video_path: Optional[str],
+        video_bytes: Optional[bytes],
+        secondary_video_path: Optional[str]
+    ) -> str:
+        """Build the result cache key; video hashing runs off the event loop."""
+        loop = asyncio.get_running_loop()
+        if video_path:
+            video_hash = await loop.run_in_executor(None, hash_file, video_path)
+        else:
+            video_hash = hash_bytes(video_bytes)
+        secondary_hash = None
+        if secondary_video_path:
+            secondary_hash = await loop.run_in_executor(None, hash_file, secondary_video_path)
+        
+        return make_cache_key(
+            video=video_hash,
+            secondary_video=secondary_hash,
+            discipline=discipline.value,
+            camera_angle=camera_angle,
+            num_frames=self.config.num_frames,
+            frame_selection=self.config.frame_selection,
+            frames_per_rep=self.config.frames_per_rep if self.config.rep_segmentation else None,
+            roi_padding=self.config.roi_padding if self.config.roi_crop else None,
+            dedupe_max_distance=self.config.dedupe_max_distance,
+            multi_angle_mode=self.config.multi_angle_mode if secondary_video_path else None,
+            budget=(
+                [self.config.budget_max_tokens, self.config.budget_max_cost_usd, self.config.budget_min_frames]
+                if self.config.budget_max_tokens is not None or self.config.budget_max_cost_usd is not None
+                else None
+            ),
+            mosaic_tiles=self._mosaic_tiles_for(self.config.vlm_backend),
+            encoding=asdict(self._encoding_for(self.config.vlm_backend)),
+            strict_mode=self.config.strict_mode,
+            backend=self.config.vlm_backend.value,
+            model=model_name,
+            prompt=hash_text(SYSTEM_PROMPT + prompt.text)
+        )
+    
+    async def _extract_frames(self, extract, source, num_frames: int) -> List[FrameData]:
+        """Extract frames with the configured selection strategy."""
+        started = time.perf_counter()
+        frames = await self._run_extraction(functools.partial(
+            extract,
+            source,
+            num_frames=num_frames,
+            selection=self.config.frame_selection
+        ))
+        FRAME_EXTRACTION_SECONDS.labels(self.config.frame_selection).observe(time.perf_counter() - started)
+        return frames
+    
+    async def _extract_angles(
+        self,
+        extractor: VideoFrameExtractor,
+        video_path: Optional[str],
+        video_bytes: Optional[bytes],
+        secondary_video_path: str,
+        num_frames: int
+    ) -> Tuple[List[List[FrameData]], AngleAlignment]:
+        """
+        Extract frames of two camera angles that show the same instants.
+        
+        The motion passes of both videos run concurrently, their offset
+        comes from cross-correlating the motion (align_angles), and the
+        paired frames are then decoded from both videos concurrently. The
+        primary frames are spread over the part of the attempt both videos
+        cover, or picked by motion with that frame selection.
+        
+        Returns:
+            ([primary frames, secondary frames] in matching order, alignment)
+        """
+        started = time.perf_counter()
+        temp_path = None
+        if not video_path:
+            temp_path = await asyncio.get_running_loop().run_in_executor(None, self._spool_video, video_bytes)
+            video_path = temp_path
+        try:
+            reference, other = await asyncio.gather(
+                self._run_extraction(functools.partial(extractor.analyze_motion, video_path)),
+                self._run_extraction(functools.partial(extractor.analyze_motion, secondary_video_path))
+            )
+            alignment = align_angles(
+                reference,
+                other,
+                max_offset_seconds=self.config.angle_max_offset_seconds,
+                min_correlation=self.config.angle_min_correlation
+            )
+            reference_indices = None
+            if self.config.frame_selection == "motion":
+                reference_indices = select_motion_keyframes(reference, num_frames) or None
+            primary_indices, secondary_indices = paired_frame_indices(
+                alignment, reference, other, num_frames, reference_indices
+            )
+            # The profiles are only needed again for the ROI crop
+            primary, secondary = await asyncio.gather(
+                self._run_extraction(functools.partial(
+                    extractor.extract_frames_at,
+                    video_path,
+                    primary_indices,
+                    reference if extractor.crop_to_roi else None
+                )),
+                self._run_extraction(functools.partial(
+                    extractor.extract_frames_at,
+                    secondary_video_path,
+                    secondary_indices,
+                    other if extractor.crop_to_roi else None
+                ))
+            )
+        finally:
+            if temp_path is not None:
+                os.unlink(temp_path)
+        FRAME_EXTRACTION_SECONDS.labels("aligned_angles").observe(time.perf_counter() - started)
+        
+        # Keep only pairs where both frames decoded, so the views stay in step
+        partners = dict(zip(primary_indices, secondary_indices))
+        decoded = {frame.frame_number for frame in secondary}
+        primary = [frame for frame in primary if partners.get(frame.frame_number) in decoded]
+        kept = {partners[frame.frame_number] for frame in primary}
+        secondary = [frame for frame in secondary if frame.frame_number in kept]
+        return [primary, secondary], alignment
+    
+    @staticmethod
+    def _spool_video(video_bytes: bytes) -> str:
+        """Write video bytes to a temporary file for passes that need a path."""
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as f:
+            f.write(video_bytes)
+            return f.name
+    
+    async def _run_extraction(self, call):
+        """
+        Run a blocking extraction call on the shared extraction executor.
+        
+        Decoding, resizing and encoding are CPU bound; running them inline
+        would stall every other request on this event loop.
+        """
+        executor = get_extraction_executor(
+            self.config.extraction_executor,
+            self.config.extraction_workers
+        )
+        if executor is None:
+            return call()
+        return await asyncio.get_running_loop().run_in_executor(executor, call)
+    
     def _interleave_frames(
         self,
         primary: List[FrameData],
@@ -170,9 +1660,17 @@ class StreetLiftingJudge:
         self,
         raw_response: str,
         discipline: Discipline,
-        model_name: str
+        model_name: str,
+        parsed: Optional[Dict[str, Any]] = None
     ) -> VideoJudgmentResult:
-        """Parse the VLM response into a structured result."""
+        """
+        Parse the VLM response into a structured result.
+        
+        `parsed` holds the fields already decoded from a streamed answer;
+        the text is only scanned for JSON when it is not given.
+        """
+        if parsed is not None:
+            return self._build_result(dict(parsed), raw_response, discipline, model_name)
         
         # Try to extract JSON from the response
         json_match = re.search(r'```json\s*(.*?)\s*```', raw_response, re.DOTALL)
@@ -213,6 +1711,19 @@ class StreetLiftingJudge:
                 model_used=model_name
             )
         
+        return self._build_result(parsed, raw_response, discipline, model_name)
+    
+    def _build_result(
+        self,
+        parsed: Dict[str, Any],
+        raw_response: str,
+        discipline: Discipline,
+        model_name: str
+    ) -> VideoJudgmentResult:
+        """Turn the decoded judgment JSON into a VideoJudgmentResult."""
+        if is_compact(parsed):
+            parsed = expand_compact(parsed, discipline)
+        
         # Extract structured information
         overall_judgment = parsed.get("overall_judgment", "NEEDS_REVIEW")
         is_valid = overall_judgment == "VALID"
@@ -240,7 +1751,7 @@ class StreetLiftingJudge:
                     criteria=f"Rep {rep_num}: {criteria_name}",
                     passed=passed,
                     confidence=float(rep.get("confidence", 0.5)),
-                    explanation=f"Status: {status}"
+                    explanation=f"{_STATUS_PREFIX}{status}"
                 ))
             
             # Collect invalid reasons
@@ -251,6 +1762,7 @@ class StreetLiftingJudge:
         # Frame analysis
         frame_analysis = parsed.get("frame_observations", {})
         frame_analysis["recommendations"] = parsed.get("recommendations", "")
+        frame_analysis["overall_judgment"] = overall_judgment
         
         return VideoJudgmentResult(
             is_valid=is_valid,
@@ -271,21 +1783,28 @@ class StreetLiftingJudge:
         camera_angle: str = "front",
         max_retries: int = 2
     ) -> VideoJudgmentResult:
-        """Analyze with retry logic for robustness."""
+        """
+        Analyze with retry logic for robustness.
         
-        last_error = None
-        for attempt in range(max_retries + 1):
-            try:
-                return await self.analyze_video(
-                    discipline=discipline,
-                    video_path=video_path,
-                    camera_angle=camera_angle
-                )
-            except Exception as e:
-                last_error = e
-                logger.warning(f"Attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries:
-                    continue
+        Frames are extracted once; only the VLM call and parsing are retried
+        (see _judge_frames). Errors that survive the retries are returned as
+        a failed result instead of raised.
+        """
+        policy = RetryPolicy(
+            max_retries=max_retries,
+            base_delay=self.config.retry_base_delay,
+            max_delay=self.config.retry_max_delay
+        )
+        try:
+            return await self.analyze_video(
+                discipline=discipline,
+                video_path=video_path,
+                camera_angle=camera_angle,
+                retry_policy=policy
+            )
+        except Exception as e:
+            last_error = e
+            logger.warning(f"Analysis failed: {e}")
         
         # All retries failed
         return VideoJudgmentResult(
@@ -294,7 +1813,7 @@ class StreetLiftingJudge:
             discipline=discipline.value,
             rep_count=0,
             details=[],
-            invalid_reasons=[f"Analysis failed after {max_retries + 1} attempts: {str(last_error)}"],
+            invalid_reasons=[f"Analysis failed: {str(last_error)}"],
             frame_analysis={"error": str(last_error)},
             raw_response="",
             model_used="N/A"
@@ -305,6 +1824,9 @@ class StreetLiftingJudge:
         if self._vlm_client:
             await self._vlm_client.close()
             self._vlm_client = None
+        if self._escalation_client:
+            await self._escalation_client.close()
+            self._escalation_client = None
 
 
 # Convenience function for quick analysis
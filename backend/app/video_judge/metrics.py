@@ -0,0 +1,138 @@
+"""
+Prometheus metrics for the video judge pipeline.
+
+Histograms cover frame extraction, per-frame encoding, upstream VLM
+requests (per backend and model), response parsing and whole judgments;
+counters cover parse failures, retries, cache lookups and the tokens and
+cost backends reported per discipline; gauges cover
+judgments in flight, requests queued for VLM capacity and the payload
+size of the latest request.
+
+With several worker processes (e.g. gunicorn), set PROMETHEUS_MULTIPROC_DIR
+to a shared, empty directory so /metrics aggregates every process.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+    multiprocess,
+)
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+FRAME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+
+
+FRAME_EXTRACTION_SECONDS = Histogram(
+    "video_judge_frame_extraction_seconds",
+    "Frame extraction time per video, including waiting for the extraction executor",
+    ["mode"],
+    buckets=LATENCY_BUCKETS
+)
+FRAME_ENCODE_SECONDS = Histogram(
+    "video_judge_frame_encode_seconds",
+    "Resize and encode time per frame",
+    ["codec"],
+    buckets=FRAME_BUCKETS
+)
+VLM_REQUEST_SECONDS = Histogram(
+    "video_judge_vlm_request_seconds",
+    "Upstream VLM request time, to the last streamed token",
+    ["backend", "model", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+VLM_PAYLOAD_BYTES = Gauge(
+    "video_judge_vlm_request_payload_bytes",
+    "Image and prompt bytes of the latest VLM request",
+    ["backend", "model"],
+    multiprocess_mode="mostrecent"
+)
+PARSE_SECONDS = Histogram(
+    "video_judge_parse_seconds",
+    "Time to parse and score a VLM answer",
+    buckets=FRAME_BUCKETS
+)
+JUDGMENT_SECONDS = Histogram(
+    "video_judge_judgment_seconds",
+    "End-to-end analyze_video time",
+    ["discipline", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+PARSE_FAILURES = Counter(
+    "video_judge_parse_failures_total",
+    "VLM answers that could not be parsed",
+    ["model"]
+)
+VLM_RETRIES = Counter(
+    "video_judge_vlm_retries_total",
+    "Repeated VLM requests: retried errors, unparseable answers and hedges",
+    ["reason"]
+)
+CACHE_REQUESTS = Counter(
+    "video_judge_cache_requests_total",
+    "Result cache lookups",
+    ["result"]
+)
+VLM_TOKENS = Counter(
+    "video_judge_vlm_tokens_total",
+    "Tokens reported by VLM backends",
+    ["backend", "discipline", "kind"]
+)
+VLM_COST_USD = Counter(
+    "video_judge_vlm_cost_usd_total",
+    "Estimated USD cost of VLM requests at the configured token prices",
+    ["backend", "discipline"]
+)
+JUDGMENTS_IN_FLIGHT = Gauge(
+    "video_judge_judgments_in_flight",
+    "analyze_video calls running, summed over processes",
+    multiprocess_mode="livesum"
+)
+VLM_REQUESTS_QUEUED = Gauge(
+    "video_judge_vlm_requests_queued",
+    "VLM requests waiting for backend capacity in the scheduler",
+    ["backend"],
+    multiprocess_mode="livesum"
+)
+JOBS = Gauge(
+    "video_judge_jobs",
+    "Queued judgment jobs per status",
+    ["status"],
+    multiprocess_mode="max"  # Every process reads the same table
+)
+
+
+@contextmanager
+def track_vlm_request(backend: str, model: str, payload_bytes: int) -> Iterator[None]:
+    """Time one upstream VLM request and record its payload size."""
+    VLM_PAYLOAD_BYTES.labels(backend, model).set(payload_bytes)
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    except GeneratorExit:
+        # A streamed answer closed by the consumer
+        outcome = "closed"
+        raise
+    finally:
+        VLM_REQUEST_SECONDS.labels(backend, model, outcome).observe(time.perf_counter() - started)
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """(body, content type) of the metrics in the Prometheus text format."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
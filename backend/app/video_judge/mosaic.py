@@ -0,0 +1,158 @@
+"""
+Frame mosaics: pack several frames into one labeled grid image.
+
+Cloud backends charge a fixed overhead per image and vLLM runs the vision
+encoder once per image, so sending 16 separate frames costs far more
+than sending four 2x2 grids. Each tile is labeled with its position in
+the sequence, source frame number and timestamp so the model can refer to
+individual frames, and the prompt describes the layout.
+"""
+
+import base64
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .encoding import CODECS, encode_image
+from .vlm_service import FrameData
+
+
+@dataclass
+class MosaicLayout:
+    """Which frames ended up in which tile of which image."""
+    tiles_per_image: int
+    columns: int
+    rows: int
+    # One entry per mosaic image: the FrameData tiled into it, in tile order
+    images: List[List[FrameData]]
+
+
+def _grid(tiles: int) -> Tuple[int, int]:
+    """Columns and rows of a near-square grid for `tiles` tiles."""
+    columns = math.ceil(math.sqrt(tiles))
+    return columns, math.ceil(tiles / columns)
+
+
+def _decode(cv2, frame: FrameData) -> np.ndarray:
+    buffer = np.frombuffer(base64.b64decode(frame.image_base64), dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError(f"Could not decode frame {frame.frame_number}")
+    return image
+
+
+def _label(cv2, tile: np.ndarray, text: str):
+    """Draw a high-contrast label in the top-left corner of a tile."""
+    scale = max(0.4, tile.shape[1] / 640)
+    thickness = max(1, int(round(scale * 1.5)))
+    (text_width, text_height), baseline = cv2.getTextSize(
+        text, cv2.FONT_HERSHEY_SIMPLEX, scale, thickness
+    )
+    pad = max(2, int(4 * scale))
+    cv2.rectangle(
+        tile,
+        (0, 0),
+        (text_width + 2 * pad, text_height + baseline + 2 * pad),
+        (0, 0, 0),
+        thickness=-1
+    )
+    cv2.putText(
+        tile,
+        text,
+        (pad, pad + text_height),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        scale,
+        (255, 255, 255),
+        thickness,
+        cv2.LINE_AA
+    )
+
+
+def build_mosaics(
+    frames: List[FrameData],
+    tiles_per_image: int = 4,
+    max_side: int = 2048,
+    codec: str = "jpeg",
+    quality: int = 85
+) -> Tuple[List[FrameData], MosaicLayout]:
+    """
+    Tile frames into grid images, in chronological order.
+
+    Args:
+        frames: Frames as extracted, in the order they should be read
+        tiles_per_image: Frames per mosaic image
+        max_side: Upper bound on the mosaic's longest side in pixels
+        codec: Image codec of the mosaic images ("jpeg", "webp" or "png")
+        quality: JPEG/WebP quality of the mosaic images
+
+    Returns:
+        (mosaic images as FrameData, layout for the prompt)
+    """
+    try:
+        import cv2
+    except ImportError:
+        raise ImportError(
+            "OpenCV is required for frame mosaics. "
+            "Install with: pip install opencv-python"
+        )
+
+    tiles_per_image = max(1, tiles_per_image)
+    columns, rows = _grid(tiles_per_image)
+    groups = [frames[i:i + tiles_per_image] for i in range(0, len(frames), tiles_per_image)]
+    if not groups:
+        return [], MosaicLayout(tiles_per_image, columns, rows, [])
+
+    # All tiles share the first frame's aspect ratio
+    aspect = frames[0].height / max(frames[0].width, 1)
+    tile_width = min(frames[0].width, max_side // columns)
+    tile_height = int(tile_width * aspect)
+    if tile_height * rows > max_side:
+        tile_height = max_side // rows
+        tile_width = int(tile_height / aspect)
+
+    mosaics = []
+    position = 0
+    for group in groups:
+        group_rows = math.ceil(len(group) / columns)
+        canvas = np.zeros((tile_height * group_rows, tile_width * columns, 3), dtype=np.uint8)
+        for slot, frame in enumerate(group):
+            position += 1
+            tile = cv2.resize(_decode(cv2, frame), (tile_width, tile_height), interpolation=cv2.INTER_AREA)
+            _label(cv2, tile, f"T{position} f{frame.frame_number} {frame.timestamp_ms / 1000:.2f}s")
+            row, column = divmod(slot, columns)
+            canvas[row * tile_height:(row + 1) * tile_height,
+                   column * tile_width:(column + 1) * tile_width] = tile
+
+        buffer = encode_image(cv2, canvas, codec, quality)
+        mosaics.append(FrameData(
+            frame_number=group[0].frame_number,
+            timestamp_ms=group[0].timestamp_ms,
+            image_base64=base64.b64encode(buffer).decode('utf-8'),
+            width=canvas.shape[1],
+            height=canvas.shape[0],
+            mime_type=CODECS[codec][1],
+        ))
+
+    return mosaics, MosaicLayout(tiles_per_image, columns, rows, groups)
+
+
+def parse_mosaic_tiles(value: Optional[str]) -> Dict[str, int]:
+    """
+    Parse a per-backend mosaic setting.
+
+    Accepts a bare number applied to every backend ("4") or a list of
+    backend=tiles pairs ("vllm_qwen=4,openai_gpt4o=6"). 0 or 1 disables
+    mosaics for a backend.
+    """
+    if not value:
+        return {}
+    value = value.strip()
+    if "=" not in value:
+        return {"*": int(value)}
+    tiles = {}
+    for pair in value.split(","):
+        backend, _, count = pair.partition("=")
+        tiles[backend.strip()] = int(count)
+    return tiles
@@ -0,0 +1,716 @@
+"""
+Motion analysis for street lifting videos.
+
+Works on small grayscale thumbnails sampled from the video and uses
+vectorized NumPy operations only, so a full pass over a minute of footage
+stays cheap compared to the VLM call it feeds.
+
+The main signals are:
+1. Motion energy: mean absolute difference between consecutive thumbnails
+2. Vertical position: centroid row of the moving pixels (those that differ
+   between the samples either side of a sample), which tracks the athlete
+   moving up and down; samples where nothing moves have none
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+@dataclass
+class MotionProfile:
+    """Motion signals sampled over a video."""
+    frame_indices: np.ndarray  # Source frame index of each sample
+    fps: float
+    total_frames: int
+    energy: np.ndarray  # Motion energy per sample (0 for the first sample)
+    position: np.ndarray  # Vertical centroid of moving pixels, 0 = top, 1 = bottom; NaN when still
+    thumbnails: np.ndarray  # (samples, height, width) uint8 grayscale
+
+    @property
+    def sample_count(self) -> int:
+        return len(self.frame_indices)
+
+
+def compute_motion_profile(
+    thumbnails: np.ndarray,
+    frame_indices: List[int],
+    fps: float,
+    total_frames: int,
+    foreground_threshold: float = 25.0
+) -> MotionProfile:
+    """
+    Compute motion signals from a stack of grayscale thumbnails.
+
+    Args:
+        thumbnails: Array of shape (samples, height, width), uint8
+        frame_indices: Source frame index for each thumbnail
+        fps: Frames per second of the source video
+        total_frames: Total frame count of the source video
+        foreground_threshold: Gray level difference between the samples
+            either side of a sample above which a pixel counts as moving
+
+    Returns:
+        MotionProfile with energy and vertical position signals
+    """
+    stack = thumbnails.astype(np.float32)
+    samples, height, _ = stack.shape
+
+    energy = np.zeros(samples, dtype=np.float32)
+    if samples > 1:
+        energy[1:] = np.abs(np.diff(stack, axis=0)).mean(axis=(1, 2))
+
+    # The athlete moves while the gym does not, so the pixels that change
+    # between the samples either side of a sample are the athlete's edges,
+    # centred on where the athlete is at that sample. A background model
+    # (e.g. the per-pixel median) would keep the athlete where they spend
+    # most of the clip, and that "ghost" pulls the centroid back to the
+    # middle twice per rep. Samples where nothing moves (the athlete
+    # holding still, often at the top or bottom of a rep) have no position
+    # and are interpolated from their neighbours.
+    moving = np.zeros(stack.shape, dtype=bool)
+    if samples > 2:
+        moving[1:-1] = np.abs(stack[2:] - stack[:-2]) > foreground_threshold
+    row_mass = moving.sum(axis=2).astype(np.float32)
+    mass = row_mass.sum(axis=1)
+    rows = np.arange(height, dtype=np.float32)
+
+    position = np.full(samples, np.nan, dtype=np.float32)
+    # Ignore samples where only sensor noise changes
+    min_mass = max(1.0, 0.002 * moving[0].size)
+    has_mass = mass >= min_mass
+    position[has_mass] = (
+        (row_mass[has_mass] * rows).sum(axis=1) / mass[has_mass] / max(height - 1, 1)
+    )
+
+    return MotionProfile(
+        frame_indices=np.asarray(frame_indices, dtype=np.int64),
+        fps=fps,
+        total_frames=total_frames,
+        energy=energy,
+        position=position,
+        thumbnails=thumbnails,
+    )
+
+
+def smooth(signal: np.ndarray, window: int) -> np.ndarray:
+    """Centered moving average that preserves the signal length."""
+    if window <= 1 or len(signal) < 2:
+        return signal.astype(np.float32)
+    window = min(window, len(signal))
+    kernel = np.ones(window, dtype=np.float32) / window
+    padded = np.pad(signal.astype(np.float32), (window // 2, window - 1 - window // 2), mode="edge")
+    return np.convolve(padded, kernel, mode="valid")
+
+
+def median_filter(signal: np.ndarray, window: int) -> np.ndarray:
+    """Centered running median that preserves the signal length; removes spikes."""
+    window = min(window, len(signal))
+    if window <= 1:
+        return signal.astype(np.float32)
+    padded = np.pad(signal.astype(np.float32), (window // 2, window - 1 - window // 2), mode="edge")
+    return np.median(np.lib.stride_tricks.sliding_window_view(padded, window), axis=1)
+
+
+def _fill_gaps(signal: np.ndarray) -> np.ndarray:
+    """Linearly interpolate NaN samples."""
+    valid = ~np.isnan(signal)
+    if valid.all() or not valid.any():
+        return np.nan_to_num(signal, nan=0.5)
+    idx = np.arange(len(signal))
+    return np.interp(idx, idx[valid], signal[valid]).astype(np.float32)
+
+
+def _center_in_pause(position: np.ndarray, index: int, reach: int) -> int:
+    """
+    Move a turning point next to a pause to the middle of the pause.
+
+    Nothing moves while the athlete holds the top or bottom of a rep, so
+    those samples have no position and are interpolated; the detected
+    turning point then lands on whichever edge of the pause the noise
+    favours rather than in the hold itself.
+    """
+    still = np.isnan(position)
+    lo, hi = max(0, index - reach), min(len(position) - 1, index + reach)
+    nearby = lo + np.flatnonzero(still[lo:hi + 1])
+    if len(nearby) == 0:
+        return index
+    first = last = int(nearby[np.argmin(np.abs(nearby - index))])
+    while first > 0 and still[first - 1]:
+        first -= 1
+    while last < len(position) - 1 and still[last + 1]:
+        last += 1
+    return (first + last) // 2
+
+
+def _sample_rate(profile: MotionProfile) -> float:
+    """Samples per second of the profile."""
+    if profile.sample_count < 2 or profile.fps <= 0:
+        return 1.0
+    step = float(np.median(np.diff(profile.frame_indices))) or 1.0
+    return profile.fps / step
+
+
+def find_active_range(
+    profile: MotionProfile,
+    activity_fraction: float = 0.2,
+    padding_seconds: float = 0.3
+) -> Tuple[int, int]:
+    """
+    Find the sample range that contains the actual attempt.
+
+    Trims idle lead-in (walking up, chalking, setting up) and lead-out
+    by thresholding smoothed motion energy between its idle baseline and
+    its peak.
+
+    Returns:
+        (start, end) sample positions, inclusive
+    """
+    n = profile.sample_count
+    if n < 3:
+        return 0, max(n - 1, 0)
+
+    rate = _sample_rate(profile)
+    energy = smooth(profile.energy, max(1, int(round(rate * 0.5))))
+    baseline = np.percentile(energy, 20)
+    peak = np.percentile(energy, 95)
+    if peak - baseline <= 1e-3:
+        return 0, n - 1
+
+    active = np.flatnonzero(energy > baseline + activity_fraction * (peak - baseline))
+    if len(active) == 0:
+        return 0, n - 1
+
+    pad = int(round(padding_seconds * rate))
+    return max(0, int(active[0]) - pad), min(n - 1, int(active[-1]) + pad)
+
+
+def find_rep_extremes(
+    profile: MotionProfile,
+    start: int,
+    end: int,
+    min_amplitude_fraction: float = 0.4,
+    min_phase_seconds: float = 0.4
+) -> List[int]:
+    """
+    Find the top and bottom positions of each rep within a sample range.
+
+    Uses a zigzag (hysteresis) turning point detector on the smoothed
+    vertical position signal: a turning point is confirmed once the signal
+    has moved back by at least min_amplitude_fraction of its overall range,
+    and at least min_phase_seconds after the previous turning point. A
+    faster swing is jitter (a kip, a re-grip, a tracking glitch) rather
+    than half a rep; if it goes past the previous turning point, that
+    turning point moves instead.
+
+    Returns:
+        Sample positions of alternating extremes, in order
+    """
+    if end - start < 2:
+        return []
+
+    rate = _sample_rate(profile)
+    window = max(1, int(round(rate * 0.2)))
+    # The median drops single-sample tracking glitches that averaging
+    # would only spread out
+    position = smooth(median_filter(_fill_gaps(profile.position), 2 * window + 1), window)
+    segment = position[start:end + 1]
+
+    value_range = np.percentile(segment, 95) - np.percentile(segment, 5)
+    if value_range <= 1e-3:
+        return []
+    threshold = min_amplitude_fraction * value_range
+    min_gap = max(1, int(round(min_phase_seconds * rate)))
+
+    extremes = []
+    high = low = candidate = 0
+    direction = 0  # +1 while tracking a maximum, -1 while tracking a minimum
+    for i in range(1, len(segment)):
+        value = segment[i]
+        if direction == 0:
+            # Wait for the first move larger than the threshold; whichever
+            # extreme came first is where the movement started.
+            if value > segment[high]:
+                high = i
+            if value < segment[low]:
+                low = i
+            if segment[high] - segment[low] >= threshold:
+                if low < high:
+                    extremes.append(low)
+                    candidate, direction = high, 1
+                else:
+                    extremes.append(high)
+                    candidate, direction = low, -1
+        elif direction > 0:
+            if value >= segment[candidate]:
+                candidate = i
+            elif segment[candidate] - value >= threshold:
+                if candidate - extremes[-1] >= min_gap:
+                    extremes.append(candidate)
+                    candidate, direction = i, -1
+                elif value <= segment[extremes[-1]]:
+                    extremes[-1] = candidate = i
+        else:
+            if value <= segment[candidate]:
+                candidate = i
+            elif value - segment[candidate] >= threshold:
+                if candidate - extremes[-1] >= min_gap:
+                    extremes.append(candidate)
+                    candidate, direction = i, 1
+                elif value >= segment[extremes[-1]]:
+                    extremes[-1] = candidate = i
+
+    if direction != 0 and candidate - extremes[-1] >= min_gap:
+        extremes.append(candidate)
+
+    centered = []
+    for e in extremes:
+        index = min(end, max(start, _center_in_pause(profile.position, start + e, window)))
+        if not centered or index > centered[-1]:
+            centered.append(index)
+    return centered
+
+
+def _evenly_pick(values: List[int], count: int) -> List[int]:
+    """Pick count items spread evenly across values."""
+    if count >= len(values):
+        return list(values)
+    if count <= 0:
+        return []
+    picks = np.linspace(0, len(values) - 1, count).round().astype(int)
+    return [values[i] for i in picks]
+
+
+def select_motion_keyframes(profile: MotionProfile, num_frames: int) -> List[int]:
+    """
+    Choose source frame indices that cover the decisive moments of each rep.
+
+    Budget is spent in this order:
+    1. Top and bottom of every rep
+    2. Start and end of the active range (setup and final lockout)
+    3. Neighbours of each extreme, to tolerate sampling granularity
+    4. Evenly spaced frames across the active range
+
+    Returns:
+        Sorted list of unique source frame indices, at most num_frames long
+    """
+    n = profile.sample_count
+    if n == 0 or num_frames <= 0:
+        return []
+
+    start, end = find_active_range(profile)
+    extremes = find_rep_extremes(profile, start, end)
+
+    if len(extremes) >= num_frames:
+        chosen = _evenly_pick(extremes, num_frames)
+    else:
+        chosen = list(extremes)
+        selected = set(chosen)
+
+        def add(sample: int) -> None:
+            if len(chosen) < num_frames and start <= sample <= end and sample not in selected:
+                chosen.append(sample)
+                selected.add(sample)
+
+        add(start)
+        add(end)
+        for offset in (1, -1, 2, -2):
+            for extreme in extremes:
+                add(extreme + offset)
+        for sample in np.linspace(start, end, num_frames).round().astype(int):
+            add(int(sample))
+        # Short ranges can leave budget unspent after rounding collisions
+        for sample in range(start, end + 1):
+            add(sample)
+
+    indices = profile.frame_indices[sorted(chosen)]
+    return sorted(set(int(i) for i in indices))
+
+
+@dataclass
+class RepSegment:
+    """Source frame range covering one repetition."""
+    rep_number: int
+    start_frame: int
+    turn_frame: int  # Top or bottom of the rep, whichever is reached mid-rep
+    end_frame: int
+    complete: bool  # False for a final rep that never returned to the start position
+
+    def frame_indices(self, num_frames: int) -> List[int]:
+        """Evenly spaced frames across the rep, always including the turning point."""
+        span = np.linspace(self.start_frame, self.end_frame, max(num_frames, 2)).round().astype(int)
+        indices = set(int(i) for i in span)
+        if self.turn_frame not in indices:
+            # Replace the sample nearest to the turning point
+            nearest = min(indices, key=lambda i: abs(i - self.turn_frame))
+            indices.discard(nearest)
+            indices.add(self.turn_frame)
+        return sorted(indices)
+
+
+def segment_reps(
+    profile: MotionProfile,
+    padding_fraction: float = 0.15,
+    min_amplitude_fraction: float = 0.4,
+    min_phase_seconds: float = 0.4
+) -> List[RepSegment]:
+    """
+    Split the active part of a video into one segment per repetition.
+
+    Extremes alternate between the start position and the turning point of
+    each rep, so a rep spans extremes i -> i+1 -> i+2. A trailing half rep
+    (e.g. a failed lockout) becomes its own, incomplete segment. Segments
+    are padded by a fraction of their length so the start and finish
+    positions are fully visible.
+
+    Returns:
+        Segments in order; empty if no reps could be detected
+    """
+    start, end = find_active_range(profile)
+    extremes = find_rep_extremes(profile, start, end, min_amplitude_fraction, min_phase_seconds)
+    if len(extremes) < 2:
+        return []
+
+    frames = profile.frame_indices
+    last_frame = max(profile.total_frames - 1, int(frames[-1]))
+    segments = []
+    for i in range(0, len(extremes) - 1, 2):
+        complete = i + 2 < len(extremes)
+        first = int(frames[extremes[i]])
+        turn = int(frames[extremes[i + 1]])
+        last = int(frames[extremes[i + 2]]) if complete else int(frames[end])
+        pad = int(round((last - first) * padding_fraction))
+        segments.append(RepSegment(
+            rep_number=len(segments) + 1,
+            start_frame=max(0, first - pad),
+            turn_frame=turn,
+            end_frame=min(last_frame, last + pad),
+            complete=complete,
+        ))
+    return segments
+
+
+def find_motion_roi(
+    profile: MotionProfile,
+    padding_fraction: float = 0.15,
+    min_size_fraction: float = 0.35,
+    diff_threshold: float = 20.0,
+    min_active_fraction: float = 0.02
+) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Find the region of the frame where the attempt happens.
+
+    Takes the union of per-sample motion bounding boxes over the active
+    range, ignoring pixels that changed in only a sample or two (sensor
+    noise, a passer-by), then pads the box so the bar and the athlete's
+    extremities at the turning points stay in frame.
+
+    Returns:
+        (x0, y0, x1, y1) as fractions of the frame size, or None when no
+        useful region was found (e.g. no motion, or motion everywhere)
+    """
+    n = profile.sample_count
+    if n < 3:
+        return None
+
+    start, end = find_active_range(profile)
+    stack = profile.thumbnails[start:end + 1].astype(np.float32)
+    if len(stack) < 2:
+        return None
+
+    moving = np.abs(np.diff(stack, axis=0)) > diff_threshold
+    counts = moving.sum(axis=0)
+    mask = counts >= max(2, int(min_active_fraction * len(moving)))
+    if not mask.any():
+        return None
+
+    height, width = mask.shape
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    y0, y1 = rows[0] / height, (rows[-1] + 1) / height
+    x0, x1 = cols[0] / width, (cols[-1] + 1) / width
+
+    def expand(lo: float, hi: float) -> Tuple[float, float]:
+        size = hi - lo
+        pad = padding_fraction * size
+        lo, hi = lo - pad, hi + pad
+        # Keep a minimum size, centred on the motion
+        if hi - lo < min_size_fraction:
+            centre = (lo + hi) / 2
+            lo, hi = centre - min_size_fraction / 2, centre + min_size_fraction / 2
+        # Shift back inside the frame before clipping
+        if lo < 0:
+            lo, hi = 0.0, hi - lo
+        if hi > 1:
+            lo, hi = lo - (hi - 1), 1.0
+        return max(0.0, lo), min(1.0, hi)
+
+    x0, x1 = expand(x0, x1)
+    y0, y1 = expand(y0, y1)
+    # Cropping away less than ~10% of the frame is not worth it
+    if (x1 - x0) * (y1 - y0) > 0.9:
+        return None
+    return float(x0), float(y0), float(x1), float(y1)
+
+
+def dhash(thumbnails: np.ndarray, hash_size: int = 8) -> np.ndarray:
+    """
+    Difference hashes of a stack of grayscale thumbnails.
+
+    Each thumbnail is area-averaged down to (hash_size, hash_size + 1)
+    cells; bit (r, c) is set when cell (r, c + 1) is brighter than cell
+    (r, c). The whole stack is hashed at once.
+
+    Args:
+        thumbnails: Array of shape (samples, height, width), uint8
+
+    Returns:
+        Boolean array of shape (samples, hash_size * hash_size)
+    """
+    stack = thumbnails.astype(np.float32)
+    samples, height, width = stack.shape
+    rows, columns = hash_size, hash_size + 1
+    if height < rows or width < columns:
+        raise ValueError(f"Thumbnails of {width}x{height} are too small for a {hash_size}-bit dHash")
+
+    row_edges = np.linspace(0, height, rows + 1).astype(int)
+    column_edges = np.linspace(0, width, columns + 1).astype(int)
+    cells = np.add.reduceat(np.add.reduceat(stack, row_edges[:-1], axis=1), column_edges[:-1], axis=2)
+    cells /= np.outer(np.diff(row_edges), np.diff(column_edges))
+
+    return (cells[:, :, 1:] > cells[:, :, :-1]).reshape(samples, -1)
+
+
+def hamming(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Hamming distance between hashes, broadcasting over leading axes."""
+    return np.count_nonzero(a != b, axis=-1)
+
+
+def dedupe_keyframes(
+    profile: MotionProfile,
+    frame_indices: List[int],
+    num_frames: int,
+    max_distance: int = 3
+) -> Tuple[List[int], int, int]:
+    """
+    Drop near-duplicate frames and re-spend the freed slots on motion.
+
+    Static phases (dead hang, setup under the bar) yield runs of nearly
+    identical frames. A frame is dropped when its thumbnail's dHash is
+    within max_distance bits of the previous kept frame. Thumbnails are
+    hashed within the motion ROI, so a small athlete against a large static
+    background still changes the hash. Freed slots go to the highest-motion
+    samples that differ from their kept neighbours.
+
+    Args:
+        profile: Motion profile of the video
+        frame_indices: Source frame indices chosen by the selection strategy
+        num_frames: Frame budget to refill up to
+        max_distance: Largest Hamming distance (of 64 bits) still counted
+            as a duplicate
+
+    Returns:
+        (sorted source frame indices, frames dropped, frames added)
+    """
+    if profile.sample_count == 0 or not frame_indices:
+        return sorted(frame_indices), 0, 0
+
+    thumbnails = profile.thumbnails
+    roi = find_motion_roi(profile)
+    if roi is not None:
+        _, height, width = thumbnails.shape
+        x0, y0, x1, y1 = roi
+        cropped = thumbnails[:, int(y0 * height):int(round(y1 * height)), int(x0 * width):int(round(x1 * width))]
+        if cropped.shape[1] >= 8 and cropped.shape[2] >= 9:
+            thumbnails = cropped
+    hashes = dhash(thumbnails)
+    sample_indices = profile.frame_indices
+
+    def nearest_sample(frame_index: int) -> int:
+        position = int(np.searchsorted(sample_indices, frame_index))
+        if position == 0:
+            return 0
+        if position >= len(sample_indices):
+            return len(sample_indices) - 1
+        before, after = sample_indices[position - 1], sample_indices[position]
+        return position if after - frame_index < frame_index - before else position - 1
+
+    kept = []  # (frame index, sample)
+    for frame_index in sorted(set(frame_indices)):
+        sample = nearest_sample(frame_index)
+        if kept and hamming(hashes[sample], hashes[kept[-1][1]]) <= max_distance:
+            continue
+        kept.append((frame_index, sample))
+    dropped = len(set(frame_indices)) - len(kept)
+
+    added = 0
+    if dropped:
+        start, end = find_active_range(profile)
+        energy = smooth(profile.energy, 3)
+        kept_frames = {frame_index for frame_index, _ in kept}
+        for sample in np.argsort(-energy[start:end + 1], kind="stable") + start:
+            if len(kept) >= num_frames or energy[sample] <= 0:
+                break
+            frame_index = int(sample_indices[sample])
+            if frame_index in kept_frames:
+                continue
+            # Compare against the kept frames just before and after it
+            position = int(np.searchsorted([k[0] for k in kept], frame_index))
+            neighbours = [kept[i][1] for i in (position - 1, position) if 0 <= i < len(kept)]
+            if neighbours and hamming(hashes[neighbours], hashes[sample]).min() <= max_distance:
+                continue
+            kept.insert(position, (frame_index, int(sample)))
+            kept_frames.add(frame_index)
+            added += 1
+
+    return [frame_index for frame_index, _ in kept], dropped, added
+
+
+@dataclass
+class AngleAlignment:
+    """How a second camera angle lines up with the reference video in time."""
+    offset_seconds: float  # An instant at t in the reference is at t + offset in the other video
+    correlation: float  # Peak correlation of the two motion energy signals
+    aligned: bool  # False when the correlation was too weak and offset 0 is assumed
+    start_seconds: float  # Part of the reference timeline to sample: covered by
+    end_seconds: float  # both videos and trimmed to the active range
+
+    def to_dict(self) -> dict:
+        return {
+            "offset_ms": round(self.offset_seconds * 1000, 1),
+            "correlation": round(self.correlation, 3),
+            "aligned": self.aligned,
+            "window_ms": [round(self.start_seconds * 1000, 1), round(self.end_seconds * 1000, 1)],
+        }
+
+
+def _duration(profile: MotionProfile) -> float:
+    if profile.fps <= 0:
+        return 0.0
+    return max(profile.total_frames, int(profile.frame_indices[-1]) + 1 if profile.sample_count else 0) / profile.fps
+
+
+def _energy_on_grid(profile: MotionProfile, rate: float) -> np.ndarray:
+    """Smoothed motion energy resampled to `rate` samples per second from t = 0."""
+    if profile.sample_count < 2 or profile.fps <= 0:
+        return profile.energy.astype(np.float32)
+    times = profile.frame_indices / profile.fps
+    grid = np.arange(0.0, times[-1], 1.0 / rate)
+    energy = profile.energy.copy()
+    # The first sample has no predecessor to differ from
+    energy[0] = energy[1]
+    return smooth(np.interp(grid, times, energy), max(1, int(round(rate * 0.3))))
+
+
+def align_angles(
+    reference: MotionProfile,
+    other: MotionProfile,
+    max_offset_seconds: float = 10.0,
+    min_correlation: float = 0.3,
+    rate: float = 10.0
+) -> AngleAlignment:
+    """
+    Find the time offset between two videos of the same attempt.
+
+    Both cameras see the same movement, so their motion energy rises and
+    falls together even though the views differ. The offset is the lag
+    with the highest Pearson correlation between the two energy signals,
+    computed over their overlap; lags that overlap less than half of the
+    shorter signal are not considered. Below min_correlation the videos
+    are assumed to start together.
+
+    Returns:
+        AngleAlignment with the offset and the reference window to sample
+    """
+    a = _energy_on_grid(reference, rate)
+    b = _energy_on_grid(other, rate)
+    min_overlap = max(3, min(len(a), len(b)) // 2)
+    max_lag = int(round(max_offset_seconds * rate))
+
+    best_lag, best_correlation = 0, 0.0
+    for lag in range(-max_lag, max_lag + 1):
+        # a[n] is compared with b[n + lag]
+        first = max(0, -lag)
+        last = min(len(a), len(b) - lag)
+        if last - first < min_overlap:
+            continue
+        x = a[first:last]
+        y = b[first + lag:last + lag]
+        if x.std() <= 1e-6 or y.std() <= 1e-6:
+            continue
+        correlation = float(np.corrcoef(x, y)[0, 1])
+        if correlation > best_correlation or (correlation == best_correlation and abs(lag) < abs(best_lag)):
+            best_lag, best_correlation = lag, correlation
+
+    aligned = best_correlation >= min_correlation
+    offset = best_lag / rate if aligned else 0.0
+
+    # Reference instants the other video also covers, within the attempt
+    start = max(0.0, -offset)
+    end = min(_duration(reference), _duration(other) - offset)
+    if reference.sample_count and reference.fps > 0:
+        active_start, active_end = find_active_range(reference)
+        active = (
+            reference.frame_indices[active_start] / reference.fps,
+            reference.frame_indices[active_end] / reference.fps,
+        )
+        if min(end, active[1]) > max(start, active[0]):
+            start, end = max(start, active[0]), min(end, active[1])
+    if end <= start:
+        start, end = 0.0, _duration(reference)
+
+    return AngleAlignment(
+        offset_seconds=offset,
+        correlation=best_correlation,
+        aligned=aligned,
+        start_seconds=float(start),
+        end_seconds=float(end),
+    )
+
+
+def paired_frame_indices(
+    alignment: AngleAlignment,
+    reference: MotionProfile,
+    other: MotionProfile,
+    num_frames: int,
+    reference_indices: Optional[List[int]] = None
+) -> Tuple[List[int], List[int]]:
+    """
+    Frame indices of both videos that show the same instants.
+
+    Args:
+        alignment: Result of align_angles
+        reference: Motion profile of the reference video
+        other: Motion profile of the other video
+        num_frames: Pairs to return when reference_indices is not given;
+            they are spread evenly over the alignment window
+        reference_indices: Reference frames chosen by another strategy;
+            those outside the window are dropped
+
+    Returns:
+        (reference indices, other indices), ascending and of equal length
+    """
+    fps = reference.fps if reference.fps > 0 else 1.0
+    other_fps = other.fps if other.fps > 0 else fps
+    if reference_indices is None:
+        times = np.linspace(alignment.start_seconds, alignment.end_seconds, max(num_frames, 1), endpoint=False)
+        reference_indices = [int(round(t * fps)) for t in times]
+    else:
+        reference_indices = [
+            i for i in reference_indices
+            if alignment.start_seconds <= i / fps <= alignment.end_seconds
+        ]
+
+    last_reference = max(reference.total_frames - 1, 0)
+    last_other = max(other.total_frames - 1, 0)
+    pairs: List[Tuple[int, int]] = []
+    for index in sorted(reference_indices):
+        index = min(max(index, 0), last_reference)
+        other_index = int(round((index / fps + alignment.offset_seconds) * other_fps))
+        other_index = min(max(other_index, 0), last_other)
+        # Both sides strictly increase, so every frame is read once per pair
+        if pairs and (index <= pairs[-1][0] or other_index <= pairs[-1][1]):
+            continue
+        pairs.append((index, other_index))
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
@@ -0,0 +1,57 @@
+"""
+Progress tracking for queued video judgments.
+
+Workers record every stage transition of a job in the job table, which is
+the source of truth for the /events stream. When the worker runs in the
+API process it also publishes the transition on the in-process bus, so
+event streams wake up immediately instead of waiting for their next poll
+of the database.
+"""
+
+import asyncio
+from collections import defaultdict
+from typing import Any, Dict, Set
+
+
+class JobStage:
+    QUEUED = "queued"
+    EXTRACTING = "extracting"
+    CALLING_VLM = "calling_vlm"
+    # Streamed answers only: overall_judgment and confidence have arrived
+    # while the rest of the answer is still being generated
+    VERDICT = "verdict"
+    PARSING = "parsing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ProgressBus:
+    """In-process fan-out of job progress notifications."""
+
+    def __init__(self, max_pending: int = 100):
+        self.max_pending = max_pending
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, judgment_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.max_pending)
+        self._subscribers[judgment_id].add(queue)
+        return queue
+
+    def unsubscribe(self, judgment_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(judgment_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[judgment_id]
+
+    def publish(self, judgment_id: str, event: Dict[str, Any]):
+        """Notify subscribers of a job; slow subscribers drop notifications."""
+        for queue in self._subscribers.get(judgment_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                pass
+
+
+progress_bus = ProgressBus()
@@ -5,6 +5,11 @@ These prompts are carefully crafted to guide the VLM in analyzing
 video frames according to international street lifting regulations.
 """
 
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+from .compact import compact_format, compact_schema
 from .regulations import (
     Discipline,
     PULL_UP_REGULATIONS,
@@ -39,29 +44,51 @@ is met from the available frames, note it as uncertain.
 Always respond in the specified JSON format."""
 
 
-def get_pull_up_prompt(camera_angle: str = "front", has_secondary_view: bool = False) -> str:
-    """Generate the analysis prompt for pull-up attempts."""
+@dataclass(frozen=True)
+class JudgePrompt:
+    """
+    A judging prompt split for prefix caching.
+    
+    The prefix (regulations, criteria, response format) depends only on
+    the discipline and is sent before the images; the suffix (camera
+    angle, view notes, per-request notes) follows them. Compact prompts
+    carry the JSON schema of their answer for guided decoding.
+    """
+    prefix: str
+    suffix: str
+    schema: Optional[Dict[str, Any]] = field(default=None, compare=False)
+    
+    @property
+    def text(self) -> str:
+        """The whole prompt, for backends that take a single text part."""
+        return f"{self.prefix}\n\n{self.suffix}"
     
-    secondary_view_note = ""
-    if has_secondary_view:
-        secondary_view_note = """
-NOTE: You have been provided with TWO camera angles:
+    def with_note(self, note: str) -> "JudgePrompt":
+        """Append a per-request note to the suffix."""
+        return replace(self, suffix=self.suffix + note)
+
+
+def _view_suffix(camera_angle: str, note: str = "") -> str:
+    return f"""{note}CAMERA ANGLE: {camera_angle.upper()} VIEW
+
+Analyze the frames now and provide your judgment:"""
+
+
+_PULL_UP_SECONDARY_VIEW_NOTE = """NOTE: You have been provided with TWO camera angles:
 - FRONT VIEW: Primary view facing the athlete
 - SIDE VIEW (parallel to bar): Secondary view to confirm bar clearance
 
 Use the side view to definitively determine if the chin clears the bar when 
 the front view is ambiguous.
+
 """
-    
-    return f"""STREET LIFTING PULL-UP ANALYSIS
 
-{PULL_UP_REGULATIONS}
 
-{secondary_view_note}
+_PULL_UP_CHECKLIST = f"""STREET LIFTING PULL-UP ANALYSIS
 
-CAMERA ANGLE: {camera_angle.upper()} VIEW
+{PULL_UP_REGULATIONS}
 
-Analyze the provided video frames and evaluate the pull-up attempt(s).
+Analyze the video frames that follow and evaluate the pull-up attempt(s).
 
 For EACH repetition visible in the frames, evaluate:
 
@@ -77,11 +104,11 @@ For EACH repetition visible in the frames, evaluate:
 3. MOVEMENT QUALITY:
    - Is the movement controlled (no excessive kipping)?
    - Is the descent controlled?
-   - Does the athlete return to full arm extension?
+   - Does the athlete return to full arm extension?"""
 
-Respond with the following JSON structure:
+_PULL_UP_FORMAT = """Respond with the following JSON structure:
 ```json
-{{
+{
     "discipline": "pull_up",
     "total_reps_attempted": <number>,
     "valid_reps": <number>,
@@ -89,48 +116,41 @@ Respond with the following JSON structure:
     "overall_judgment": "VALID" | "INVALID" | "NEEDS_REVIEW",
     "confidence": <0.0-1.0>,
     "rep_analysis": [
-        {{
+        {
             "rep_number": 1,
             "is_valid": true | false,
             "confidence": <0.0-1.0>,
-            "criteria_met": {{
+            "criteria_met": {
                 "full_arm_extension_bottom": true | false | "uncertain",
                 "chin_above_bar": true | false | "uncertain",
                 "controlled_movement": true | false | "uncertain",
                 "no_excessive_kipping": true | false | "uncertain",
                 "full_lockout_return": true | false | "uncertain"
-            }},
+            },
             "invalid_reasons": ["reason1", "reason2"],
             "notes": "Any additional observations"
-        }}
+        }
     ],
-    "frame_observations": {{
+    "frame_observations": {
         "frame_quality": "good" | "fair" | "poor",
         "visibility_issues": ["list any issues"],
         "key_frames": [
-            {{
+            {
                 "frame_description": "bottom position",
                 "observation": "what you see"
-            }}
+            }
         ]
-    }},
+    },
     "recommendations": "Suggestions for the athlete or for video quality improvement"
-}}
-```
+}
+```"""
 
-Analyze the frames now and provide your judgment:"""
 
-
-def get_dip_prompt(camera_angle: str = "side") -> str:
-    """Generate the analysis prompt for dip attempts."""
-    
-    return f"""STREET LIFTING DIP ANALYSIS
+_DIP_CHECKLIST = f"""STREET LIFTING DIP ANALYSIS
 
 {DIP_REGULATIONS}
 
-CAMERA ANGLE: {camera_angle.upper()} VIEW
-
-Analyze the provided video frames and evaluate the dip attempt(s).
+Analyze the video frames that follow and evaluate the dip attempt(s).
 
 For EACH repetition visible in the frames, evaluate:
 
@@ -151,11 +171,11 @@ For EACH repetition visible in the frames, evaluate:
 
 CRITICAL: The depth requirement is the most common point of failure.
 Upper arms MUST be parallel to the ground or lower. The shoulder
-crease MUST be at or below the top of the elbow.
+crease MUST be at or below the top of the elbow."""
 
-Respond with the following JSON structure:
+_DIP_FORMAT = """Respond with the following JSON structure:
 ```json
-{{
+{
     "discipline": "dip",
     "total_reps_attempted": <number>,
     "valid_reps": <number>,
@@ -163,52 +183,45 @@ Respond with the following JSON structure:
     "overall_judgment": "VALID" | "INVALID" | "NEEDS_REVIEW",
     "confidence": <0.0-1.0>,
     "rep_analysis": [
-        {{
+        {
             "rep_number": 1,
             "is_valid": true | false,
             "confidence": <0.0-1.0>,
-            "criteria_met": {{
+            "criteria_met": {
                 "full_arm_extension_top": true | false | "uncertain",
                 "upper_arms_parallel_or_below": true | false | "uncertain",
                 "shoulder_below_elbow": true | false | "uncertain",
                 "controlled_movement": true | false | "uncertain",
                 "no_excessive_swing": true | false | "uncertain"
-            }},
+            },
             "invalid_reasons": ["reason1", "reason2"],
-            "depth_assessment": {{
+            "depth_assessment": {
                 "estimated_upper_arm_angle": "<angle or description>",
                 "depth_achieved": "above_parallel" | "at_parallel" | "below_parallel"
-            }},
+            },
             "notes": "Any additional observations"
-        }}
+        }
     ],
-    "frame_observations": {{
+    "frame_observations": {
         "frame_quality": "good" | "fair" | "poor",
         "visibility_issues": ["list any issues"],
         "key_frames": [
-            {{
+            {
                 "frame_description": "bottom position",
                 "observation": "what you see"
-            }}
+            }
         ]
-    }},
+    },
     "recommendations": "Suggestions for the athlete or for video quality improvement"
-}}
-```
-
-Analyze the frames now and provide your judgment:"""
+}
+```"""
 
 
-def get_squat_prompt(camera_angle: str = "side") -> str:
-    """Generate the analysis prompt for squat attempts."""
-    
-    return f"""STREET LIFTING SQUAT ANALYSIS
+_SQUAT_CHECKLIST = f"""STREET LIFTING SQUAT ANALYSIS
 
 {SQUAT_REGULATIONS}
 
-CAMERA ANGLE: {camera_angle.upper()} VIEW
-
-Analyze the provided video frames and evaluate the squat attempt(s).
+Analyze the video frames that follow and evaluate the squat attempt(s).
 
 For EACH repetition visible in the frames, evaluate:
 
@@ -230,11 +243,11 @@ For EACH repetition visible in the frames, evaluate:
 
 CRITICAL: The depth requirement is strictly enforced.
 The HIP CREASE must go BELOW the top of the knee.
-This is commonly called "breaking parallel."
+This is commonly called "breaking parallel.\""""
 
-Respond with the following JSON structure:
+_SQUAT_FORMAT = """Respond with the following JSON structure:
 ```json
-{{
+{
     "discipline": "squat",
     "total_reps_attempted": <number>,
     "valid_reps": <number>,
@@ -242,41 +255,96 @@ Respond with the following JSON structure:
     "overall_judgment": "VALID" | "INVALID" | "NEEDS_REVIEW",
     "confidence": <0.0-1.0>,
     "rep_analysis": [
-        {{
+        {
             "rep_number": 1,
             "is_valid": true | false,
             "confidence": <0.0-1.0>,
-            "criteria_met": {{
+            "criteria_met": {
                 "full_hip_knee_extension_top": true | false | "uncertain",
                 "hip_crease_below_knee": true | false | "uncertain",
                 "controlled_movement": true | false | "uncertain",
                 "stable_bar_position": true | false | "uncertain",
                 "full_lockout_top": true | false | "uncertain"
-            }},
+            },
             "invalid_reasons": ["reason1", "reason2"],
-            "depth_assessment": {{
+            "depth_assessment": {
                 "hip_crease_position": "above_knee" | "at_knee" | "below_knee",
                 "estimated_thigh_angle": "<angle or description>",
                 "parallel_achieved": true | false | "uncertain"
-            }},
+            },
             "notes": "Any additional observations"
-        }}
+        }
     ],
-    "frame_observations": {{
+    "frame_observations": {
         "frame_quality": "good" | "fair" | "poor",
         "visibility_issues": ["list any issues"],
         "key_frames": [
-            {{
+            {
                 "frame_description": "bottom position",
                 "observation": "what you see"
-            }}
+            }
         ]
-    }},
+    },
     "recommendations": "Suggestions for the athlete or for video quality improvement"
-}}
-```
+}
+```"""
 
-Analyze the frames now and provide your judgment:"""
+
+# Checklist and verbose response format per discipline
+_PREFIXES = {
+    Discipline.PULL_UP: (_PULL_UP_CHECKLIST, _PULL_UP_FORMAT),
+    Discipline.DIP: (_DIP_CHECKLIST, _DIP_FORMAT),
+    Discipline.SQUAT: (_SQUAT_CHECKLIST, _SQUAT_FORMAT),
+}
+
+# Angles the API accepts; prompts for these are built once at import
+CAMERA_ANGLES = ("front", "side", "parallel")
+
+
+def get_pull_up_prompt(camera_angle: str = "front", has_secondary_view: bool = False) -> str:
+    """Generate the analysis prompt for pull-up attempts."""
+    return get_prompt_parts(Discipline.PULL_UP, camera_angle, has_secondary_view).text
+
+
+def get_dip_prompt(camera_angle: str = "side") -> str:
+    """Generate the analysis prompt for dip attempts."""
+    return get_prompt_parts(Discipline.DIP, camera_angle).text
+
+
+def get_squat_prompt(camera_angle: str = "side") -> str:
+    """Generate the analysis prompt for squat attempts."""
+    return get_prompt_parts(Discipline.SQUAT, camera_angle).text
+
+
+@lru_cache(maxsize=None)
+def get_prompt_parts(
+    discipline: Discipline,
+    camera_angle: str = "front",
+    has_secondary_view: bool = False,
+    compact: bool = False
+) -> JudgePrompt:
+    """
+    Get the prompt for a discipline, split into cacheable prefix and suffix.
+    
+    With compact, the answer is requested in the short-key format of
+    compact.py and the prompt carries its schema.
+    """
+    if discipline not in _PREFIXES:
+        raise ValueError(f"Unknown discipline: {discipline}")
+    
+    note = ""
+    if discipline == Discipline.PULL_UP and has_secondary_view:
+        note = _PULL_UP_SECONDARY_VIEW_NOTE
+    checklist, response_format = _PREFIXES[discipline]
+    schema = None
+    if compact:
+        response_format = compact_format(discipline)
+        schema = compact_schema(discipline)
+    return JudgePrompt(
+        f"{checklist}\n\n{response_format}",
+        _view_suffix(camera_angle, note),
+        schema
+    )
 
 
 def get_prompt_for_discipline(
@@ -285,31 +353,27 @@ def get_prompt_for_discipline(
     has_secondary_view: bool = False
 ) -> str:
     """Get the appropriate prompt for a discipline."""
-    
-    if discipline == Discipline.PULL_UP:
-        return get_pull_up_prompt(camera_angle, has_secondary_view)
-    elif discipline == Discipline.DIP:
-        return get_dip_prompt(camera_angle)
-    elif discipline == Discipline.SQUAT:
-        return get_squat_prompt(camera_angle)
-    else:
-        raise ValueError(f"Unknown discipline: {discipline}")
+    return get_prompt_parts(discipline, camera_angle, has_secondary_view).text
 
 
-def get_multi_angle_prompt(discipline: Discipline, angles: list) -> str:
+@lru_cache(maxsize=None)
+def get_multi_angle_prompt_parts(
+    discipline: Discipline,
+    angles: Tuple[str, ...],
+    compact: bool = False
+) -> JudgePrompt:
     """
-    Generate a prompt for analyzing multiple camera angles simultaneously.
-    Useful when front view is insufficient for pull-ups.
+    Prompt for analyzing multiple camera angles simultaneously, split into
+    prefix and suffix. The prefix is shared with single-angle prompts.
     """
-    
     angles_description = ", ".join(angles)
-    
-    return f"""MULTI-ANGLE VIDEO ANALYSIS
+    note = f"""MULTI-ANGLE VIDEO ANALYSIS
 
 You are provided with video frames from MULTIPLE camera angles: {angles_description}
 
-The frames are interleaved from different cameras. Use information from ALL angles
-to make a comprehensive judgment.
+The frames alternate between the cameras in time-aligned pairs: each {angles[0]}
+frame is followed by the {angles[-1]} frame of the same instant. Use information
+from ALL angles to make a comprehensive judgment.
 
 For PULL-UPS specifically:
 - Use the FRONT view to assess body position and stability
@@ -317,6 +381,68 @@ For PULL-UPS specifically:
 
 Cross-reference observations between angles to increase judgment confidence.
 
-{get_prompt_for_discipline(discipline, "multiple")}
 """
+    single = get_prompt_parts(discipline, "multiple", compact=compact)
+    return JudgePrompt(single.prefix, _view_suffix("multiple", note), single.schema)
+
+
+def get_multi_angle_prompt(discipline: Discipline, angles: list) -> str:
+    """
+    Generate a prompt for analyzing multiple camera angles simultaneously.
+    Useful when front view is insufficient for pull-ups.
+    """
+    return get_multi_angle_prompt_parts(discipline, tuple(angles)).text
+
 
+# Build the prompts for every known combination up front; requests only
+# look them up
+for _discipline in _PREFIXES:
+    for _angle in CAMERA_ANGLES:
+        for _compact in (False, True):
+            get_prompt_parts(_discipline, _angle, compact=_compact)
+            get_prompt_parts(_discipline, _angle, True, compact=_compact)
+            get_multi_angle_prompt_parts(_discipline, (_angle, "parallel"), compact=_compact)
+
+
+
+def get_single_rep_note(rep_number: int, total_reps: int, complete: bool = True) -> str:
+    """Prompt addendum when the frames cover only one repetition of a set."""
+    ending = "back to the start position" if complete else "to the end of the attempt (the rep may be unfinished)"
+    return f"""
+
+SINGLE REPETITION: These frames cover only repetition {rep_number} of {total_reps}
+detected in this set, sampled densely from its start position through the
+turning point and {ending}. Judge only this repetition: report
+total_reps_attempted as 1 and exactly one entry in rep_analysis with
+rep_number {rep_number}."""
+
+
+def get_mosaic_note(columns: int, rows: int, images: list) -> str:
+    """
+    Prompt addendum describing a frame mosaic layout.
+
+    Args:
+        columns: Tiles per row in each mosaic image
+        rows: Maximum rows per mosaic image
+        images: For each mosaic image, the frames tiled into it, in order
+    """
+    lines = []
+    tile = 0
+    for image_number, frames in enumerate(images, start=1):
+        first = tile + 1
+        tile += len(frames)
+        span = f"T{first}" if first == tile else f"T{first}-T{tile}"
+        lines.append(
+            f"- Image {image_number}: tiles {span}, "
+            f"{frames[0].timestamp_ms / 1000:.2f}s to {frames[-1].timestamp_ms / 1000:.2f}s"
+        )
+    layout = "\n".join(lines)
+    return f"""
+
+FRAME MOSAIC: The video frames are packed into grid images of up to {columns}x{rows}
+tiles. Read tiles left to right, then top to bottom; tile order continues
+across images and is chronological. Each tile is labeled with its tile number
+(T1, T2, ...), source frame number (f...) and timestamp in seconds:
+{layout}
+Refer to frames by tile number in key_frames and notes, and judge each tile
+as a separate moment in time, not as separate athletes."""
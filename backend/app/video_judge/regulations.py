@@ -256,6 +256,27 @@ SQUAT_INVALID_REASONS = [
 ]
 
 
+# ============================================================================
+# CAMERA ANGLES
+# ============================================================================
+
+# Criteria that only some camera angles show reliably. When angles are
+# judged separately, these views decide the criterion; the others are
+# overruled on it.
+CRITERIA_VIEWS = {
+    Discipline.PULL_UP: {
+        "chin_above_bar": ("parallel", "side"),
+    },
+    Discipline.DIP: {
+        "upper_arms_parallel_or_below": ("side", "parallel"),
+        "shoulder_below_elbow": ("side", "parallel"),
+    },
+    Discipline.SQUAT: {
+        "hip_crease_below_knee": ("side", "parallel"),
+    },
+}
+
+
 # ============================================================================
 # COMBINED REFERENCE
 # ============================================================================
@@ -0,0 +1,326 @@
+"""
+Record/replay VLM backend.
+
+Wraps a real client. In record mode every answer is stored under a
+fingerprint of the request (hashes of the frames, prompts and response
+schema, plus the wrapped model); in replay mode answers are served from
+the store, optionally after the latency they were recorded with. "auto"
+replays what is recorded and records the rest.
+
+This gives deterministic load tests of StreetLiftingJudge without
+network access, and offline re-judging: re-run the current parser and
+scoring over every recorded answer.
+
+    VLM_BACKEND=record_replay VLM_REPLAY_BACKEND=openai_gpt4o \
+        VLM_REPLAY_MODE=record VLM_REPLAY_DIR=/data/vlm_recordings ...
+
+    python -m app.video_judge.replay rejudge /data/vlm_recordings
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Union
+
+from .cache import hash_text, make_cache_key
+from .regulations import Discipline
+from .vlm_service import FrameData, TokenUsage, VLMClient, VLMResponse
+
+
+logger = logging.getLogger(__name__)
+
+REPLAY_MODES = ("record", "replay", "auto")
+
+
+class ReplayMiss(LookupError):
+    """No recording matches a request in replay mode."""
+
+
+def request_fingerprint(
+    model_name: str,
+    frames: List[FrameData],
+    prompt: str,
+    system_prompt: Optional[str] = None,
+    prompt_prefix: Optional[str] = None,
+    response_schema: Optional[Dict[str, Any]] = None
+) -> str:
+    """Fingerprint of a VLM request: model, frame content, prompts and schema."""
+    return make_cache_key(
+        model=model_name,
+        frames=[hash_text(frame.mime_type + frame.image_base64) for frame in frames],
+        prompt=hash_text(prompt),
+        system_prompt=hash_text(system_prompt or ""),
+        prompt_prefix=hash_text(prompt_prefix or ""),
+        response_schema=hash_text(json.dumps(response_schema, sort_keys=True)) if response_schema else None
+    )
+
+
+class ReplayStore:
+    """
+    Recordings as JSON files under a directory, one per fingerprint.
+
+    Files are written atomically, so several workers can record into the
+    same directory.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _path(self, fingerprint: str) -> str:
+        return os.path.join(self.directory, fingerprint[:2], f"{fingerprint}.json")
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(fingerprint), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable recording {fingerprint}: {e}")
+            return None
+
+    def put(self, fingerprint: str, record: Dict[str, Any]):
+        path = self._path(fingerprint)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a temp file and rename so readers never see partial JSON
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(record, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write recording {path}: {e}")
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Every readable recording, in no particular order."""
+        if not os.path.isdir(self.directory):
+            return
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    record = self.get(name[:-len(".json")])
+                    if record is not None:
+                        yield record
+
+
+class RecordReplayClient(VLMClient):
+    """
+    VLM client that records the answers of a wrapped client, or replays them.
+
+    Args:
+        client: The real client; only called in record and auto mode
+        store: Where recordings are kept
+        mode: "record", "replay" or "auto" (replay hits, record misses)
+        latency_scale: Replayed answers wait this multiple of their
+            recorded latency (0 answers immediately)
+    """
+
+    def __init__(
+        self,
+        client: VLMClient,
+        store: ReplayStore,
+        mode: str = "replay",
+        latency_scale: float = 0.0
+    ):
+        if mode not in REPLAY_MODES:
+            raise ValueError(
+                f"Unknown replay mode: {mode}. "
+                f"Must be one of: {', '.join(REPLAY_MODES)}"
+            )
+        self.client = client
+        self.store = store
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.image_detail = getattr(client, "image_detail", "high")
+        self._lock = threading.Lock()
+        self._counters = {"replayed": 0, "recorded": 0, "misses": 0}
+
+    @property
+    def model_name(self) -> str:
+        return self.client.model_name
+
+    async def analyze_frames(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None
+    ) -> str:
+        return (await self.complete(frames, prompt, system_prompt)).text
+
+    async def complete(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> VLMResponse:
+        fingerprint = request_fingerprint(
+            self.model_name, frames, prompt, system_prompt, prompt_prefix, response_schema
+        )
+        replayed = await self._replay(fingerprint)
+        if replayed is not None:
+            return replayed
+
+        started = time.perf_counter()
+        response = await self.client.complete(frames, prompt, system_prompt, prompt_prefix, response_schema)
+        self._record(fingerprint, frames, prompt_prefix, response.text, response.usage, time.perf_counter() - started)
+        return response
+
+    async def stream(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[str, TokenUsage]]:
+        fingerprint = request_fingerprint(
+            self.model_name, frames, prompt, system_prompt, prompt_prefix, response_schema
+        )
+        replayed = await self._replay(fingerprint)
+        if replayed is not None:
+            yield replayed.text
+            if replayed.usage is not None:
+                yield replayed.usage
+            return
+
+        # Only answers streamed to the end are recorded; a stream closed
+        # early would replay as a truncated answer
+        started = time.perf_counter()
+        parts = []
+        usage = None
+        stream = self.client.stream(frames, prompt, system_prompt, prompt_prefix, response_schema)
+        try:
+            async for item in stream:
+                if isinstance(item, TokenUsage):
+                    usage = item
+                else:
+                    parts.append(item)
+                yield item
+        finally:
+            await stream.aclose()
+        self._record(fingerprint, frames, prompt_prefix, "".join(parts), usage, time.perf_counter() - started)
+
+    async def _replay(self, fingerprint: str) -> Optional[VLMResponse]:
+        """The recorded answer, None to call the real client; raises on a replay-mode miss."""
+        if self.mode == "record":
+            return None
+        record = self.store.get(fingerprint)
+        if record is None:
+            with self._lock:
+                self._counters["misses"] += 1
+            if self.mode == "replay":
+                raise ReplayMiss(f"No recording for request {fingerprint} ({self.model_name})")
+            return None
+
+        if self.latency_scale > 0:
+            await asyncio.sleep(record.get("latency_ms", 0) / 1000 * self.latency_scale)
+        with self._lock:
+            self._counters["replayed"] += 1
+        usage = record.get("usage")
+        return VLMResponse(record["text"], TokenUsage(**usage) if usage else None)
+
+    def _record(
+        self,
+        fingerprint: str,
+        frames: List[FrameData],
+        prompt_prefix: Optional[str],
+        text: str,
+        usage: Optional[TokenUsage],
+        latency: float
+    ):
+        self.store.put(fingerprint, {
+            "fingerprint": fingerprint,
+            "model": self.model_name,
+            "recorded_at": time.time(),
+            "latency_ms": round(latency * 1000, 1),
+            "frames": [frame.frame_number for frame in frames],
+            # Identifies the prompt (and discipline) when re-judging
+            "prompt_prefix_hash": hash_text(prompt_prefix or ""),
+            "prompt_title": (prompt_prefix or "").split("\n", 1)[0],
+            "text": text,
+            "usage": usage.__dict__ if usage is not None else None,
+        })
+        with self._lock:
+            self._counters["recorded"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, **self._counters}
+
+    async def close(self):
+        await self.client.close()
+
+
+def _discipline_of(record: Dict[str, Any]) -> Optional[Discipline]:
+    """The discipline a recorded answer judges, from its prompt prefix."""
+    from .prompts import get_prompt_parts
+
+    for discipline in Discipline:
+        for compact in (False, True):
+            if hash_text(get_prompt_parts(discipline, compact=compact).prefix) == record.get("prompt_prefix_hash"):
+                return discipline
+    # The prompt changed since recording; fall back to its title line
+    title = record.get("prompt_title", "").upper().replace("-", "_").replace(" ", "_")
+    for discipline in Discipline:
+        if discipline.value.upper() in title:
+            return discipline
+    return None
+
+
+def rejudge(store: ReplayStore, strict_mode: bool = True) -> Dict[str, Any]:
+    """
+    Parse and score every recorded answer with the current code.
+
+    Returns:
+        Verdict counts, parse failures, records without a known
+        discipline and the time taken
+    """
+    from .judge_service import JudgeConfig, StreetLiftingJudge
+
+    judge = StreetLiftingJudge(JudgeConfig(strict_mode=strict_mode, cache_enabled=False))
+    verdicts: Counter = Counter()
+    failures = []
+    unknown = 0
+    started = time.perf_counter()
+    for record in store:
+        discipline = _discipline_of(record)
+        if discipline is None:
+            unknown += 1
+            continue
+        result = judge._parse_vlm_response(record["text"], discipline, record.get("model", ""))
+        if "error" in result.frame_analysis:
+            failures.append(record["fingerprint"])
+        verdicts[f"{discipline.value}:{result.frame_analysis.get('overall_judgment', 'PARSE_FAILED')}"] += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        "records": sum(verdicts.values()) + unknown,
+        "verdicts": dict(sorted(verdicts.items())),
+        "parse_failures": failures,
+        "unknown_discipline": unknown,
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recorded VLM answers")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    rejudge_parser = subparsers.add_parser("rejudge", help="Parse and score every recording with the current code")
+    rejudge_parser.add_argument("directory", help="Recording directory (VLM_REPLAY_DIR)")
+    rejudge_parser.add_argument("--lenient", action="store_true", help="Count uncertain criteria as passed")
+    args = parser.parse_args()
+
+    report = rejudge(ReplayStore(args.directory), strict_mode=not args.lenient)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
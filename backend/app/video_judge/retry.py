@@ -0,0 +1,133 @@
+"""
+Retry and hedging helpers for VLM requests.
+
+Only the VLM call and response parsing are retried; extracted frames are
+reused across attempts. Retries back off exponentially with full jitter
+so concurrent judgments that hit the same rate limit don't retry in
+lockstep. Optionally, a second (hedged) request is sent when the first is
+slower than a chosen percentile of recent latencies, and whichever
+finishes first wins.
+"""
+
+import asyncio
+import random
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Tuple, TypeVar
+
+import httpx
+import numpy as np
+
+from .scheduler import SchedulerTimeout
+
+
+T = TypeVar("T")
+
+
+class ResponseParseError(Exception):
+    """The VLM answered, but not with a parseable judgment."""
+
+
+class RetriesExhausted(Exception):
+    """A transient VLM failure that outlasted every retry its policy allows."""
+
+
+# Failures that may not happen again: network trouble, an answer that
+# didn't parse, and no backend capacity within the queue timeout
+TRANSIENT_ERRORS = (httpx.TimeoutException, httpx.TransportError, ResponseParseError, SchedulerTimeout)
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Whether a failed VLM request or judgment is worth another attempt.
+
+    Only known transient failures are: TRANSIENT_ERRORS and 429/5xx
+    responses. Anything else (unreadable videos, invalid disciplines,
+    bugs) fails the same way every time, and RetriesExhausted has
+    already been retried as far as the VLM stage's policy allows.
+    """
+    if isinstance(error, TRANSIENT_ERRORS):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return False
+
+
+@dataclass
+class RetryPolicy:
+    """How the VLM stage is retried."""
+    max_retries: int = 2
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+
+    def delay(self, attempt: int) -> float:
+        """Full-jitter backoff before retry number `attempt` (1-based)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return random.uniform(0, ceiling)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """The server's Retry-After hint for a 429/503, if it sent one."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    value = error.response.headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LatencyTracker:
+    """Rolling window of request latencies."""
+
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        return float(np.percentile(np.array(self._samples), q))
+
+
+async def hedged(
+    call: Callable[[], Awaitable[T]],
+    hedge_after: Optional[float]
+) -> Tuple[T, bool]:
+    """
+    Run `call`, and start a second copy if the first hasn't finished
+    after `hedge_after` seconds.
+
+    The first successful result wins and the other request is cancelled.
+    If one copy fails, the other is still awaited.
+
+    Returns:
+        (result, whether the hedged copy produced it)
+    """
+    primary = asyncio.ensure_future(call())
+    tasks = [primary]
+    try:
+        if hedge_after is not None:
+            await asyncio.wait({primary}, timeout=hedge_after)
+            if not primary.done():
+                tasks.append(asyncio.ensure_future(call()))
+
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), task is not primary
+                error = error or task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
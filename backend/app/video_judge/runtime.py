@@ -0,0 +1,143 @@
+"""
+Process-wide runtime resources for the video judge.
+
+Frame extraction is CPU bound (OpenCV decode, resize, JPEG encode) and must
+not run on the asyncio event loop, otherwise every other request on the
+worker stalls while a video is decoded. This module owns:
+1. The shared executor that extraction jobs are offloaded to
+2. An event loop lag monitor that proves the loop stays responsive
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_KINDS = ("thread", "process", "inline")
+
+_extraction_executor: Optional[Executor] = None
+_extraction_executor_kind: Optional[str] = None
+
+
+def get_extraction_executor(kind: str = "thread", max_workers: Optional[int] = None) -> Optional[Executor]:
+    """
+    Get the shared executor for frame extraction, creating it on first use.
+
+    Args:
+        kind: "thread", "process" or "inline" (run on the event loop thread)
+        max_workers: Pool size, defaults to the number of CPUs
+
+    Returns:
+        The executor, or None for inline execution
+    """
+    global _extraction_executor, _extraction_executor_kind
+
+    if kind not in EXECUTOR_KINDS:
+        raise ValueError(
+            f"Unknown extraction executor: {kind}. "
+            f"Must be one of: {', '.join(EXECUTOR_KINDS)}"
+        )
+    if kind == "inline":
+        return None
+
+    if _extraction_executor is None:
+        workers = max_workers or os.cpu_count() or 2
+        if kind == "process":
+            _extraction_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            _extraction_executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="frame-extract"
+            )
+        _extraction_executor_kind = kind
+        logger.info(f"Started {kind} pool with {workers} workers for frame extraction")
+    elif kind != _extraction_executor_kind:
+        logger.warning(
+            f"Extraction executor already running as {_extraction_executor_kind}, "
+            f"ignoring request for {kind}"
+        )
+    return _extraction_executor
+
+
+def shutdown_extraction_executor():
+    """Shut down the shared extraction executor."""
+    global _extraction_executor, _extraction_executor_kind
+    if _extraction_executor is not None:
+        _extraction_executor.shutdown(wait=False, cancel_futures=True)
+        _extraction_executor = None
+        _extraction_executor_kind = None
+
+
+def extraction_executor_info() -> Dict[str, Any]:
+    """Describe the shared extraction executor."""
+    return {
+        "kind": _extraction_executor_kind or "not_started",
+        "max_workers": getattr(_extraction_executor, "_max_workers", None),
+    }
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed-interval sleep.
+
+    Any lag beyond a few milliseconds means something is blocking the loop,
+    such as synchronous video decoding inside a coroutine.
+    """
+
+    def __init__(self, interval: float = 0.1, window: int = 600):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+        self._max_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self._samples.append(lag)
+            self._max_lag = max(self._max_lag, lag)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Lag statistics in milliseconds over the recent window."""
+        running = self._task is not None and not self._task.done()
+        if not self._samples:
+            return {"running": running, "samples": 0}
+
+        recent = np.array(self._samples) * 1000
+        return {
+            "running": running,
+            "samples": len(recent),
+            "window_seconds": round(len(recent) * self.interval, 1),
+            "last_ms": round(float(recent[-1]), 2),
+            "p50_ms": round(float(np.percentile(recent, 50)), 2),
+            "p99_ms": round(float(np.percentile(recent, 99)), 2),
+            "max_ms": round(float(recent.max()), 2),
+            "max_since_start_ms": round(self._max_lag * 1000, 2),
+        }
+
+
+loop_lag_monitor = EventLoopLagMonitor()
@@ -0,0 +1,281 @@
+"""
+Request scheduler for VLM backends.
+
+Every call to a VLM backend goes through a per-backend scheduler that
+enforces:
+1. A maximum number of requests in flight (GPU saturation on vLLM)
+2. Token buckets for requests per minute and tokens per minute (cloud
+   rate limits)
+3. Strict priority lanes, so live competition attempts are dispatched
+   before post-event re-judging
+
+When capacity is exhausted, requests wait in the queue up to a deadline
+instead of being sent upstream and failing with 429s.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class Priority(IntEnum):
+    LIVE = 0  # Attempts judged during the competition
+    NORMAL = 1
+    REJUDGE = 2  # Post-event re-judging and backfills
+
+    @classmethod
+    def from_name(cls, name: str) -> "Priority":
+        try:
+            return cls[name.upper()]
+        except KeyError:
+            raise ValueError(
+                f"Invalid priority: {name}. "
+                f"Must be one of: {', '.join(p.name.lower() for p in cls)}"
+            )
+
+
+class SchedulerTimeout(Exception):
+    """Raised when a request could not be dispatched before its deadline."""
+
+
+@dataclass
+class BackendLimits:
+    """Capacity limits of one VLM backend."""
+    max_in_flight: int = 8
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+
+def estimate_request_tokens(
+    prompt: str,
+    num_images: int,
+    tokens_per_image: int = 765,
+    max_output_tokens: int = 2048
+) -> int:
+    """
+    Rough token cost of a VLM request for rate limiting.
+
+    Uses ~4 characters per text token and the OpenAI high-detail cost of a
+    1024px frame per image. Output tokens count against TPM limits too.
+    """
+    return len(prompt) // 4 + num_images * tokens_per_image + max_output_tokens
+
+
+class TokenBucket:
+    """Continuously refilling token bucket with a one-minute burst capacity."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """Return tokens when a request used fewer than estimated."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    sequence: int
+    tokens: int = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class VLMScheduler:
+    """Admission control and priority queueing for one VLM backend."""
+
+    def __init__(self, limits: Optional[BackendLimits] = None):
+        self.limits = limits or BackendLimits()
+        self.request_bucket = (
+            TokenBucket(self.limits.requests_per_minute)
+            if self.limits.requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(self.limits.tokens_per_minute)
+            if self.limits.tokens_per_minute else None
+        )
+        self.in_flight = 0
+        self._queue: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._waits = {p: deque(maxlen=500) for p in Priority}
+        self._counters = {p: {"dispatched": 0, "timeouts": 0} for p in Priority}
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._queue if not w.future.done())
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        priority: Priority = Priority.NORMAL,
+        tokens: int = 0,
+        timeout: Optional[float] = None
+    ):
+        """
+        Hold a request slot for the duration of the block.
+
+        Args:
+            priority: Dispatch lane; lower values go first
+            tokens: Estimated tokens for the TPM bucket
+            timeout: Seconds to wait in the queue before SchedulerTimeout
+        """
+        await self.acquire(priority, tokens, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(
+        self,
+        priority: Priority = Priority.NORMAL,
+        tokens: int = 0,
+        timeout: Optional[float] = None
+    ):
+        """Wait until the request may be sent upstream."""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(
+            priority=int(priority),
+            sequence=next(self._sequence),
+            tokens=tokens,
+            enqueued_at=time.monotonic(),
+            future=loop.create_future(),
+        )
+        heapq.heappush(self._queue, waiter)
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout)
+        except asyncio.TimeoutError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                return  # Dispatched in the same tick the deadline fired
+            waiter.future.cancel()
+            self._counters[Priority(waiter.priority)]["timeouts"] += 1
+            raise SchedulerTimeout(
+                f"VLM request waited {timeout:g}s without capacity "
+                f"({self.in_flight} in flight, {self.queued} queued)"
+            )
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release()
+            waiter.future.cancel()
+            raise
+
+    def release(self):
+        """Free the slot taken by acquire()."""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant slots to queued requests in priority order."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._queue and self.in_flight < self.limits.max_in_flight:
+            waiter = self._queue[0]
+            if waiter.future.done():
+                heapq.heappop(self._queue)
+                continue
+
+            # Strict priority: the head of the queue waits for rate budget
+            # rather than letting lower priority requests overtake it.
+            wait = 0.0
+            if self.request_bucket:
+                wait = max(wait, self.request_bucket.wait_time(1))
+            if self.token_bucket:
+                wait = max(wait, self.token_bucket.wait_time(waiter.tokens))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._queue)
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket:
+                self.token_bucket.consume(waiter.tokens)
+            self.in_flight += 1
+
+            priority = Priority(waiter.priority)
+            self._waits[priority].append(time.monotonic() - waiter.enqueued_at)
+            self._counters[priority]["dispatched"] += 1
+            waiter.future.set_result(None)
+
+    def refund_tokens(self, estimated: int, actual: int):
+        """
+        Correct the TPM bucket once the real token usage is known: return
+        what an overestimate reserved, or charge what an underestimate
+        missed, so the bucket tracks the usage the backend enforces.
+        """
+        if not self.token_bucket:
+            return
+        if actual < estimated:
+            self.token_bucket.refund(estimated - actual)
+        elif actual > estimated:
+            self.token_bucket.consume(actual - estimated)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue and dispatch metrics per priority lane."""
+        lanes = {}
+        for priority in Priority:
+            waits = np.array(self._waits[priority]) * 1000
+            lanes[priority.name.lower()] = {
+                **self._counters[priority],
+                "queued": sum(
+                    1 for w in self._queue
+                    if w.priority == priority and not w.future.done()
+                ),
+                "queue_time_p50_ms": round(float(np.percentile(waits, 50)), 1) if len(waits) else None,
+                "queue_time_p95_ms": round(float(np.percentile(waits, 95)), 1) if len(waits) else None,
+                "queue_time_max_ms": round(float(waits.max()), 1) if len(waits) else None,
+            }
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.limits.max_in_flight,
+            "queued": self.queued,
+            "lanes": lanes,
+        }
+
+
+_schedulers: Dict[str, VLMScheduler] = {}
+
+
+def get_scheduler(backend: str, limits: Optional[BackendLimits] = None) -> VLMScheduler:
+    """Get the process-wide scheduler for a backend, creating it on first use."""
+    if backend not in _schedulers:
+        _schedulers[backend] = VLMScheduler(limits)
+    return _schedulers[backend]
+
+
+def scheduler_stats() -> Dict[str, Any]:
+    """Stats of every scheduler, keyed by backend."""
+    return {backend: scheduler.stats() for backend, scheduler in _schedulers.items()}
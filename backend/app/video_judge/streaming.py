@@ -0,0 +1,125 @@
+"""
+Incremental parsing of streamed VLM answers.
+
+The judgment JSON arrives token by token, usually wrapped in a ```json
+fence. The parser tracks string and nesting state across chunks and
+decodes each top-level member as soon as it is complete, so the verdict
+and confidence are known long before the rep analysis and observations
+have streamed in, and generation can be stopped once every field the
+result needs is present.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+
+# Top-level fields _parse_vlm_response needs to build a full result;
+# frame_observations and recommendations only add detail.
+REQUIRED_FIELDS = (
+    "overall_judgment",
+    "confidence",
+    "total_reps_attempted",
+    "valid_reps",
+    "invalid_reps",
+    "rep_analysis",
+)
+
+# Fields that make up the early verdict
+VERDICT_FIELDS = ("overall_judgment", "confidence")
+
+
+class IncrementalJSONParser:
+    """
+    Decode the members of a streamed top-level JSON object as they complete.
+
+    Text before the first "{" (prose, a code fence) is skipped. Each
+    character is scanned once.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, Any] = {}
+        self.complete = False
+        self._buffer: List[str] = []
+        self._length = 0
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._member_start = 0
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Consume a chunk of the answer.
+
+        Returns:
+            Names of the top-level members completed by this chunk
+        """
+        if self.complete:
+            return []
+
+        completed = []
+        offset = self._length
+        self._buffer.append(text)
+        self._length += len(text)
+
+        for i, char in enumerate(text):
+            position = offset + i
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._member_start = position + 1
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    name = self._close_member(position)
+                    if name is not None:
+                        completed.append(name)
+                    self.complete = True
+                    break
+            elif char == "," and self._depth == 1:
+                name = self._close_member(position)
+                if name is not None:
+                    completed.append(name)
+                self._member_start = position + 1
+
+        return completed
+
+    def _close_member(self, end: int) -> Optional[str]:
+        """Decode the member between the last separator and `end`."""
+        text = "".join(self._buffer)
+        self._buffer = [text]
+        member = text[self._member_start:end].strip()
+        if not member:
+            return None
+        try:
+            decoded = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            # Leave malformed members to the full parse
+            return None
+        self.fields.update(decoded)
+        return next(iter(decoded), None)
+
+    def has(self, *names: str) -> bool:
+        """Whether all the named top-level members have been decoded."""
+        return all(name in self.fields for name in names)
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._buffer)
@@ -8,22 +8,113 @@ Provides REST API endpoints for:
 """
 
 import os
+import json
 import uuid
 import asyncio
+import inspect
+import logging
 import tempfile
-from datetime import datetime
-from typing import Optional, Dict, Any, List
+from contextlib import asynccontextmanager
+from typing import Optional, Dict, Any, List, get_origin
 from pathlib import Path
 
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request, params
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel, Field
 
 from .regulations import Discipline, JudgmentResult
 from .vlm_service import VLMBackend
 from .judge_service import StreetLiftingJudge, JudgeConfig
+from .cache import current_judgment_cache
+from .mosaic import parse_mosaic_tiles
+from .encoding import parse_encoding_profiles
+from .costs import parse_token_prices
+from .job_queue import JobStatus, get_job_queue, build_judgment_payload
+from .worker import JudgmentWorker
+from .scheduler import Priority, SchedulerTimeout, scheduler_stats
+from .batch import BatchItem, start_batch, get_batch, cancel_batches
+from .progress import progress_bus
+from .metrics import JOBS, VLM_REQUESTS_QUEUED, render_metrics
+from .runtime import (
+    get_extraction_executor,
+    shutdown_extraction_executor,
+    extraction_executor_info,
+    loop_lag_monitor,
+)
 
 
-router = APIRouter(prefix="/video-judge", tags=["Video Judge"])
+logger = logging.getLogger(__name__)
+
+
+# Multipart boundaries, headers and form fields on top of the videos
+UPLOAD_FORM_OVERHEAD = 1024 * 1024
+
+
+class UploadLimitRoute(APIRoute):
+    """
+    Route that rejects oversized uploads while the body is still coming in.
+    
+    FastAPI parses the multipart form, spooling every file, before the
+    endpoint runs, so a size check there caps neither memory nor disk.
+    The body of a request may hold VLM_MAX_UPLOAD_MB per video the
+    endpoint accepts (up to the batch limit for a list of videos); a
+    larger Content-Length, or a body that grows past it, gets a 413.
+    """
+    
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        files = [
+            param for param in inspect.signature(endpoint).parameters.values()
+            if isinstance(param.default, params.File)
+        ]
+        self.single_uploads = sum(1 for param in files if get_origin(param.annotation) is not list)
+        self.list_uploads = len(files) - self.single_uploads
+    
+    def max_body_bytes(self) -> Optional[int]:
+        """Largest accepted request body, None for routes without uploads."""
+        if not self.single_uploads and not self.list_uploads:
+            return None
+        videos = self.single_uploads + self.list_uploads * get_batch_limits()["max_items"]
+        return videos * get_max_upload_bytes() + UPLOAD_FORM_OVERHEAD
+    
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        
+        async def limited_handler(request: Request) -> Response:
+            max_bytes = self.max_body_bytes()
+            if max_bytes is None:
+                return await handler(request)
+            
+            def too_large() -> HTTPException:
+                return HTTPException(
+                    status_code=413,
+                    detail=f"Upload exceeds the maximum of {get_max_upload_bytes() // (1024 * 1024)} MB per video"
+                )
+            
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > max_bytes:
+                raise too_large()
+            
+            received = 0
+            receive = request.receive
+            
+            async def limited_receive():
+                nonlocal received
+                message = await receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                    if received > max_bytes:
+                        raise too_large()
+                return message
+            
+            return await handler(Request(request.scope, limited_receive))
+        
+        return limited_handler
+
+
+router = APIRouter(prefix="/video-judge", tags=["Video Judge"], route_class=UploadLimitRoute)
 
 
 # ============================================================================
@@ -50,6 +141,7 @@ class JudgmentResponse(BaseModel):
     frame_analysis: Dict[str, Any]
     model_used: str
     processed_at: str
+    token_usage: Optional[Dict[str, Any]] = None
 
 
 class JudgmentStatusResponse(BaseModel):
@@ -60,6 +152,13 @@ class JudgmentStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
+class BatchItemRequest(BaseModel):
+    """Per-video settings of a batch item."""
+    discipline: Optional[str] = Field(default=None, description="Discipline: pull_up, dip, or squat")
+    camera_angle: Optional[str] = Field(default=None, description="Camera angle: front, side, parallel, or auto")
+    additional_context: Optional[str] = Field(default=None, description="Additional context for the judge")
+
+
 class HealthResponse(BaseModel):
     """Health check response."""
     status: str
@@ -67,21 +166,18 @@ class HealthResponse(BaseModel):
     available_disciplines: List[str]
 
 
-# ============================================================================
-# In-memory storage for async processing
-# (In production, use Redis or a database)
-# ============================================================================
-
-judgment_store: Dict[str, Dict[str, Any]] = {}
-
-
 # ============================================================================
 # Configuration
 # ============================================================================
 
-def get_judge_config() -> JudgeConfig:
-    """Get judge configuration from environment variables."""
+def load_judge_config() -> JudgeConfig:
+    """Read judge configuration from environment variables."""
     backend_str = os.getenv("VLM_BACKEND", "openai_gpt4o")
+    cascade_backend = os.getenv("VLM_CASCADE_BACKEND")
+    dedupe_max_distance = os.getenv("VLM_DEDUPE_MAX_DISTANCE")
+    replay_backend = os.getenv("VLM_REPLAY_BACKEND")
+    budget_max_tokens = os.getenv("VLM_BUDGET_MAX_TOKENS")
+    budget_output_tokens = os.getenv("VLM_BUDGET_OUTPUT_TOKENS")
     
     return JudgeConfig(
         vlm_backend=VLMBackend(backend_str),
@@ -90,10 +186,248 @@ def get_judge_config() -> JudgeConfig:
         vlm_model=os.getenv("VLM_MODEL"),
         num_frames=int(os.getenv("VLM_NUM_FRAMES", "16")),
         confidence_threshold=float(os.getenv("VLM_CONFIDENCE_THRESHOLD", "0.7")),
-        strict_mode=os.getenv("VLM_STRICT_MODE", "true").lower() == "true"
+        strict_mode=os.getenv("VLM_STRICT_MODE", "true").lower() == "true",
+        decode_mode=os.getenv("VLM_DECODE_MODE", "auto"),
+        frame_selection=os.getenv("VLM_FRAME_SELECTION", "uniform"),
+        extraction_executor=os.getenv("VLM_EXTRACTION_EXECUTOR", "thread"),
+        extraction_workers=int(os.getenv("VLM_EXTRACTION_WORKERS", "0")) or None,
+        encode_workers=int(os.getenv("VLM_ENCODE_WORKERS", "4")),
+        roi_crop=os.getenv("VLM_ROI_CROP", "false").lower() == "true",
+        roi_padding=float(os.getenv("VLM_ROI_PADDING", "0.15")),
+        dedupe_max_distance=int(dedupe_max_distance) if dedupe_max_distance else None,
+        cache_enabled=os.getenv("VLM_CACHE_ENABLED", "true").lower() == "true",
+        cache_dir=os.getenv("VLM_CACHE_DIR", os.path.join(tempfile.gettempdir(), "video_judge_cache")),
+        cache_ttl_seconds=float(os.getenv("VLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600))),
+        cache_max_entries=int(os.getenv("VLM_CACHE_MAX_ENTRIES", "512")),
+        cache_max_disk_mb=int(os.getenv("VLM_CACHE_MAX_DISK_MB", "1024")),
+        http_max_connections=int(os.getenv("VLM_HTTP_MAX_CONNECTIONS", "32")),
+        http_max_keepalive=int(os.getenv("VLM_HTTP_MAX_KEEPALIVE", "16")),
+        http_keepalive_expiry=float(os.getenv("VLM_HTTP_KEEPALIVE_EXPIRY", "60")),
+        http2=os.getenv("VLM_HTTP2", "false").lower() == "true",
+        request_timeout=float(os.getenv("VLM_REQUEST_TIMEOUT", "120")),
+        scheduler_max_in_flight=int(os.getenv("VLM_MAX_IN_FLIGHT", "8")),
+        scheduler_requests_per_minute=float(os.getenv("VLM_REQUESTS_PER_MINUTE", "0")) or None,
+        scheduler_tokens_per_minute=float(os.getenv("VLM_TOKENS_PER_MINUTE", "0")) or None,
+        scheduler_queue_timeout=float(os.getenv("VLM_QUEUE_TIMEOUT", "120")),
+        vlm_retries=int(os.getenv("VLM_RETRIES", "2")),
+        retry_base_delay=float(os.getenv("VLM_RETRY_BASE_DELAY", "0.5")),
+        retry_max_delay=float(os.getenv("VLM_RETRY_MAX_DELAY", "8")),
+        hedge_percentile=float(os.getenv("VLM_HEDGE_PERCENTILE", "0")) or None,
+        hedge_min_samples=int(os.getenv("VLM_HEDGE_MIN_SAMPLES", "20")),
+        cascade_backend=VLMBackend(cascade_backend) if cascade_backend else None,
+        cascade_base_url=os.getenv("VLM_CASCADE_BASE_URL"),
+        cascade_api_key=os.getenv("VLM_CASCADE_API_KEY") or os.getenv("OPENAI_API_KEY"),
+        cascade_model=os.getenv("VLM_CASCADE_MODEL"),
+        rep_segmentation=os.getenv("VLM_REP_SEGMENTATION", "false").lower() == "true",
+        frames_per_rep=int(os.getenv("VLM_FRAMES_PER_REP", "6")),
+        max_rep_segments=int(os.getenv("VLM_MAX_REP_SEGMENTS", "12")),
+        mosaic_tiles=parse_mosaic_tiles(os.getenv("VLM_MOSAIC_TILES")),
+        mosaic_max_side=int(os.getenv("VLM_MOSAIC_MAX_SIDE", "2048")),
+        encoding_profiles=parse_encoding_profiles(os.getenv("VLM_ENCODING_PROFILES")),
+        stream_responses=os.getenv("VLM_STREAM", "false").lower() == "true",
+        stream_stop_early=os.getenv("VLM_STREAM_STOP_EARLY", "false").lower() == "true",
+        output_format=os.getenv("VLM_OUTPUT_FORMAT", "verbose"),
+        guided_decoding=os.getenv("VLM_GUIDED_DECODING", "true").lower() == "true",
+        replay_backend=VLMBackend(replay_backend) if replay_backend else None,
+        replay_dir=os.getenv("VLM_REPLAY_DIR"),
+        replay_mode=os.getenv("VLM_REPLAY_MODE", "replay"),
+        replay_latency_scale=float(os.getenv("VLM_REPLAY_LATENCY_SCALE", "0")),
+        budget_max_tokens=int(budget_max_tokens) if budget_max_tokens else None,
+        budget_max_cost_usd=float(os.getenv("VLM_BUDGET_MAX_COST_USD", "0")) or None,
+        budget_min_frames=int(os.getenv("VLM_BUDGET_MIN_FRAMES", "4")),
+        budget_output_tokens=int(budget_output_tokens) if budget_output_tokens else None,
+        token_prices=parse_token_prices(os.getenv("VLM_TOKEN_PRICES")),
+        multi_angle_mode=os.getenv("VLM_MULTI_ANGLE_MODE", "interleaved"),
+        angle_max_offset_seconds=float(os.getenv("VLM_ANGLE_MAX_OFFSET_SECONDS", "10")),
+        angle_min_correlation=float(os.getenv("VLM_ANGLE_MIN_CORRELATION", "0.3"))
     )
 
 
+_judge_config: Optional[JudgeConfig] = None
+_judge: Optional[StreetLiftingJudge] = None
+
+
+def get_judge_config() -> JudgeConfig:
+    """Get the judge configuration, read from the environment once per process."""
+    global _judge_config
+    if _judge_config is None:
+        _judge_config = load_judge_config()
+    return _judge_config
+
+
+def get_judge() -> StreetLiftingJudge:
+    """
+    Get the shared judge.
+    
+    The judge owns the pooled VLM client, so keep-alive connections are
+    reused across requests instead of paying a TCP+TLS handshake per judgment.
+    """
+    global _judge
+    if _judge is None:
+        _judge = StreetLiftingJudge(get_judge_config())
+    return _judge
+
+
+async def close_judge():
+    """Close the shared judge and its connection pool."""
+    global _judge
+    if _judge is not None:
+        await _judge.close()
+        _judge = None
+
+
+# Uploads are copied to disk in chunks of this size, so memory per request
+# stays bounded regardless of the video size.
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_max_upload_bytes() -> int:
+    """Maximum accepted size of a single uploaded video."""
+    return int(float(os.getenv("VLM_MAX_UPLOAD_MB", "500")) * 1024 * 1024)
+
+
+def get_job_spool_dir() -> str:
+    """Directory for videos waiting in the job queue, shared with the workers."""
+    spool_dir = os.getenv(
+        "VLM_JOB_SPOOL_DIR",
+        os.path.join(tempfile.gettempdir(), "video_judge_jobs")
+    )
+    os.makedirs(spool_dir, exist_ok=True)
+    return spool_dir
+
+
+async def spool_upload(
+    upload: UploadFile,
+    max_bytes: Optional[int] = None,
+    directory: Optional[str] = None
+) -> str:
+    """
+    Stream an uploaded video into a temporary file.
+    
+    Disk writes run in the thread pool so a slow disk doesn't stall the
+    event loop while large uploads come in. UploadLimitRoute has already
+    capped the whole request body; this enforces the limit per video.
+    
+    Args:
+        upload: The uploaded file
+        max_bytes: Reject the upload with 413 once it exceeds this size
+        directory: Directory for the file, defaults to the system temp dir
+        
+    Returns:
+        Path to the temporary file. The caller is responsible for deleting it.
+    """
+    if max_bytes is None:
+        max_bytes = get_max_upload_bytes()
+    
+    temp_file = await run_in_threadpool(
+        tempfile.NamedTemporaryFile,
+        suffix=Path(upload.filename or "video.mp4").suffix,
+        dir=directory,
+        delete=False
+    )
+    written = 0
+    try:
+        while True:
+            chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > max_bytes:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Video exceeds the maximum upload size of {max_bytes // (1024 * 1024)} MB"
+                )
+            await run_in_threadpool(temp_file.write, chunk)
+    except BaseException:
+        # Inline: awaiting here could be cancelled again and leak the file
+        temp_file.close()
+        os.unlink(temp_file.name)
+        raise
+    
+    await run_in_threadpool(temp_file.close)
+    return temp_file.name
+
+
+def _parse_priority(priority: str) -> Priority:
+    """Validate a priority form field."""
+    try:
+        return Priority.from_name(priority)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def get_batch_limits() -> Dict[str, Any]:
+    """Batch size, default/maximum concurrency and retention of finished batches."""
+    return {
+        "max_items": int(os.getenv("VLM_BATCH_MAX_ITEMS", "50")),
+        "concurrency": int(os.getenv("VLM_BATCH_CONCURRENCY", "4")),
+        "max_concurrency": int(os.getenv("VLM_BATCH_MAX_CONCURRENCY", "8")),
+        "retention_seconds": float(os.getenv("VLM_BATCH_RETENTION_SECONDS", "3600")),
+    }
+
+
+def _ndjson(events):
+    """Encode an async iterator of dicts as newline-delimited JSON."""
+    async def encode():
+        async for event in events:
+            yield json.dumps(event, default=str) + "\n"
+    return StreamingResponse(encode(), media_type="application/x-ndjson")
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _remove_file(path: Optional[str]):
+    """Delete a temporary file if it still exists."""
+    if path and os.path.exists(path):
+        os.unlink(path)
+
+
+# ============================================================================
+# Lifespan
+# ============================================================================
+
+@asynccontextmanager
+async def lifespan(app):
+    """Start and stop process-wide video judge resources."""
+    config = get_judge_config()
+    judge = get_judge()
+    get_extraction_executor(config.extraction_executor, config.extraction_workers)
+    loop_lag_monitor.start()
+    
+    # Single-box deployments process queued jobs inside the API process.
+    # Set VLM_EMBEDDED_WORKER=false when running standalone workers.
+    worker = None
+    worker_task = None
+    if os.getenv("VLM_EMBEDDED_WORKER", "true").lower() == "true":
+        try:
+            queue = await run_in_threadpool(get_job_queue)
+        except Exception as e:
+            # The synchronous endpoints don't need the job database
+            logger.warning(f"Job queue unavailable, not starting the embedded judge worker: {e}")
+        else:
+            worker = JudgmentWorker(
+                queue,
+                config,
+                concurrency=int(os.getenv("VLM_WORKER_CONCURRENCY", "2")),
+                judge=judge
+            )
+            worker_task = asyncio.create_task(worker.run())
+    
+    try:
+        yield
+    finally:
+        if worker is not None:
+            worker.stop()
+            await worker_task
+        await cancel_batches()
+        await close_judge()
+        await loop_lag_monitor.stop()
+        shutdown_extraction_executor()
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -110,13 +444,52 @@ async def health_check():
     )
 
 
+@router.get("/stats")
+async def get_runtime_stats():
+    """Runtime statistics: event loop lag, extraction executor, result cache, job queue, VLM schedulers, calls and cascade tiers."""
+    cache = current_judgment_cache()
+    try:
+        queue = await run_in_threadpool(get_job_queue)
+        jobs = await run_in_threadpool(queue.counts)
+    except Exception as e:
+        jobs = {"error": str(e)}
+    return {
+        "event_loop_lag": loop_lag_monitor.snapshot(),
+        "extraction_executor": extraction_executor_info(),
+        "cache": cache.stats() if cache is not None else None,
+        "jobs": jobs,
+        "schedulers": scheduler_stats(),
+        "vlm": get_judge().vlm_stats(),
+        "cascade": get_judge().cascade_stats(),
+        "usage": get_judge().usage_stats(),
+    }
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus metrics: stage latencies, retries, cache hits, in-flight and queued work."""
+    for backend, stats in scheduler_stats().items():
+        VLM_REQUESTS_QUEUED.labels(backend).set(stats["queued"])
+    try:
+        queue = await run_in_threadpool(get_job_queue)
+        for status, count in (await run_in_threadpool(queue.counts)).items():
+            JOBS.labels(status).set(count)
+    except Exception:
+        # The job database is optional for metrics; /stats reports its errors
+        pass
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @router.post("/analyze", response_model=JudgmentResponse)
 async def analyze_video(
     video: UploadFile = File(..., description="Video file to analyze"),
     discipline: str = Form(..., description="Discipline: pull_up, dip, or squat"),
     camera_angle: str = Form(default="auto", description="Camera angle: front, side, parallel, or auto"),
     additional_context: Optional[str] = Form(default=None, description="Additional context"),
-    secondary_video: Optional[UploadFile] = File(default=None, description="Secondary angle video (optional)")
+    secondary_video: Optional[UploadFile] = File(default=None, description="Secondary angle video (optional)"),
+    force_refresh: bool = Form(default=False, description="Bypass the result cache and re-judge"),
+    priority: str = Form(default="normal", description="Scheduling priority: live, normal, or rejudge")
 ):
     """
     Analyze a street lifting video and return judgment.
@@ -128,6 +501,8 @@ async def analyze_video(
     - **discipline**: The discipline being judged (pull_up, dip, squat)
     - **camera_angle**: Camera angle (front, side, parallel, auto)
     - **secondary_video**: Optional secondary angle for pull-ups
+    - **force_refresh**: Ignore any cached judgment for this video
+    - **priority**: live attempts are sent to the VLM before normal and rejudge requests
     """
     # Validate discipline
     try:
@@ -138,6 +513,8 @@ async def analyze_video(
             detail=f"Invalid discipline: {discipline}. Must be one of: pull_up, dip, squat"
         )
     
+    request_priority = _parse_priority(priority)
+    
     # Auto-select camera angle
     if camera_angle == "auto":
         if discipline == "pull_up":
@@ -145,82 +522,63 @@ async def analyze_video(
         else:
             camera_angle = "side"
     
-    # Save uploaded video to temp file
+    video_path = None
+    secondary_path = None
     try:
-        video_bytes = await video.read()
-        
-        secondary_path = None
+        # Spool uploaded videos to disk
+        video_path = await spool_upload(video)
         if secondary_video:
-            secondary_bytes = await secondary_video.read()
-            secondary_temp = tempfile.NamedTemporaryFile(
-                suffix=Path(secondary_video.filename or "video.mp4").suffix,
-                delete=False
-            )
-            secondary_temp.write(secondary_bytes)
-            secondary_temp.close()
-            secondary_path = secondary_temp.name
+            secondary_path = await spool_upload(secondary_video)
         
-        # Create judge and analyze
-        config = get_judge_config()
-        judge = StreetLiftingJudge(config)
-        
-        try:
-            result = await judge.analyze_video(
-                discipline=disc,
-                video_bytes=video_bytes,
-                camera_angle=camera_angle,
-                secondary_video_path=secondary_path,
-                additional_context=additional_context
-            )
-        finally:
-            await judge.close()
-            
-            # Clean up secondary video temp file
-            if secondary_path and os.path.exists(secondary_path):
-                os.unlink(secondary_path)
+        result = await get_judge().analyze_video(
+            discipline=disc,
+            video_path=video_path,
+            camera_angle=camera_angle,
+            secondary_video_path=secondary_path,
+            additional_context=additional_context,
+            force_refresh=force_refresh,
+            priority=request_priority
+        )
         
         # Build response
         judgment_id = str(uuid.uuid4())
         
-        return JudgmentResponse(
-            judgment_id=judgment_id,
-            discipline=result.discipline,
-            is_valid=result.is_valid,
-            confidence=result.confidence,
-            rep_count=result.rep_count,
-            overall_judgment="VALID" if result.is_valid else "INVALID",
-            invalid_reasons=result.invalid_reasons,
-            details=[{
-                "criteria": d.criteria,
-                "passed": d.passed,
-                "confidence": d.confidence,
-                "explanation": d.explanation
-            } for d in result.details],
-            frame_analysis=result.frame_analysis,
-            model_used=result.model_used,
-            processed_at=datetime.utcnow().isoformat()
-        )
+        return JudgmentResponse(**build_judgment_payload(judgment_id, result))
         
+    except HTTPException:
+        raise
+    except SchedulerTimeout as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Video judge is at capacity: {str(e)}",
+            headers={"Retry-After": "30"}
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error processing video: {str(e)}"
         )
+    finally:
+        # Clean up temp files
+        _remove_file(video_path)
+        _remove_file(secondary_path)
 
 
 @router.post("/analyze-async")
 async def analyze_video_async(
-    background_tasks: BackgroundTasks,
     video: UploadFile = File(...),
     discipline: str = Form(...),
     camera_angle: str = Form(default="auto"),
-    additional_context: Optional[str] = Form(default=None)
+    additional_context: Optional[str] = Form(default=None),
+    force_refresh: bool = Form(default=False),
+    priority: str = Form(default="normal")
 ):
     """
     Submit a video for asynchronous analysis.
     
     Returns a judgment_id that can be used to check the status
     and retrieve results using the /status/{judgment_id} endpoint.
+    The job is persisted in the job queue and processed by a judge worker.
     """
     # Validate discipline
     try:
@@ -231,107 +589,158 @@ async def analyze_video_async(
             detail=f"Invalid discipline: {discipline}"
         )
     
+    request_priority = _parse_priority(priority)
+    
     # Generate judgment ID
     judgment_id = str(uuid.uuid4())
     
-    # Save video to temp file
-    video_bytes = await video.read()
-    temp_file = tempfile.NamedTemporaryFile(
-        suffix=Path(video.filename or "video.mp4").suffix,
-        delete=False
-    )
-    temp_file.write(video_bytes)
-    temp_file.close()
+    # Spool video to the directory shared with the workers
+    video_path = await spool_upload(video, directory=get_job_spool_dir())
     
-    # Initialize status
-    judgment_store[judgment_id] = {
-        "status": "pending",
-        "discipline": discipline,
-        "submitted_at": datetime.utcnow().isoformat(),
-        "video_path": temp_file.name
-    }
+    # Auto-select camera angle
+    if camera_angle == "auto":
+        if disc == Discipline.PULL_UP:
+            camera_angle = "front"
+        else:
+            camera_angle = "side"
     
-    # Schedule background task
-    background_tasks.add_task(
-        process_video_background,
-        judgment_id=judgment_id,
-        video_path=temp_file.name,
-        discipline=disc,
-        camera_angle=camera_angle,
-        additional_context=additional_context
-    )
+    try:
+        queue = await run_in_threadpool(get_job_queue)
+        await run_in_threadpool(
+            queue.enqueue,
+            judgment_id,
+            video_path,
+            disc.value,
+            camera_angle,
+            additional_context,
+            force_refresh,
+            request_priority
+        )
+    except Exception as e:
+        _remove_file(video_path)
+        raise HTTPException(
+            status_code=503,
+            detail=f"Could not queue video for analysis: {str(e)}"
+        )
     
     return {
         "judgment_id": judgment_id,
-        "status": "pending",
-        "message": "Video submitted for analysis. Use /status/{judgment_id} to check progress."
+        "status": JobStatus.PENDING,
+        "message": "Video submitted for analysis. Use /events/{judgment_id} or /status/{judgment_id} to follow progress."
     }
 
 
-async def process_video_background(
-    judgment_id: str,
-    video_path: str,
-    discipline: Discipline,
-    camera_angle: str,
-    additional_context: Optional[str]
+@router.post("/analyze-batch")
+async def analyze_video_batch(
+    videos: List[UploadFile] = File(..., description="Attempt videos of the heat"),
+    items: Optional[str] = Form(
+        default=None,
+        description="JSON list of per-video settings (discipline, camera_angle, additional_context), in upload order"
+    ),
+    discipline: Optional[str] = Form(default=None, description="Default discipline for items without one"),
+    camera_angle: str = Form(default="auto", description="Default camera angle for items without one"),
+    concurrency: Optional[int] = Form(default=None, description="Videos judged at once"),
+    force_refresh: bool = Form(default=False),
+    priority: str = Form(default="normal"),
+    stream: bool = Form(default=True, description="Stream results as newline-delimited JSON")
 ):
-    """Background task to process video."""
+    """
+    Judge a whole flight of attempt videos in one request.
+    
+    Videos are judged with bounded concurrency through the shared judge,
+    so they share extraction workers and VLM connections with other traffic.
+    
+    With **stream** (default) the response is newline-delimited JSON: a
+    "batch" event with the batch id and per-item status, one "item" event
+    with the full judgment as each video completes, and a final "batch"
+    event. Without it the batch id is returned immediately; poll
+    /batch/{batch_id} for progress and results.
+    """
+    limits = get_batch_limits()
+    if len(videos) > limits["max_items"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch has {len(videos)} videos; the maximum is {limits['max_items']}"
+        )
+    
     try:
-        judgment_store[judgment_id]["status"] = "processing"
-        
-        # Auto-select camera angle
-        if camera_angle == "auto":
-            if discipline == Discipline.PULL_UP:
-                camera_angle = "front"
-            else:
-                camera_angle = "side"
-        
-        config = get_judge_config()
-        judge = StreetLiftingJudge(config)
-        
+        item_settings = [BatchItemRequest(**entry) for entry in json.loads(items)] if items else []
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid items: {str(e)}")
+    if item_settings and len(item_settings) != len(videos):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Got {len(item_settings)} item settings for {len(videos)} videos"
+        )
+    
+    # Validate every item before spooling anything
+    resolved = []
+    for index in range(len(videos)):
+        settings = item_settings[index] if item_settings else BatchItemRequest()
+        item_discipline = settings.discipline or discipline
         try:
-            result = await judge.analyze_video(
-                discipline=discipline,
-                video_path=video_path,
-                camera_angle=camera_angle,
-                additional_context=additional_context
+            disc = Discipline(item_discipline)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid discipline for item {index}: {item_discipline}. Must be one of: pull_up, dip, squat"
             )
-        finally:
-            await judge.close()
-        
-        # Store result
-        judgment_store[judgment_id] = {
-            "status": "completed",
-            "result": {
-                "judgment_id": judgment_id,
-                "discipline": result.discipline,
-                "is_valid": result.is_valid,
-                "confidence": result.confidence,
-                "rep_count": result.rep_count,
-                "overall_judgment": "VALID" if result.is_valid else "INVALID",
-                "invalid_reasons": result.invalid_reasons,
-                "details": [{
-                    "criteria": d.criteria,
-                    "passed": d.passed,
-                    "confidence": d.confidence,
-                    "explanation": d.explanation
-                } for d in result.details],
-                "frame_analysis": result.frame_analysis,
-                "model_used": result.model_used,
-                "processed_at": datetime.utcnow().isoformat()
-            }
-        }
-        
-    except Exception as e:
-        judgment_store[judgment_id] = {
-            "status": "failed",
-            "error": str(e)
-        }
+        angle = settings.camera_angle or camera_angle
+        if angle == "auto":
+            angle = "front" if disc == Discipline.PULL_UP else "side"
+        resolved.append((disc, angle, settings.additional_context))
     
-    finally:
-        # Clean up temp file
-        if os.path.exists(video_path):
-            os.unlink(video_path)
+    request_priority = _parse_priority(priority)
+    batch_concurrency = min(concurrency or limits["concurrency"], limits["max_concurrency"])
+    
+    batch_items = []
+    try:
+        for index, (video, (disc, angle, context)) in enumerate(zip(videos, resolved)):
+            batch_items.append(BatchItem(
+                index=index,
+                judgment_id=str(uuid.uuid4()),
+                filename=video.filename,
+                discipline=disc,
+                camera_angle=angle,
+                additional_context=context,
+                video_path=await spool_upload(video)
+            ))
+    except BaseException:
+        for item in batch_items:
+            _remove_file(item.video_path)
+        raise
+    
+    batch = start_batch(
+        get_judge(),
+        batch_items,
+        concurrency=batch_concurrency,
+        priority=request_priority,
+        force_refresh=force_refresh,
+        retention_seconds=limits["retention_seconds"]
+    )
+    
+    if stream:
+        return _ndjson(batch.events())
+    return batch.summary()
+
+
+@router.get("/batch/{batch_id}")
+async def get_batch_status(batch_id: str, stream: bool = False):
+    """
+    Get the progress and per-item results of a batch.
+    
+    With **stream**, completed items are replayed and the remaining ones
+    streamed as newline-delimited JSON until the batch finishes.
+    """
+    batch = get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Batch ID not found: {batch_id}"
+        )
+    if stream:
+        return _ndjson(batch.events())
+    return batch.summary(include_results=True)
 
 
 @router.get("/status/{judgment_id}", response_model=JudgmentStatusResponse)
@@ -341,27 +750,108 @@ async def get_judgment_status(judgment_id: str):
     
     Returns the current status and result if completed.
     """
-    if judgment_id not in judgment_store:
+    queue = await run_in_threadpool(get_job_queue)
+    job = await run_in_threadpool(queue.get, judgment_id)
+    if job is None:
         raise HTTPException(
             status_code=404,
             detail=f"Judgment ID not found: {judgment_id}"
         )
     
-    data = judgment_store[judgment_id]
-    
     response = JudgmentStatusResponse(
         judgment_id=judgment_id,
-        status=data["status"]
+        status=job["status"]
     )
     
-    if data["status"] == "completed":
-        response.result = JudgmentResponse(**data["result"])
-    elif data["status"] == "failed":
-        response.error = data.get("error", "Unknown error")
+    if job["status"] == JobStatus.COMPLETED:
+        response.result = JudgmentResponse(**job["result"])
+    elif job["status"] == JobStatus.FAILED:
+        response.error = job.get("error") or "Unknown error"
     
     return response
 
 
+@router.get("/events/{judgment_id}")
+async def stream_judgment_events(judgment_id: str, request: Request):
+    """
+    Stream the progress of an async judgment as Server-Sent Events.
+    
+    Sends a "stage" event for every transition (queued, extracting,
+    calling_vlm, parsing) with its timing, then a final "completed" event
+    carrying the JudgmentResponse or a "failed" event with the error, and
+    closes the stream. Transitions that happened before the client
+    connected are replayed first. With streamed VLM answers, a "verdict"
+    stage carrying overall_judgment and confidence arrives before parsing,
+    while the rest of the answer is still being generated.
+    """
+    queue = await run_in_threadpool(get_job_queue)
+    job = await run_in_threadpool(queue.get, judgment_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Judgment ID not found: {judgment_id}"
+        )
+    
+    # Embedded workers wake the stream through the progress bus; polling
+    # the job table covers standalone workers in other processes.
+    poll_interval = float(os.getenv("VLM_EVENTS_POLL_INTERVAL", "1.0"))
+    keepalive_interval = 15.0
+    
+    async def events():
+        nonlocal job
+        notifications = progress_bus.subscribe(judgment_id)
+        sent = 0
+        previous_elapsed = 0.0
+        loop = asyncio.get_running_loop()
+        last_write = loop.time()
+        try:
+            while True:
+                for entry in job["stage_history"][sent:]:
+                    data = {
+                        "judgment_id": judgment_id,
+                        **entry,
+                        "previous_stage_ms": round(entry["elapsed_ms"] - previous_elapsed, 1),
+                    }
+                    previous_elapsed = entry["elapsed_ms"]
+                    yield _sse("stage", data)
+                    last_write = loop.time()
+                sent = len(job["stage_history"])
+                
+                if job["status"] == JobStatus.COMPLETED:
+                    yield _sse("completed", job["result"])
+                    return
+                if job["status"] == JobStatus.FAILED:
+                    yield _sse("failed", {
+                        "judgment_id": judgment_id,
+                        "error": job.get("error") or "Unknown error"
+                    })
+                    return
+                
+                try:
+                    await asyncio.wait_for(notifications.get(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                if await request.is_disconnected():
+                    return
+                if loop.time() - last_write >= keepalive_interval:
+                    yield ": keepalive\n\n"
+                    last_write = loop.time()
+                
+                refreshed = await run_in_threadpool(queue.get, judgment_id)
+                if refreshed is None:
+                    yield _sse("failed", {"judgment_id": judgment_id, "error": "Judgment expired"})
+                    return
+                job = refreshed
+        finally:
+            progress_bus.unsubscribe(judgment_id, notifications)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/regulations/{discipline}")
 async def get_regulations(discipline: str):
     """
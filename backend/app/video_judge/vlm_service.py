@@ -14,14 +14,40 @@ import os
 import base64
 import json
 import asyncio
+import logging
 import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict, Any
+from typing import AsyncIterator, List, Optional, Tuple, Dict, Any, Union
 from dataclasses import dataclass
 from enum import Enum
 from abc import ABC, abstractmethod
 
 import httpx
+import numpy as np
+
+from .compact import gemini_schema
+from .encoding import (
+    EncodingProfile,
+    encode_rung,
+    encode_within_budget,
+    resize_to,
+)
+from .metrics import FRAME_ENCODE_SECONDS, track_vlm_request
+from .motion import (
+    MotionProfile,
+    RepSegment,
+    compute_motion_profile,
+    dedupe_keyframes,
+    find_motion_roi,
+    segment_reps,
+    select_motion_keyframes,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class VLMBackend(str, Enum):
@@ -30,6 +56,8 @@ class VLMBackend(str, Enum):
     OPENAI_GPT4V = "openai_gpt4v"
     OPENAI_GPT4O = "openai_gpt4o"
     GEMINI_PRO = "gemini_pro"
+    # Records or replays the answers of another backend (see replay.py)
+    RECORD_REPLAY = "record_replay"
 
 
 @dataclass
@@ -40,6 +68,45 @@ class FrameData:
     image_base64: str
     width: int
     height: int
+    # (x0, y0, x1, y1) pixel box of the source frame, when cropped to the ROI
+    crop: Optional[Tuple[int, int, int, int]] = None
+    mime_type: str = "image/jpeg"
+
+
+@dataclass
+class TokenUsage:
+    """Token counts reported by the backend for one request."""
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    # Prompt tokens served from the backend's prefix/prompt cache
+    cached_tokens: Optional[int] = None
+    # Counted locally because the backend never reported usage (a stream
+    # closed early); roughly right, not billing-accurate
+    estimated: bool = False
+
+
+@dataclass
+class VLMResponse:
+    """Text of a VLM answer plus what the backend reported about it."""
+    text: str
+    usage: Optional[TokenUsage] = None
+    # Set for streamed answers
+    parsed: Optional[Dict[str, Any]] = None  # Top-level fields decoded while streaming
+    ttft_ms: Optional[float] = None  # Time to first token
+    verdict_ms: Optional[float] = None  # Time until overall_judgment and confidence arrived
+    total_ms: Optional[float] = None
+    stopped_early: bool = False  # Generation stopped once the required fields were complete
+
+
+class ExtractedFrames(list):
+    """
+    Frames of one extraction, with what the near-duplicate pass changed.
+    
+    A plain list of FrameData otherwise; the counts survive pickling to
+    and from process pool workers.
+    """
+    duplicates_dropped: int = 0
+    motion_refills: int = 0
 
 
 @dataclass
@@ -74,6 +141,8 @@ class VideoJudgmentResult:
     frame_analysis: Dict[str, Any]
     raw_response: str
     model_used: str
+    # Tokens and USD cost of every VLM request behind the result (see costs.py)
+    token_usage: Optional[Dict[str, Any]] = None
 
 
 class VideoFrameExtractor:
@@ -82,9 +151,58 @@ class VideoFrameExtractor:
     Uses ffmpeg or opencv for frame extraction.
     """
     
-    def __init__(self, use_opencv: bool = True):
+    # Decode strategies for reading the sampled frames:
+    # - "seek": cap.set(CAP_PROP_POS_FRAMES) before every read. Each seek jumps
+    #   back to the previous keyframe and decodes forward, so it only pays off
+    #   when targets are far apart relative to the GOP length.
+    # - "sequential": walk the stream once with grab() and only retrieve()
+    #   the target frames.
+    # - "auto": pick per video based on the average gap between targets.
+    DECODE_MODES = ("auto", "seek", "sequential")
+    SELECTION_MODES = ("uniform", "keypoints", "motion")
+    
+    def __init__(
+        self,
+        use_opencv: bool = True,
+        decode_mode: str = "auto",
+        sequential_max_gap_seconds: float = 2.0,
+        encode_workers: int = 1,
+        crop_to_roi: bool = False,
+        roi_padding: float = 0.15,
+        encoding: Optional[EncodingProfile] = None,
+        dedupe_max_distance: Optional[int] = None
+    ):
+        if decode_mode not in self.DECODE_MODES:
+            raise ValueError(
+                f"Unknown decode mode: {decode_mode}. "
+                f"Must be one of: {', '.join(self.DECODE_MODES)}"
+            )
         self.use_opencv = use_opencv
+        self.decode_mode = decode_mode
+        # Typical phone footage has a keyframe every 1-2 seconds; targets closer
+        # than this are cheaper to reach by decoding straight through.
+        self.sequential_max_gap_seconds = sequential_max_gap_seconds
+        # cv2.resize and cv2.imencode release the GIL, so frames of one video
+        # can be resized and encoded in parallel while decoding continues.
+        self.encode_workers = max(1, encode_workers)
+        # Crop every sampled frame to the region where motion happens, so
+        # image tokens and upload bytes go to the athlete, not the gym.
+        self.crop_to_roi = crop_to_roi
+        self.roi_padding = roi_padding
+        # Resolution, codec and quality of the encoded frames, plus an
+        # optional per-request budget enforced with a quality ladder
+        self.encoding = encoding or EncodingProfile()
+        # Drop sampled frames whose dHash is within this many bits of the
+        # previous one and spend the freed slots on high-motion moments
+        # (None disables the pass)
+        self.dedupe_max_distance = dedupe_max_distance
         self._cv2 = None
+    
+    def __getstate__(self):
+        # Drop the cached module so the extractor can be sent to a process pool
+        state = self.__dict__.copy()
+        state["_cv2"] = None
+        return state
         
     def _get_cv2(self):
         """Lazy load opencv."""
@@ -103,8 +221,9 @@ class VideoFrameExtractor:
         self,
         video_path: str,
         num_frames: int = 16,
-        uniform: bool = True
-    ) -> List[FrameData]:
+        uniform: bool = True,
+        selection: Optional[str] = None
+    ) -> ExtractedFrames:
         """
         Extract frames from a video file.
         
@@ -112,12 +231,30 @@ class VideoFrameExtractor:
             video_path: Path to the video file
             num_frames: Number of frames to extract
             uniform: If True, extract uniformly spaced frames
+            selection: Frame selection strategy, overrides `uniform` when set:
+                "uniform", "keypoints" (start/quarters/end bisection) or
+                "motion" (rep top/bottom positions from a motion pass)
             
         Returns:
-            List of FrameData objects
+            List of FrameData objects, with near-duplicate counts
         """
         cv2 = self._get_cv2()
         
+        if selection is None:
+            selection = "uniform" if uniform else "keypoints"
+        if selection not in self.SELECTION_MODES:
+            raise ValueError(
+                f"Unknown frame selection: {selection}. "
+                f"Must be one of: {', '.join(self.SELECTION_MODES)}"
+            )
+        
+        frame_indices = None
+        profile = None
+        if selection == "motion" or self.crop_to_roi or self.dedupe_max_distance is not None:
+            profile = self.analyze_motion(video_path)
+        if selection == "motion":
+            frame_indices = select_motion_keyframes(profile, num_frames) or None
+        
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             raise ValueError(f"Cannot open video file: {video_path}")
@@ -127,78 +264,467 @@ class VideoFrameExtractor:
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
-        if uniform:
-            frame_indices = [
+        if frame_indices is None:
+            frame_indices = self._select_indices(selection, total_frames, num_frames)
+        
+        dropped = added = 0
+        if self.dedupe_max_distance is not None:
+            frame_indices, dropped, added = dedupe_keyframes(
+                profile,
+                frame_indices,
+                num_frames,
+                max_distance=self.dedupe_max_distance
+            )
+        
+        crop = self._roi_crop(profile, width, height) if self.crop_to_roi else None
+        decode_mode = self._choose_decode_mode(frame_indices, fps)
+        
+        try:
+            frames = ExtractedFrames(self._encode_frames(
+                self._read_frames(cap, frame_indices, decode_mode),
+                fps,
+                width,
+                height,
+                crop
+            ))
+        finally:
+            cap.release()
+        frames.duplicates_dropped = dropped
+        frames.motion_refills = added
+        return frames
+    
+    def extract_frames_at(
+        self,
+        video_path: str,
+        frame_indices: List[int],
+        motion: Optional[MotionProfile] = None
+    ) -> ExtractedFrames:
+        """
+        Extract the given source frames, e.g. ones time-aligned with
+        another camera angle; no selection or near-duplicate pass.
+        
+        Args:
+            video_path: Path to the video file
+            frame_indices: Source frame indices to decode
+            motion: The video's motion profile if already computed; reused
+                for the ROI crop instead of another motion pass
+        """
+        cv2 = self._get_cv2()
+        if self.crop_to_roi and motion is None:
+            motion = self.analyze_motion(video_path)
+        
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video file: {video_path}")
+        
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        crop = self._roi_crop(motion, width, height) if self.crop_to_roi else None
+        
+        try:
+            return ExtractedFrames(self._encode_frames(
+                self._read_frames(cap, frame_indices, self._choose_decode_mode(frame_indices, fps)),
+                fps,
+                width,
+                height,
+                crop
+            ))
+        finally:
+            cap.release()
+    
+    def _roi_crop(
+        self,
+        profile: MotionProfile,
+        width: int,
+        height: int
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """Pixel box of the motion ROI, or None to keep whole frames."""
+        roi = find_motion_roi(profile, padding_fraction=self.roi_padding)
+        if roi is None:
+            return None
+        x0, y0, x1, y1 = roi
+        return (
+            int(x0 * width),
+            int(y0 * height),
+            int(round(x1 * width)),
+            int(round(y1 * height)),
+        )
+    
+    def _encode_frames(
+        self,
+        decoded,
+        fps: float,
+        width: int,
+        height: int,
+        crop: Optional[Tuple[int, int, int, int]] = None
+    ) -> List[FrameData]:
+        """Resize and encode decoded frames, in parallel when configured."""
+        if self.encoding.has_budget:
+            return self._encode_within_budget(decoded, fps, width, height, crop)
+        if self.encode_workers == 1:
+            return [
+                self._frame_to_data(frame, idx, fps, width, height, crop)
+                for idx, frame in decoded
+            ]
+        return self._encode_parallel(decoded, fps, width, height, crop)
+    
+    def extract_rep_segments(
+        self,
+        video_path: str,
+        frames_per_rep: int = 6,
+        max_segments: int = 12
+    ) -> List[Tuple[RepSegment, List[FrameData]]]:
+        """
+        Split a video into repetitions and extract a dense frame set per rep.
+        
+        One motion pass finds the reps; the frames of all reps are then
+        decoded in a single pass over the video.
+        
+        Args:
+            video_path: Path to the video file
+            frames_per_rep: Frames extracted for each repetition
+            max_segments: Upper bound on segments, to cap VLM calls per video
+            
+        Returns:
+            (segment, frames) per repetition; empty if no reps were detected
+        """
+        cv2 = self._get_cv2()
+        
+        profile = self.analyze_motion(video_path)
+        segments = segment_reps(profile)[:max_segments]
+        if not segments:
+            return []
+        
+        segment_indices = [segment.frame_indices(frames_per_rep) for segment in segments]
+        all_indices = sorted(set(i for indices in segment_indices for i in indices))
+        
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video file: {video_path}")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        crop = self._roi_crop(profile, width, height) if self.crop_to_roi else None
+        try:
+            frames = self._encode_frames(
+                self._read_frames(cap, all_indices, self._choose_decode_mode(all_indices, fps)),
+                fps,
+                width,
+                height,
+                crop
+            )
+        finally:
+            cap.release()
+        
+        by_index = {frame.frame_number: frame for frame in frames}
+        return [
+            (segment, [by_index[i] for i in indices if i in by_index])
+            for segment, indices in zip(segments, segment_indices)
+        ]
+    
+    def _encode_parallel(
+        self,
+        decoded,
+        fps: float,
+        width: int,
+        height: int,
+        crop: Optional[Tuple[int, int, int, int]] = None
+    ) -> List[FrameData]:
+        """
+        Resize and encode frames on a thread pool while decoding continues.
+        
+        At most two frames per worker are held in flight, which bounds memory
+        for high resolution footage.
+        """
+        pending = deque()
+        frames = []
+        with ThreadPoolExecutor(max_workers=self.encode_workers) as pool:
+            for idx, frame in decoded:
+                pending.append(pool.submit(self._frame_to_data, frame, idx, fps, width, height, crop))
+                if len(pending) >= 2 * self.encode_workers:
+                    frames.append(pending.popleft().result())
+            while pending:
+                frames.append(pending.popleft().result())
+        return frames
+    
+    def analyze_motion(
+        self,
+        video_path: str,
+        sample_fps: float = 10.0,
+        thumbnail_width: int = 96
+    ) -> MotionProfile:
+        """
+        Decode the whole video once and build a motion profile from small
+        grayscale thumbnails.
+        
+        Args:
+            video_path: Path to the video file
+            sample_fps: Thumbnails to keep per second of video
+            thumbnail_width: Width of each thumbnail in pixels
+            
+        Returns:
+            MotionProfile for the video
+        """
+        cv2 = self._get_cv2()
+        
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Cannot open video file: {video_path}")
+        
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        step = max(1, int(round(fps / sample_fps))) if fps > 0 else 1
+        
+        thumbnails = []
+        indices = []
+        try:
+            position = 0
+            while cap.grab():
+                if position % step == 0:
+                    ret, frame = cap.retrieve()
+                    if ret:
+                        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                        scale = thumbnail_width / gray.shape[1]
+                        thumb_height = max(1, int(gray.shape[0] * scale))
+                        thumbnails.append(cv2.resize(
+                            gray,
+                            (thumbnail_width, thumb_height),
+                            interpolation=cv2.INTER_AREA
+                        ))
+                        indices.append(position)
+                position += 1
+        finally:
+            cap.release()
+        
+        if not thumbnails:
+            raise ValueError(f"No frames could be decoded from: {video_path}")
+        
+        return compute_motion_profile(
+            np.stack(thumbnails),
+            indices,
+            fps,
+            max(total_frames, position)
+        )
+    
+    def _select_indices(
+        self,
+        selection: str,
+        total_frames: int,
+        num_frames: int
+    ) -> List[int]:
+        """Frame indices for the position-based selection strategies."""
+        if selection != "keypoints":
+            return [
                 int(i * total_frames / num_frames) 
                 for i in range(num_frames)
             ]
-        else:
-            # Extract at key moments (start, quarter, half, three-quarter, end)
-            frame_indices = [
-                0,
-                total_frames // 4,
-                total_frames // 2,
-                3 * total_frames // 4,
-                total_frames - 1
-            ]
-            # Add more frames if needed
-            while len(frame_indices) < num_frames:
-                new_indices = []
-                for i in range(len(frame_indices) - 1):
-                    mid = (frame_indices[i] + frame_indices[i + 1]) // 2
-                    new_indices.append(mid)
-                frame_indices = sorted(set(frame_indices + new_indices))
-                frame_indices = frame_indices[:num_frames]
         
-        frames = []
-        for idx in frame_indices:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-            ret, frame = cap.read()
+        # Extract at key moments (start, quarter, half, three-quarter, end)
+        frame_indices = [
+            0,
+            total_frames // 4,
+            total_frames // 2,
+            3 * total_frames // 4,
+            total_frames - 1
+        ]
+        # Add more frames if needed
+        while len(frame_indices) < num_frames:
+            new_indices = []
+            for i in range(len(frame_indices) - 1):
+                mid = (frame_indices[i] + frame_indices[i + 1]) // 2
+                new_indices.append(mid)
+            frame_indices = sorted(set(frame_indices + new_indices))
+            frame_indices = frame_indices[:num_frames]
+        return frame_indices
+    
+    def _choose_decode_mode(self, frame_indices: List[int], fps: float) -> str:
+        """
+        Pick seek or sequential decoding for a set of target frames.
+        
+        Sequential decoding touches every frame up to the last target, while
+        seeking costs roughly a GOP worth of decoding per target. Sequential
+        wins whenever targets are denser than one per keyframe interval.
+        """
+        if self.decode_mode != "auto":
+            return self.decode_mode
+        if len(frame_indices) < 2:
+            return "seek"
+        
+        span = max(frame_indices) + 1
+        avg_gap = span / len(frame_indices)
+        max_gap = self.sequential_max_gap_seconds * (fps if fps > 0 else 30.0)
+        return "sequential" if avg_gap <= max_gap else "seek"
+    
+    def _read_frames(self, cap, frame_indices: List[int], decode_mode: str):
+        """Yield (index, frame) for each target index in ascending order."""
+        cv2 = self._get_cv2()
+        targets = sorted(set(frame_indices))
+        
+        if decode_mode == "seek":
+            for idx in targets:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+                ret, frame = cap.read()
+                if ret:
+                    yield idx, frame
+            return
+        
+        # Sequential: grab() advances the decoder without the colour conversion
+        # and copy, retrieve() is only paid for frames we keep.
+        position = 0
+        for idx in targets:
+            while position < idx:
+                if not cap.grab():
+                    return
+                position += 1
+            if not cap.grab():
+                return
+            position += 1
+            ret, frame = cap.retrieve()
             if ret:
-                # Resize if frame is too large (max 1024px on longest side)
-                max_dim = max(width, height)
-                if max_dim > 1024:
-                    scale = 1024 / max_dim
-                    new_width = int(width * scale)
-                    new_height = int(height * scale)
-                    frame = cv2.resize(frame, (new_width, new_height))
-                
-                # Encode to base64
-                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                img_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                timestamp_ms = (idx / fps) * 1000 if fps > 0 else 0
-                
-                frames.append(FrameData(
-                    frame_number=idx,
-                    timestamp_ms=timestamp_ms,
-                    image_base64=img_base64,
-                    width=frame.shape[1],
-                    height=frame.shape[0]
-                ))
-        
-        cap.release()
-        return frames
+                yield idx, frame
+    
+    def _encode_within_budget(
+        self,
+        decoded,
+        fps: float,
+        width: int,
+        height: int,
+        crop: Optional[Tuple[int, int, int, int]] = None
+    ) -> List[FrameData]:
+        """
+        Encode all frames of a request together, stepping down the quality
+        ladder until they fit the profile's budget.
+        
+        Frames are held in memory at the profile's full resolution so lower
+        rungs can be re-encoded without decoding the video again.
+        """
+        cv2 = self._get_cv2()
+        indices = []
+        images = []
+        for idx, frame in decoded:
+            indices.append(idx)
+            images.append(resize_to(cv2, self._crop(frame, crop), self.encoding.max_dimension))
+        
+        started = time.perf_counter()
+        if self.encode_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.encode_workers) as pool:
+                encoded, rung = encode_within_budget(cv2, images, self.encoding, pool.map)
+        else:
+            encoded, rung = encode_within_budget(cv2, images, self.encoding)
+        if images:
+            # Every rung tried counts towards the frames' encode time
+            per_frame = (time.perf_counter() - started) / len(images)
+            histogram = FRAME_ENCODE_SECONDS.labels(self.encoding.codec)
+            for _ in images:
+                histogram.observe(per_frame)
+        if rung[1] != self.encoding.quality or rung[0] < self.encoding.max_dimension:
+            logger.debug(f"Encoded {len(images)} frames at {rung[0]}px, quality {rung[1]} to fit budget")
+        
+        return [
+            self._to_frame_data(image, idx, fps, crop)
+            for idx, image in zip(indices, encoded)
+        ]
+    
+    @staticmethod
+    def _crop(frame, crop: Optional[Tuple[int, int, int, int]]):
+        if crop is None:
+            return frame
+        x0, y0, x1, y1 = crop
+        return frame[y0:y1, x0:x1]
+    
+    def _to_frame_data(self, image, idx: int, fps: float, crop) -> FrameData:
+        return FrameData(
+            frame_number=idx,
+            timestamp_ms=(idx / fps) * 1000 if fps > 0 else 0,
+            image_base64=base64.b64encode(image.data).decode('utf-8'),
+            width=image.width,
+            height=image.height,
+            crop=crop,
+            mime_type=self.encoding.mime_type
+        )
+    
+    def _frame_to_data(
+        self,
+        frame,
+        idx: int,
+        fps: float,
+        width: int,
+        height: int,
+        crop: Optional[Tuple[int, int, int, int]] = None
+    ) -> FrameData:
+        """Crop, resize and encode a decoded frame with the encoding profile."""
+        started = time.perf_counter()
+        image = encode_rung(
+            self._get_cv2(),
+            self._crop(frame, crop),
+            self.encoding.codec,
+            self.encoding.max_dimension,
+            self.encoding.quality
+        )
+        data = self._to_frame_data(image, idx, fps, crop)
+        FRAME_ENCODE_SECONDS.labels(self.encoding.codec).observe(time.perf_counter() - started)
+        return data
     
     def extract_frames_from_bytes(
         self,
         video_bytes: bytes,
-        num_frames: int = 16
-    ) -> List[FrameData]:
+        num_frames: int = 16,
+        selection: Optional[str] = None
+    ) -> ExtractedFrames:
         """Extract frames from video bytes."""
         with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as f:
             f.write(video_bytes)
             temp_path = f.name
         
         try:
-            return self.extract_frames(temp_path, num_frames)
+            return self.extract_frames(temp_path, num_frames, selection=selection)
         finally:
             os.unlink(temp_path)
 
 
+@dataclass
+class HTTPPoolConfig:
+    """Connection pool settings for the long-lived HTTP client of a VLM backend."""
+    max_connections: int = 32
+    max_keepalive_connections: int = 16
+    keepalive_expiry: float = 60.0  # Seconds an idle connection is kept open
+    http2: bool = False  # Requires the optional `h2` package
+    timeout: float = 120.0
+
+
 class VLMClient(ABC):
     """Abstract base class for VLM clients."""
     
+    pool: HTTPPoolConfig = HTTPPoolConfig()
+    metrics_backend: str = "custom"  # backend label of request metrics
+    
+    def _build_http_client(self, **kwargs) -> httpx.AsyncClient:
+        """
+        Create the pooled HTTP client for this backend.
+        
+        Clients are meant to live for the whole process so TCP/TLS
+        connections are reused across judgments.
+        """
+        http2 = self.pool.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but the 'h2' package is not installed, using HTTP/1.1")
+                http2 = False
+        
+        return httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool.max_connections,
+                max_keepalive_connections=self.pool.max_keepalive_connections,
+                keepalive_expiry=self.pool.keepalive_expiry
+            ),
+            http2=http2,
+            timeout=self.pool.timeout,
+            **kwargs
+        )
+    
     @abstractmethod
     async def analyze_frames(
         self,
@@ -209,11 +735,149 @@ class VLMClient(ABC):
         """Analyze video frames and return the model's response."""
         pass
     
+    async def complete(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> VLMResponse:
+        """
+        Analyze video frames, returning the answer with token usage.
+        
+        prompt_prefix is static text sent before the images so it forms a
+        cacheable prefix together with the system prompt. Clients that
+        don't lay messages out this way get it prepended to the prompt.
+        
+        response_schema is a JSON schema the answer must follow; clients
+        whose backend supports guided decoding constrain generation to it,
+        others rely on the prompt alone.
+        """
+        if prompt_prefix:
+            prompt = f"{prompt_prefix}\n\n{prompt}"
+        return VLMResponse(await self.analyze_frames(frames, prompt, system_prompt))
+    
+    async def stream(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[str, TokenUsage]]:
+        """
+        Analyze video frames, yielding the answer as it is generated.
+        
+        Yields text deltas, then a TokenUsage if the backend reported one.
+        Closing the iterator early (aclose()) cancels generation. Clients
+        without streaming support yield the whole answer at once.
+        """
+        response = await self.complete(frames, prompt, system_prompt, prompt_prefix, response_schema)
+        yield response.text
+        if response.usage is not None:
+            yield response.usage
+    
     @property
     @abstractmethod
     def model_name(self) -> str:
         """Return the model name/identifier."""
         pass
+    
+    def _track_request(self, frames: List[FrameData], *texts: Optional[str]):
+        """Context manager timing one upstream request and recording its payload size."""
+        payload_bytes = sum(len(frame.image_base64) for frame in frames)
+        payload_bytes += sum(len(text.encode("utf-8")) for text in texts if text)
+        return track_vlm_request(self.metrics_backend, getattr(self, "model", self.model_name), payload_bytes)
+
+
+def _chat_content(
+    frames: List[FrameData],
+    prompt: str,
+    prompt_prefix: Optional[str],
+    detail: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    User message content for OpenAI-compatible chat APIs.
+    
+    Static text goes before the images and per-request text after them,
+    so the system prompt and regulations form a prefix that vLLM automatic
+    prefix caching and OpenAI prompt caching can reuse.
+    """
+    content = []
+    if prompt_prefix:
+        content.append({"type": "text", "text": prompt_prefix})
+    for frame in frames:
+        image_url = {"url": f"data:{frame.mime_type};base64,{frame.image_base64}"}
+        if detail is not None:
+            image_url["detail"] = detail
+        content.append({"type": "image_url", "image_url": image_url})
+    content.append({"type": "text", "text": prompt})
+    return content
+
+
+def _chat_usage(result: Dict[str, Any]) -> Optional[TokenUsage]:
+    """Token usage of an OpenAI-compatible chat completion, if reported."""
+    usage = result.get("usage")
+    if not usage:
+        return None
+    details = usage.get("prompt_tokens_details") or {}
+    return TokenUsage(
+        prompt_tokens=usage.get("prompt_tokens"),
+        completion_tokens=usage.get("completion_tokens"),
+        cached_tokens=details.get("cached_tokens")
+    )
+
+
+def _chat_body(
+    model: str,
+    frames: List[FrameData],
+    prompt: str,
+    system_prompt: Optional[str],
+    prompt_prefix: Optional[str],
+    detail: Optional[str] = None,
+    **extra: Any
+) -> Dict[str, Any]:
+    """
+    Request body of an OpenAI-compatible chat completion.
+    
+    extra holds backend-specific fields such as guided decoding options.
+    """
+    messages = []
+    if system_prompt:
+        messages.append({"role": "system", "content": system_prompt})
+    messages.append({"role": "user", "content": _chat_content(frames, prompt, prompt_prefix, detail)})
+    return {
+        "model": model,
+        "messages": messages,
+        "max_tokens": 2048,
+        "temperature": 0.1,  # Low temperature for consistent judgments
+        **extra,
+    }
+
+
+async def _stream_chat(
+    client: httpx.AsyncClient,
+    body: Dict[str, Any]
+) -> AsyncIterator[Union[str, TokenUsage]]:
+    """Stream an OpenAI-compatible chat completion over server-sent events."""
+    body = {**body, "stream": True, "stream_options": {"include_usage": True}}
+    async with client.stream("POST", "/v1/chat/completions", json=body) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                return
+            chunk = json.loads(data)
+            for choice in chunk.get("choices") or []:
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+            usage = _chat_usage(chunk)
+            if usage is not None:
+                yield usage
 
 
 class VLLMClient(VLMClient):
@@ -222,15 +886,19 @@ class VLLMClient(VLMClient):
     Supports LLaVA, Qwen-VL, and other vision models served via vLLM.
     """
     
+    metrics_backend = "vllm"
+    
     def __init__(
         self,
         base_url: str = "http://localhost:8000",
         model: str = "llava-hf/llava-1.5-7b-hf",
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        pool: Optional[HTTPPoolConfig] = None
     ):
         self.base_url = base_url.rstrip('/')
         self.model = model
         self.api_key = api_key
+        self.pool = pool or HTTPPoolConfig()
         self._client = None
     
     @property
@@ -242,10 +910,9 @@ class VLLMClient(VLMClient):
             headers = {}
             if self.api_key:
                 headers["Authorization"] = f"Bearer {self.api_key}"
-            self._client = httpx.AsyncClient(
+            self._client = self._build_http_client(
                 base_url=self.base_url,
-                headers=headers,
-                timeout=120.0
+                headers=headers
             )
         return self._client
     
@@ -258,45 +925,58 @@ class VLLMClient(VLMClient):
         """
         Analyze frames using vLLM's OpenAI-compatible API.
         """
+        return (await self.complete(frames, prompt, system_prompt)).text
+    
+    async def complete(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> VLMResponse:
         client = await self._get_client()
         
-        # Build message content with images
-        content = []
-        
-        # Add frames as images
-        for i, frame in enumerate(frames):
-            content.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{frame.image_base64}"
-                }
-            })
-        
-        # Add the text prompt
-        content.append({
-            "type": "text",
-            "text": prompt
-        })
-        
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": content})
+        # Static text, then images, then the per-request prompt. With
+        # --enable-prefix-caching vLLM reuses the KV cache of the shared
+        # prefix across requests.
+        body = self._body(frames, prompt, system_prompt, prompt_prefix, response_schema)
         
         # Call vLLM's OpenAI-compatible endpoint
-        response = await client.post(
-            "/v1/chat/completions",
-            json={
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": 2048,
-                "temperature": 0.1,  # Low temperature for consistent judgments
-            }
-        )
-        response.raise_for_status()
+        with self._track_request(frames, prompt, system_prompt, prompt_prefix):
+            response = await client.post("/v1/chat/completions", json=body)
+            response.raise_for_status()
         
         result = response.json()
-        return result["choices"][0]["message"]["content"]
+        return VLMResponse(result["choices"][0]["message"]["content"], _chat_usage(result))
+    
+    async def stream(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[str, TokenUsage]]:
+        client = await self._get_client()
+        body = self._body(frames, prompt, system_prompt, prompt_prefix, response_schema)
+        with self._track_request(frames, prompt, system_prompt, prompt_prefix):
+            async for item in _stream_chat(client, body):
+                yield item
+    
+    def _body(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str],
+        prompt_prefix: Optional[str],
+        response_schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        extra = {}
+        if response_schema is not None:
+            # vLLM's guided decoding extension constrains sampling to the schema
+            extra["guided_json"] = response_schema
+        return _chat_body(self.model, frames, prompt, system_prompt, prompt_prefix, **extra)
     
     async def close(self):
         if self._client:
@@ -307,13 +987,25 @@ class VLLMClient(VLMClient):
 class OpenAIClient(VLMClient):
     """Client for OpenAI GPT-4V/GPT-4o models."""
     
+    metrics_backend = "openai"
+    # Structured outputs (strict json_schema) are only accepted by these
+    # model families; the first gpt-4o snapshot predates them
+    STRUCTURED_OUTPUT_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+    NO_STRUCTURED_OUTPUT_MODELS = ("gpt-4o-2024-05-13",)
+    # JSON mode guarantees valid JSON but not the schema
+    JSON_MODE_MODELS = ("gpt-4o-2024-05-13", "gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-3.5-turbo")
+    
     def __init__(
         self,
         api_key: Optional[str] = None,
-        model: str = "gpt-4o"
+        model: str = "gpt-4o",
+        pool: Optional[HTTPPoolConfig] = None,
+        image_detail: str = "high"
     ):
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.model = model
+        self.image_detail = image_detail  # "low", "high" or "auto"
+        self.pool = pool or HTTPPoolConfig()
         self._client = None
     
     @property
@@ -322,13 +1014,12 @@ class OpenAIClient(VLMClient):
     
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
-            self._client = httpx.AsyncClient(
+            self._client = self._build_http_client(
                 base_url="https://api.openai.com",
                 headers={
                     "Authorization": f"Bearer {self.api_key}",
                     "Content-Type": "application/json"
-                },
-                timeout=120.0
+                }
             )
         return self._client
     
@@ -338,37 +1029,85 @@ class OpenAIClient(VLMClient):
         prompt: str,
         system_prompt: Optional[str] = None
     ) -> str:
+        return (await self.complete(frames, prompt, system_prompt)).text
+    
+    async def complete(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> VLMResponse:
         client = await self._get_client()
         
-        content = []
-        for frame in frames:
-            content.append({
-                "type": "image_url",
-                "image_url": {
-                    "url": f"data:image/jpeg;base64,{frame.image_base64}",
-                    "detail": "high"
-                }
-            })
-        content.append({"type": "text", "text": prompt})
+        # OpenAI caches prompt prefixes of 1024+ tokens automatically; the
+        # system prompt and regulations come first so they can match
+        body = self._body(frames, prompt, system_prompt, prompt_prefix, response_schema)
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": content})
-        
-        response = await client.post(
-            "/v1/chat/completions",
-            json={
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": 2048,
-                "temperature": 0.1,
-            }
-        )
-        response.raise_for_status()
+        with self._track_request(frames, prompt, system_prompt, prompt_prefix):
+            response = await client.post("/v1/chat/completions", json=body)
+            response.raise_for_status()
         
         result = response.json()
-        return result["choices"][0]["message"]["content"]
+        return VLMResponse(result["choices"][0]["message"]["content"], _chat_usage(result))
+    
+    async def stream(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[str, TokenUsage]]:
+        client = await self._get_client()
+        body = self._body(frames, prompt, system_prompt, prompt_prefix, response_schema)
+        with self._track_request(frames, prompt, system_prompt, prompt_prefix):
+            async for item in _stream_chat(client, body):
+                yield item
+    
+    def _body(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str],
+        prompt_prefix: Optional[str],
+        response_schema: Optional[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        extra = {}
+        if response_schema is not None:
+            response_format = self._response_format(response_schema)
+            if response_format is not None:
+                extra["response_format"] = response_format
+        return _chat_body(
+            self.model,
+            frames,
+            prompt,
+            system_prompt,
+            prompt_prefix,
+            self.image_detail,
+            **extra
+        )
+    
+    def _response_format(self, response_schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Pick the strongest response_format the model accepts.
+        
+        Older models such as gpt-4-vision-preview reject response_format
+        outright, so they get None and rely on the schema in the prompt.
+        """
+        if (
+            self.model.startswith(self.STRUCTURED_OUTPUT_MODELS)
+            and not self.model.startswith(self.NO_STRUCTURED_OUTPUT_MODELS)
+        ):
+            # Structured outputs: strict schemas are enforced while decoding
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": "judgment", "schema": response_schema, "strict": True},
+            }
+        if self.model.startswith(self.JSON_MODE_MODELS):
+            return {"type": "json_object"}
+        return None
     
     async def close(self):
         if self._client:
@@ -379,13 +1118,18 @@ class OpenAIClient(VLMClient):
 class GeminiClient(VLMClient):
     """Client for Google Gemini Pro Vision."""
     
+    metrics_backend = "gemini"
+    API_URL = "https://generativelanguage.googleapis.com/v1beta/models"
+    
     def __init__(
         self,
         api_key: Optional[str] = None,
-        model: str = "gemini-1.5-pro"
+        model: str = "gemini-1.5-pro",
+        pool: Optional[HTTPPoolConfig] = None
     ):
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
         self.model = model
+        self.pool = pool or HTTPPoolConfig()
         self._client = None
     
     @property
@@ -394,7 +1138,7 @@ class GeminiClient(VLMClient):
     
     async def _get_client(self) -> httpx.AsyncClient:
         if self._client is None:
-            self._client = httpx.AsyncClient(timeout=120.0)
+            self._client = self._build_http_client()
         return self._client
     
     async def analyze_frames(
@@ -403,8 +1147,82 @@ class GeminiClient(VLMClient):
         prompt: str,
         system_prompt: Optional[str] = None
     ) -> str:
+        return (await self.complete(frames, prompt, system_prompt)).text
+    
+    async def complete(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> VLMResponse:
         client = await self._get_client()
         
+        with self._track_request(frames, prompt, system_prompt, prompt_prefix):
+            response = await client.post(
+                f"{self.API_URL}/{self.model}:generateContent",
+                params={"key": self.api_key},
+                json=self._body(frames, prompt, system_prompt, prompt_prefix, response_schema)
+            )
+            response.raise_for_status()
+        
+        result = response.json()
+        return VLMResponse(
+            result["candidates"][0]["content"]["parts"][0]["text"],
+            self._usage(result)
+        )
+    
+    async def stream(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        prompt_prefix: Optional[str] = None,
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Union[str, TokenUsage]]:
+        client = await self._get_client()
+        usage = None
+        with self._track_request(frames, prompt, system_prompt, prompt_prefix):
+            async with client.stream(
+                "POST",
+                f"{self.API_URL}/{self.model}:streamGenerateContent",
+                params={"key": self.api_key, "alt": "sse"},
+                json=self._body(frames, prompt, system_prompt, prompt_prefix, response_schema)
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    chunk = json.loads(line[len("data:"):])
+                    for candidate in chunk.get("candidates") or []:
+                        for part in (candidate.get("content") or {}).get("parts") or []:
+                            if part.get("text"):
+                                yield part["text"]
+                    # Every chunk carries the running totals; keep the last
+                    usage = self._usage(chunk) or usage
+        if usage is not None:
+            yield usage
+    
+    @staticmethod
+    def _usage(result: Dict[str, Any]) -> Optional[TokenUsage]:
+        metadata = result.get("usageMetadata")
+        if not metadata:
+            return None
+        return TokenUsage(
+            prompt_tokens=metadata.get("promptTokenCount"),
+            completion_tokens=metadata.get("candidatesTokenCount"),
+            cached_tokens=metadata.get("cachedContentTokenCount")
+        )
+    
+    def _body(
+        self,
+        frames: List[FrameData],
+        prompt: str,
+        system_prompt: Optional[str],
+        prompt_prefix: Optional[str],
+        response_schema: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         # Build parts for Gemini
         parts = []
         
@@ -412,11 +1230,15 @@ class GeminiClient(VLMClient):
         if system_prompt:
             parts.append({"text": system_prompt + "\n\n"})
         
+        # Static text before the images, for Gemini's implicit caching
+        if prompt_prefix:
+            parts.append({"text": prompt_prefix + "\n\n"})
+        
         # Add images
         for frame in frames:
             parts.append({
                 "inline_data": {
-                    "mime_type": "image/jpeg",
+                    "mime_type": frame.mime_type,
                     "data": frame.image_base64
                 }
             })
@@ -424,23 +1246,19 @@ class GeminiClient(VLMClient):
         # Add the prompt
         parts.append({"text": prompt})
         
-        url = f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
+        generation_config = {
+            "temperature": 0.1,
+            "maxOutputTokens": 2048,
+        }
+        if response_schema is not None:
+            # Controlled generation: JSON constrained to the schema
+            generation_config["responseMimeType"] = "application/json"
+            generation_config["responseSchema"] = gemini_schema(response_schema)
         
-        response = await client.post(
-            url,
-            params={"key": self.api_key},
-            json={
-                "contents": [{"parts": parts}],
-                "generationConfig": {
-                    "temperature": 0.1,
-                    "maxOutputTokens": 2048,
-                }
-            }
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        return result["candidates"][0]["content"]["parts"][0]["text"]
+        return {
+            "contents": [{"parts": parts}],
+            "generationConfig": generation_config
+        }
     
     async def close(self):
         if self._client:
@@ -458,32 +1276,54 @@ def create_vlm_client(
         return VLLMClient(
             model=kwargs.get("model", "llava-hf/llava-1.5-7b-hf"),
             base_url=kwargs.get("base_url", "http://localhost:8000"),
-            api_key=kwargs.get("api_key")
+            api_key=kwargs.get("api_key"),
+            pool=kwargs.get("pool")
         )
     
     elif backend == VLMBackend.VLLM_QWEN:
         return VLLMClient(
             model=kwargs.get("model", "Qwen/Qwen2-VL-7B-Instruct"),
             base_url=kwargs.get("base_url", "http://localhost:8000"),
-            api_key=kwargs.get("api_key")
+            api_key=kwargs.get("api_key"),
+            pool=kwargs.get("pool")
         )
     
     elif backend == VLMBackend.OPENAI_GPT4V:
         return OpenAIClient(
             model="gpt-4-vision-preview",
-            api_key=kwargs.get("api_key")
+            api_key=kwargs.get("api_key"),
+            pool=kwargs.get("pool"),
+            image_detail=kwargs.get("image_detail", "high")
         )
     
     elif backend == VLMBackend.OPENAI_GPT4O:
         return OpenAIClient(
             model="gpt-4o",
-            api_key=kwargs.get("api_key")
+            api_key=kwargs.get("api_key"),
+            pool=kwargs.get("pool"),
+            image_detail=kwargs.get("image_detail", "high")
         )
     
     elif backend == VLMBackend.GEMINI_PRO:
         return GeminiClient(
             model=kwargs.get("model", "gemini-1.5-pro"),
-            api_key=kwargs.get("api_key")
+            api_key=kwargs.get("api_key"),
+            pool=kwargs.get("pool")
+        )
+    
+    elif backend == VLMBackend.RECORD_REPLAY:
+        # Imported here: replay wraps the clients defined in this module
+        from .replay import RecordReplayClient, ReplayStore
+        
+        wrapped = kwargs.get("replay_backend")
+        if wrapped is None or wrapped == VLMBackend.RECORD_REPLAY:
+            raise ValueError("The record_replay backend needs replay_backend set to a real backend")
+        client_kwargs = {k: v for k, v in kwargs.items() if not k.startswith("replay_")}
+        return RecordReplayClient(
+            create_vlm_client(wrapped, **client_kwargs),
+            ReplayStore(kwargs.get("replay_dir") or os.path.join(tempfile.gettempdir(), "video_judge_replay")),
+            mode=kwargs.get("replay_mode", "replay"),
+            latency_scale=kwargs.get("replay_latency_scale", 0.0)
         )
     
     else:
@@ -0,0 +1,244 @@
+"""
+Standalone worker that processes queued video judgments.
+
+Run one or more of these next to the API to scale judging capacity
+independently of request handling:
+
+    python -m app.video_judge.worker --concurrency 4
+
+Workers and the API must share the job database and the spool directory
+that uploaded videos are written to (VLM_JOB_SPOOL_DIR).
+"""
+
+import argparse
+import asyncio
+import functools
+import logging
+import os
+import signal
+import socket
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from .regulations import Discipline
+from .judge_service import StreetLiftingJudge, JudgeConfig
+from .job_queue import JudgmentJobQueue, JobStatus, build_judgment_payload
+from .scheduler import Priority
+from .progress import JobStage, progress_bus
+from .retry import is_retryable
+
+
+logger = logging.getLogger(__name__)
+
+
+class JudgmentWorker:
+    """Claims jobs from the queue and runs them through StreetLiftingJudge."""
+
+    def __init__(
+        self,
+        queue: JudgmentJobQueue,
+        config: JudgeConfig,
+        concurrency: int = 2,
+        poll_interval: float = 1.0,
+        heartbeat_interval: float = 10.0,
+        heartbeat_timeout: float = 60.0,
+        maintenance_interval: float = 60.0,
+        worker_id: Optional[str] = None,
+        judge: Optional[StreetLiftingJudge] = None
+    ):
+        self.queue = queue
+        self.config = config
+        # A judge passed in is shared with its owner (e.g. the API process)
+        # and is not closed by the worker.
+        self.judge = judge
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.maintenance_interval = maintenance_interval
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._tasks: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def stop(self):
+        """Stop claiming new jobs; in-flight jobs are allowed to finish."""
+        self._stopping.set()
+
+    async def run(self):
+        """Claim and process jobs until stop() is called."""
+        judge = self.judge or StreetLiftingJudge(self.config)
+        slots = asyncio.Semaphore(self.concurrency)
+        last_maintenance = 0.0
+        loop = asyncio.get_running_loop()
+        logger.info(f"Worker {self.worker_id} started with concurrency {self.concurrency}")
+
+        try:
+            while not self._stopping.is_set():
+                if loop.time() - last_maintenance >= self.maintenance_interval:
+                    await self._maintenance()
+                    last_maintenance = loop.time()
+
+                await slots.acquire()
+                try:
+                    job = await asyncio.to_thread(self.queue.claim, self.worker_id)
+                except Exception as e:
+                    logger.error(f"Failed to claim job: {e}")
+                    job = None
+
+                if job is None:
+                    slots.release()
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                task = asyncio.create_task(self._process(judge, job))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                task.add_done_callback(lambda _: slots.release())
+
+            if self._tasks:
+                await asyncio.gather(*self._tasks, return_exceptions=True)
+        finally:
+            if self.judge is None:
+                await judge.close()
+            logger.info(f"Worker {self.worker_id} stopped")
+
+    async def _maintenance(self):
+        """Recover jobs from dead workers and drop expired records."""
+        try:
+            await asyncio.to_thread(self.queue.requeue_stale, self.heartbeat_timeout)
+            purged = await asyncio.to_thread(self.queue.purge_expired)
+            if purged:
+                logger.info(f"Purged {purged} expired judgment jobs")
+        except Exception as e:
+            logger.error(f"Queue maintenance failed: {e}")
+
+    async def _heartbeat(self, judgment_id: str):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            alive = await asyncio.to_thread(self.queue.heartbeat, judgment_id, self.worker_id)
+            if not alive:
+                logger.warning(f"Lost claim on job {judgment_id}")
+                return
+
+    async def _record_stage(self, job: Dict, stage: str, **extra):
+        """
+        Append a stage transition to the job's history and notify listeners.
+        
+        Progress reporting is best effort and never fails the job.
+        """
+        now = datetime.utcnow()
+        submitted_at = datetime.fromisoformat(job["submitted_at"])
+        entry = {
+            "stage": stage,
+            "at": now.isoformat(),
+            "elapsed_ms": round((now - submitted_at).total_seconds() * 1000, 1),
+            "attempt": job["attempts"],
+            **extra,
+        }
+        job["stage_history"].append(entry)
+        try:
+            await asyncio.to_thread(
+                self.queue.record_stage, job["id"], stage, job["stage_history"]
+            )
+        except Exception as e:
+            logger.warning(f"Could not record stage {stage} of job {job['id']}: {e}")
+        progress_bus.publish(job["id"], entry)
+    
+    async def _process(self, judge: StreetLiftingJudge, job: Dict):
+        judgment_id = job["id"]
+        heartbeat = asyncio.create_task(self._heartbeat(judgment_id))
+        status = JobStatus.FAILED
+        try:
+            result = await judge.analyze_video(
+                discipline=Discipline(job["discipline"]),
+                video_path=job["video_path"],
+                camera_angle=job["camera_angle"],
+                additional_context=job["additional_context"],
+                force_refresh=job["force_refresh"],
+                priority=Priority(job["priority"]),
+                on_stage=functools.partial(self._record_stage, job)
+            )
+            await asyncio.to_thread(
+                self.queue.complete,
+                judgment_id,
+                self.worker_id,
+                build_judgment_payload(judgment_id, result)
+            )
+            status = JobStatus.COMPLETED
+            await self._record_stage(job, JobStage.COMPLETED)
+        except Exception as e:
+            # Not for RetriesExhausted: the VLM stage has already retried,
+            # and another attempt would only repeat its retries
+            retryable = is_retryable(e)
+            logger.warning(
+                f"Job {judgment_id} attempt {job['attempts']} failed "
+                f"({'retryable' if retryable else 'permanent'}): {e}"
+            )
+            status = await asyncio.to_thread(
+                self.queue.fail, job, self.worker_id, str(e), retryable
+            )
+            # A retry puts the job back in the queue
+            stage = JobStage.QUEUED if status == JobStatus.PENDING else JobStage.FAILED
+            await self._record_stage(job, stage, error=str(e))
+        finally:
+            heartbeat.cancel()
+            # The video is only needed until the job reaches a final state
+            if status != JobStatus.PENDING and os.path.exists(job["video_path"]):
+                os.unlink(job["video_path"])
+
+
+async def _run_worker(args: argparse.Namespace):
+    from .job_queue import get_job_queue
+    from .video_judge import get_judge_config
+
+    worker = JudgmentWorker(
+        get_job_queue(),
+        get_judge_config(),
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+        heartbeat_interval=args.heartbeat_interval,
+        heartbeat_timeout=args.heartbeat_timeout,
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    await worker.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Street lifting video judge worker")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=int(os.getenv("VLM_WORKER_CONCURRENCY", "2")),
+        help="Maximum jobs processed at once"
+    )
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between polls when idle")
+    parser.add_argument("--heartbeat-interval", type=float, default=10.0, help="Seconds between heartbeats")
+    parser.add_argument(
+        "--heartbeat-timeout",
+        type=float,
+        default=60.0,
+        help="Seconds without a heartbeat before a job is considered abandoned"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO"),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+    )
+    asyncio.run(_run_worker(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ from app.video_judge import video_judge
 app = FastAPI(
     title="Street Lifting Competition API",
     description="API for managing street lifting competitions with AI-powered video judging",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=video_judge.lifespan
 )
 
 app.add_middleware(
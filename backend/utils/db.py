@@ -1,17 +1,20 @@
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, make_url, text
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
 class Database:
-    def __init__(self):
+    def __init__(self, url: Optional[str] = None):
         """
         Initialize database connection with individual credentials and optimized pool settings.
         
         Args:
+            url: Optional full database URL (e.g. sqlite:///jobs.db). When not
+                given, a PostgreSQL URL is built from the DB_* environment variables:
             host: Database host address
             port: Database port number
             name: Database name
@@ -25,22 +28,36 @@ class Database:
         self.password = os.getenv("DB_PASSWORD")
         self.username = os.getenv("DB_USERNAME")
         # Construct database URL
-        db_url = f"postgresql://{self.username}:{self.password}@{self.host}:{self.port}/{self.name}"
+        db_url = url or f"postgresql://{self.username}:{self.password}@{self.host}:{self.port}/{self.name}"
         
+        # Connection pool settings. Only server databases get a sized queue
+        # pool; SQLite's in-memory pools reject the sizing arguments
+        parsed_url = make_url(db_url)
+        pool_settings = {}
+        if parsed_url.get_backend_name() == "sqlite":
+            if parsed_url.database in (None, "", ":memory:"):
+                # One shared connection, or each thread would see its own
+                # empty in-memory database
+                pool_settings = {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+        else:
+            pool_settings = {
+                "pool_size": 10,  # Number of connections to maintain persistently
+                "max_overflow": 20,  # Maximum number of connections that can overflow
+                "pool_timeout": 30,  # Seconds to wait before giving up on getting a connection
+                "pool_recycle": 3600,  # Recycle connections after 1 hour (prevent stale connections)
+            }
+
         # Optimized engine configuration with connection pooling
         self.engine = create_engine(
             db_url,
-            # Connection pool settings
-            pool_size=10,  # Number of connections to maintain persistently
-            max_overflow=20,  # Maximum number of connections that can overflow
-            pool_timeout=30,  # Seconds to wait before giving up on getting a connection
-            pool_recycle=3600,  # Recycle connections after 1 hour (prevent stale connections)
+            **pool_settings,
             pool_pre_ping=True,  # Verify connections before using them
             # Performance optimizations
             echo=False,  # Set to True for SQL query logging (useful for debugging)
             future=True,  # Use SQLAlchemy 2.0 style
         )
         self.session_maker = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.dialect = self.engine.dialect.name
 
     def execute_action(self, query: str, params: Optional[Dict[str, Any]] = None) -> int:
         """
@@ -131,4 +148,18 @@ class Database:
         """Get a database session for advanced operations."""
         return self.session_maker()
 
-db = Database()
\ No newline at end of file
+_db: Optional[Database] = None
+
+
+def __getattr__(name: str):
+    """
+    Create the application database (utils.db.db) on first use rather than at
+    import, so code that brings its own URL, like the video judge job queue on
+    VLM_JOB_DB_URL, can import this module without the DB_* variables.
+    """
+    global _db
+    if name == "db":
+        if _db is None:
+            _db = Database()
+        return _db
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file